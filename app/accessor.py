@@ -1,35 +1,59 @@
 from __future__ import annotations
 from datetime import datetime, timedelta, timezone, date
-import requests
-from typing import TypedDict, List, Tuple, Optional, Union, Iterator
+import threading
+from time import sleep, perf_counter
+import queue
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TypedDict, List, Tuple, Optional, Union, Iterator, Callable, Dict
 from typing_extensions import Self
 import json
-from dataclasses import dataclass, asdict
+import csv
+from dataclasses import dataclass, asdict, fields
 import logging
-from .utils import loadConfig, execStmt, execStmtMany, execStmtFetchAll
+from .utils import LazyConfig, DEFAULT_CONFIG_PATH, lazyImport, configureLogging, applyPoolConfig, getConnection, transaction, inTransaction, execStmt, execStmtMany, execStmtFetchAll, execStmtCopy, execStmtIter, profiled, profileSpan, profileCount, startProfiling
+from .cache import applyCacheConfig, configureCache, cacheGet, cachePut, cacheTtl
+from .columnar import COLUMNAR_FORMATS, requirePyarrow, valuesSchema, writeBatches
 from textwrap import dedent
 import argparse
-import pandas as pd
 import sys
+from functools import lru_cache
+from contextlib import nullcontext
+from itertools import groupby
 # from collections.abc import Iterator
 from urllib.parse import urlencode
 
 # startForecastTime = "2026-01-27T00%3A00%3A00Z"
 # endForecastTime = "2026-01-28T00%3A00%3A00Z"
 documentFormat = "PI_JSON"
-config_path = "config/config.json"
+config_path = DEFAULT_CONFIG_PATH
 
 SENTINEL = datetime(1900, 1, 1, tzinfo=timezone.utc)
 
-config = loadConfig(config_path)
+# series whose values are read per query in Timeseries.read
+READ_CHUNK_SIZE = 200
 
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-    handlers=[
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+# rows fetched per round trip by server-side cursors in Timeseries.export_to_file
+EXPORT_BATCH_SIZE = 10000
+
+# row count from which TimeseriesValue.create_many uses COPY instead of executemany. Overridable with "copy_threshold" in config
+COPY_THRESHOLD = 1000
+
+# value rows deleted per statement (and transaction) by Timeseries.delete
+DELETE_BATCH_SIZE = 10000
+
+# heavy modules are imported on first use, so that importing this module (and --help) stays fast
+requests = lazyImport("requests")
+ijson = lazyImport("ijson")
+pd = lazyImport("pandas")
+np = lazyImport("numpy")
+
+def apply_config(data : dict):
+    """Applies the pool and cache settings of a configuration when it is loaded. Settings made before (with configurePool, configureCache or in pool_config, cache_config) are kept"""
+    applyPoolConfig(data.get("pool", {}))
+    applyCacheConfig(data.get("cache", {}))
+
+# read on first use from the SSTDFEWS_CONFIG environment variable path, or config/config.json. See use_config
+config = LazyConfig(on_load=apply_config)
 
 logger = logging.getLogger(__name__)
 
@@ -77,6 +101,11 @@ class GetTimeseriesResponse(TypedDict):
     timeZone : str
     timeseries : List[TimeseriesResponse]
 
+class EventColumns(TypedDict):
+    time : np.ndarray # datetime64[ns], UTC
+    value : np.ndarray # float64, NaN where missing
+    flag : np.ndarray # int64
+
 class TimeseriesKey(TypedDict):
     locationId : str
     parameterId : str
@@ -109,6 +138,7 @@ class Location:
         )
 
 
+    @profiled("location_create")
     def create(self) -> str:
         id = execStmt(
             config["user_dsn"],
@@ -134,6 +164,49 @@ class Location:
             (self.locationId, self.stationName, self.lon, self.lat))
         return id
     
+    @classmethod
+    @profiled("location_create")
+    def create_many(cls, locations : List[Self]) -> List[str]:
+        """Upserts locations in one statement. Duplicated locationIds are collapsed, the last one wins
+
+        Args:
+            locations (List[Self]): locations to upsert
+
+        Returns:
+            List[str]: upserted location ids
+        """
+        unique = {location.locationId: location for location in locations}
+        if not len(unique):
+            return []
+        matches = execStmtFetchAll(
+            config["user_dsn"],
+            dedent("""
+                INSERT INTO locations (id, station_name, geometry) 
+                SELECT 
+                    l.id, 
+                    l.station_name, 
+                    ST_SetSrid(
+                        ST_point(
+                            l.lon,
+                            l.lat
+                        ),
+                        4326
+                    )
+                FROM unnest(%s::text[], %s::text[], %s::float8[], %s::float8[]) AS l(id, station_name, lon, lat)
+                ON CONFLICT (id) 
+                    DO UPDATE SET 
+                        station_name=excluded.station_name, 
+                        geometry=excluded.geometry 
+                RETURNING id
+            """),
+            (
+                [l.locationId for l in unique.values()],
+                [l.stationName for l in unique.values()],
+                [l.lon for l in unique.values()],
+                [l.lat for l in unique.values()]
+            ))
+        return [m["id"] for m in matches]
+
     @classmethod
     def read_one(cls, locationId : str):
         matches = execStmtFetchAll(
@@ -175,7 +248,25 @@ class TimeseriesValue:
     # def parseValues(data : TimeseriesResponse, time_zone : float=0.0) -> List[TimeseriesValue]:
         if "events" not in data:
             raise ValueError("No se encontraron timeseries. Falta 'events' en la respuesta de /timeseries.")
-        return [ cls.parse_one(event, time_zone, null_value) for event in data["events"] ]
+        return cls.from_columns(parseEvents(data["events"], time_zone, null_value), time_zone)
+
+    @classmethod
+    def from_columns(cls, columns : EventColumns, time_zone : float=0.0) -> List[Self]:
+        """Builds the list of values from the arrays returned by parseEvents. Times are expressed in time_zone and NaN values become None, as in parse_one
+
+        Args:
+            columns (EventColumns): parsed events
+            time_zone (float, optional): hours offset from UTC of the returned times. Defaults to 0.0.
+
+        Returns:
+            List[Self]: values
+        """
+        times = pd.DatetimeIndex(columns["time"], tz="UTC").tz_convert(_timezone(time_zone)).to_pydatetime()
+        values = [None if v != v else v for v in columns["value"].tolist()]
+        return [
+            cls(time = t, value = v, flag = f)
+            for t, v, f in zip(times, values, columns["flag"].tolist())
+        ]
 
     def to_row(self):
         return (self.timeseries_id, self.time, self.value, self.flag, self.comment)
@@ -197,23 +288,76 @@ class TimeseriesValue:
         -- RETURNING id
     """
 
+    copy_stage_stmt = """
+        CREATE TEMP TABLE IF NOT EXISTS timeseries_values_stage (
+            ord         BIGSERIAL,
+            series_id   BIGINT,
+            time        TIMESTAMPTZ,
+            value       DOUBLE PRECISION,
+            flag        INTEGER,
+            comment     TEXT
+        ) ON COMMIT DROP;
+        TRUNCATE timeseries_values_stage
+    """
+
+    copy_stmt = "COPY timeseries_values_stage (series_id, time, value, flag, comment) FROM STDIN"
+
+    # DISTINCT ON keeps the last staged row of each (series_id, time), as the sequential executemany upsert would
+    copy_merge_stmt = """
+        INSERT INTO timeseries_values (series_id, time, value, flag, comment)
+        SELECT DISTINCT ON (series_id, time) series_id, time, value, flag, comment
+        FROM timeseries_values_stage
+        ORDER BY series_id, time, ord DESC
+        ON CONFLICT (series_id, time) 
+            DO UPDATE SET 
+                value=excluded.value, 
+                flag=excluded.flag,
+                comment=excluded.comment
+    """
+
     @classmethod
-    def create_many(cls, values : List[Self], timeseries_id : int) -> int:
+    def create_many(cls, values : Union[TimeseriesValues, List[Self]], timeseries_id : int) -> int:
         """Upserts into timeseries_values
 
         Args:
-            values (List[Self]): list of TimeseriesValues
+            values (Union[TimeseriesValues, List[Self]]): values container or list of TimeseriesValue
             timeseries_id (int): timeseries identifier
 
         Returns:
             int: upsertion row count
         """
+        if isinstance(values, TimeseriesValues):
+            values.timeseries_id = timeseries_id
+            return cls.create_rows(values.to_rows())
         rows = []
         for v in values:
             if v.value is None:
                 continue
             v.timeseries_id = timeseries_id
             rows.append(v.to_row())
+        return cls.create_rows(rows)
+
+    @classmethod
+    @profiled("values_create")
+    def create_rows(cls, rows : List[tuple]) -> int:
+        """Upserts (series_id, time, value, flag, comment) rows into timeseries_values. From config["copy_threshold"] rows on, they are streamed with COPY into a staging table and merged with one set-based upsert
+
+        Args:
+            rows (List[tuple]): rows as returned by to_row()
+
+        Returns:
+            int: upsertion row count
+        """
+        if len(rows) and config.get("partitioning", {}).get("enabled"):
+            ensure_partitions(min(r[1] for r in rows), max(r[1] for r in rows))
+        if len(rows) >= config.get("copy_threshold", COPY_THRESHOLD):
+            return execStmtCopy(
+                config["user_dsn"],
+                cls.copy_stage_stmt,
+                cls.copy_stmt,
+                cls.copy_merge_stmt,
+                rows
+            )
         return execStmtMany(
             config["user_dsn"],
             cls.create_stmt,
@@ -229,11 +373,128 @@ class TimeseriesValue:
             self.to_row())
         self.id = id
         return id
+
+    packed_create_stmt = "INSERT INTO timeseries_packed (series_id, start_time, timestep, value_array, flag_array) VALUES (%s, %s, %s, %s::float8[], %s::int2[])"
+
+    packed_read_stmt = "SELECT series_id, time, value, flag, comment, id FROM timeseries_values_all WHERE series_id = ANY(%s) ORDER BY series_id, time"
+
+    @classmethod
+    def create_packed(cls, values : Union[TimeseriesValues, List[Self]], timeseries_id : int, timestep : timedelta) -> int:
+        """Upserts the values of a regular series into timeseries_packed (see create_packed_many)
+
+        Args:
+            values (Union[TimeseriesValues, List[Self]]): values container or list of TimeseriesValue
+            timeseries_id (int): timeseries identifier
+            timestep (timedelta): timestep of the series
+
+        Returns:
+            int: upserted value count
+        """
+        return cls.create_packed_many([(values, timeseries_id, timestep)])[0]
+
+    @classmethod
+    @profiled("values_create")
+    def create_packed_many(cls, items : List[Tuple[Union[TimeseriesValues, List[Self]], int, timedelta]]) -> List[int]:
+        """Upserts the values of regular series into timeseries_packed with set-based statements: one lock of the headers, one read of the stored values, one delete per table and one executemany of all chunks. The stored values of each series (in either layout) are merged with the new ones, the new ones winning at equal times (and later items over earlier ones of the same series), and the series is rewritten as chunks of packed_storage.chunk_size timesteps. Series that do not fit the packed layout (see TimeseriesValues.to_chunks) are stored as rows of timeseries_values instead, in one load
+
+        Args:
+            items (List[Tuple[Union[TimeseriesValues, List[Self]], int, timedelta]]): (values, timeseries id, timestep) of each series
+
+        Returns:
+            List[int]: upserted value count of each item
+        """
+        counts = []
+        new_values = {}
+        timesteps = {}
+        for values, timeseries_id, timestep in items:
+            if not isinstance(values, TimeseriesValues):
+                values = TimeseriesValues.from_list([v for v in values if v.value is not None])
+            counts.append(int((~np.isnan(values.value)).sum()))
+            new_values[timeseries_id] = merge_values(new_values[timeseries_id], values) if timeseries_id in new_values else values
+            timesteps[timeseries_id] = timestep
+        if not len(new_values):
+            return counts
+        ids = sorted(new_values)
+        dsn = config["user_dsn"]
+        chunk_size = packed_config()["chunk_size"]
+        with transaction(dsn):
+            # serializes concurrent writers of the same series
+            execStmtFetchAll(dsn, "SELECT id FROM timeseries WHERE id = ANY(%s) ORDER BY id FOR UPDATE", [ids])
+            stored_rows = {
+                series_id: list(series_rows)
+                for series_id, series_rows in groupby(execStmtFetchAll(dsn, cls.packed_read_stmt, [ids]), key=lambda r: r["series_id"])
+            }
+            chunk_rows = []
+            fallback_rows = []
+            delete_packed = []
+            delete_rows = []
+            for series_id in ids:
+                rows = stored_rows.get(series_id, [])
+                has_packed = any(r["id"] is None for r in rows)
+                merged = merge_values(TimeseriesValues.from_rows(rows), new_values[series_id]) if len(rows) else new_values[series_id]
+                chunks = merged.to_chunks(timesteps[series_id], chunk_size)
+                if chunks is None:
+                    logging.debug("Serie %i: los valores no son regulares, se guardan por fila" % series_id)
+                    if has_packed:
+                        delete_packed.append(series_id)
+                        fallback_rows.extend(merged.to_rows(series_id))
+                    else:
+                        fallback_rows.extend(new_values[series_id].to_rows(series_id))
+                    continue
+                if has_packed:
+                    delete_packed.append(series_id)
+                if any(r["id"] is not None for r in rows):
+                    # values stored as rows before the series was packed
+                    delete_rows.append(series_id)
+                chunk_rows.extend((series_id, start, timesteps[series_id], chunk_values, chunk_flags) for start, chunk_values, chunk_flags in chunks)
+            if len(delete_packed):
+                execStmtMany(dsn, "DELETE FROM timeseries_packed WHERE series_id = ANY(%s)", [[delete_packed]])
+            if len(delete_rows):
+                execStmtMany(dsn, "DELETE FROM timeseries_values WHERE series_id = ANY(%s)", [[delete_rows]])
+            if len(chunk_rows):
+                execStmtMany(dsn, cls.packed_create_stmt, chunk_rows)
+            if len(fallback_rows):
+                cls.create_rows(fallback_rows)
+        return counts
+
+    @classmethod
+    def delete_packed(cls, timeseries_id : int, timestart : Optional[datetime] = None, timeend : Optional[datetime] = None) -> int:
+        """Deletes the packed values of a series within [timestart, timeend], rewriting the chunks of the values kept
+
+        Returns:
+            int: deleted value count
+        """
+        conditions = []
+        range_params = []
+        if timestart is not None:
+            conditions.append("time >= %s")
+            range_params.append(timestart)
+        if timeend is not None:
+            conditions.append("time <= %s")
+            range_params.append(timeend)
+        dsn = config["user_dsn"]
+        with transaction(dsn):
+            chunks = execStmtFetchAll(dsn, "SELECT timestep FROM timeseries_packed WHERE series_id = %s ORDER BY start_time FOR UPDATE", [timeseries_id])
+            if not len(chunks):
+                return 0
+            rows = execStmtFetchAll(
+                dsn,
+                "SELECT series_id, time, value, flag, comment, id, %s AS deleted FROM timeseries_values_all WHERE series_id = %%s AND id IS NULL ORDER BY time" % (" AND ".join(conditions) if len(conditions) else "true"),
+                range_params + [timeseries_id])
+            kept = [r for r in rows if not r["deleted"]]
+            if len(kept) == len(rows):
+                return 0
+            execStmtMany(dsn, "DELETE FROM timeseries_packed WHERE series_id = %s", [[timeseries_id]])
+            timestep = chunks[0]["timestep"]
+            new_chunks = TimeseriesValues.from_rows(kept).to_chunks(timestep, packed_config()["chunk_size"])
+            if len(new_chunks):
+                execStmtMany(dsn, cls.packed_create_stmt, [(timeseries_id, start, timestep, chunk_values, chunk_flags) for start, chunk_values, chunk_flags in new_chunks])
+        return len(rows) - len(kept)
     
     @classmethod
     def read(
         cls, 
-        timeseries_id : int = None, 
+        timeseries_id : Union[int,List[int],None] = None, 
         time : datetime = None,
         timestart : datetime = None, 
         timeend : datetime = None,
@@ -244,8 +505,8 @@ class TimeseriesValue:
         conditions = []
         params = []
         if timeseries_id is not None:
-            conditions.append("series_id = %s")
-            params.append(timeseries_id)
+            conditions.append("series_id = ANY(%s)")
+            params.append([timeseries_id] if type(timeseries_id) == int else timeseries_id)
 
         if time is not None:
             conditions.append("time = %s")
@@ -275,7 +536,7 @@ class TimeseriesValue:
             conditions.append("comment = %s")
             params.append(comment)
 
-        sql = "SELECT * FROM timeseries_values"
+        sql = "SELECT series_id, time, value, flag, comment, id FROM %s" % values_relation()
 
         if conditions:
             sql += " WHERE " + " AND ".join(conditions)
@@ -296,8 +557,333 @@ class TimeseriesValue:
             ts_values.append(ts_value)
         return ts_values
 
+    @classmethod
+    def iter_rows(
+        cls,
+        timeseries_ids : List[int],
+        timestart : datetime = None,
+        timeend : datetime = None,
+        batch_size : int = None) -> Iterator[dict]:
+        """Streams the value rows (series_id, time, value, flag, comment, id) of several series ordered by series_id and time, through a server-side cursor
+
+        Args:
+            timeseries_ids (List[int]): timeseries identifiers
+            timestart (datetime, optional): begin time. Defaults to None.
+            timeend (datetime, optional): end time. Defaults to None.
+            batch_size (int, optional): rows fetched per round trip. Defaults to EXPORT_BATCH_SIZE.
+
+        Yields:
+            Iterator[dict]: value rows
+        """
+        conditions = ["series_id = ANY(%s)"]
+        params = [timeseries_ids]
+        if timestart is not None:
+            conditions.append("time >= %s")
+            params.append(timestart)
+        if timeend is not None:
+            conditions.append("time <= %s")
+            params.append(timeend)
+        sql = "SELECT series_id, time, value, flag, comment, id FROM %s WHERE " % values_relation() + " AND ".join(conditions) + " ORDER BY series_id, time"
+        yield from execStmtIter(config["user_dsn"], sql, params, batch_size or EXPORT_BATCH_SIZE)
+
+    @classmethod
+    def read_by_series(
+        cls,
+        timeseries_ids : List[int],
+        timestart : datetime = None,
+        timeend : datetime = None) -> dict:
+        """Reads the values of several series in one query
+
+        Args:
+            timeseries_ids (List[int]): timeseries identifiers
+            timestart (datetime, optional): begin time. Defaults to None.
+            timeend (datetime, optional): end time. Defaults to None.
+
+        Returns:
+            dict: TimeseriesValues by timeseries id (series without values are omitted)
+        """
+        rows = cls.iter_rows(timeseries_ids, timestart, timeend)
+        return {
+            series_id: TimeseriesValues.from_rows(list(series_rows))
+            for series_id, series_rows in groupby(rows, key=lambda r: r["series_id"])
+        }
+
+
+
+
+class TimeseriesValues:
+    """Columnar container of the values of one series: contiguous time (datetime64[ns], UTC), value (float64, NaN = missing) and flag (int64) arrays, plus an optional null-flag mask, sparse comments and database ids. Iterating yields TimeseriesValue records, with times expressed in time_zone
+    """
+    __slots__ = ("time", "value", "flag", "flag_mask", "comments", "ids", "timeseries_id", "time_zone")
+
+    def __init__(
+        self,
+        time : Optional[np.ndarray] = None,
+        value : Optional[np.ndarray] = None,
+        flag : Optional[np.ndarray] = None,
+        flag_mask : Optional[np.ndarray] = None,
+        comments : Optional[dict] = None,
+        ids : Optional[np.ndarray] = None,
+        timeseries_id : Optional[int] = None,
+        time_zone : float = 0.0):
+        self.time = np.asarray(time if time is not None else [], dtype="datetime64[ns]")
+        self.value = np.asarray(value if value is not None else np.full(len(self.time), np.nan), dtype=np.float64)
+        self.flag = np.asarray(flag if flag is not None else np.zeros(len(self.time)), dtype=np.int64)
+        self.flag_mask = np.asarray(flag_mask, dtype=bool) if flag_mask is not None else None # True where flag is null
+        self.comments = comments or {} # comment by position
+        self.ids = np.asarray(ids, dtype=np.int64) if ids is not None else None
+        self.timeseries_id = timeseries_id
+        self.time_zone = time_zone
+
+    @classmethod
+    def from_columns(cls, columns : EventColumns, time_zone : float=0.0) -> Self:
+        """Wraps the arrays returned by parseEvents (no copy)"""
+        return cls(time = columns["time"], value = columns["value"], flag = columns["flag"], time_zone = time_zone)
+
+    @classmethod
+    def from_api_response(cls, data : TimeseriesResponse, time_zone : float=0.0, null_value : Optional[float]=None) -> Self:
+        if "events" not in data:
+            raise ValueError("No se encontraron timeseries. Falta 'events' en la respuesta de /timeseries.")
+        return cls.from_columns(parseEvents(data["events"], time_zone, null_value), time_zone)
+
+    @classmethod
+    def from_list(cls, values : List[TimeseriesValue]) -> Self:
+        """Builds the container from TimeseriesValue records"""
+        if not len(values):
+            return cls()
+        flags = [v.flag for v in values]
+        flag_mask = np.array([f is None for f in flags], dtype=bool)
+        ids = [v.id for v in values]
+        offset = values[0].time.utcoffset()
+        return cls(
+            time = pd.to_datetime([v.time for v in values], utc=True).tz_localize(None).values,
+            value = np.array([v.value if v.value is not None else np.nan for v in values], dtype=np.float64),
+            flag = np.array([f if f is not None else 0 for f in flags], dtype=np.int64),
+            flag_mask = flag_mask if flag_mask.any() else None,
+            comments = {i: v.comment for i, v in enumerate(values) if v.comment is not None},
+            ids = ids if None not in ids else None,
+            timeseries_id = values[0].timeseries_id,
+            time_zone = offset.total_seconds() / 3600 if offset is not None else 0.0
+        )
+
+    @classmethod
+    def from_rows(cls, rows : List[dict]) -> Self:
+        """Builds the container from timeseries_values rows (series_id, time, value, flag, comment, id) of one series. ids is None if some row has no id (values read from timeseries_packed)"""
+        if not len(rows):
+            return cls()
+        flags = [r["flag"] for r in rows]
+        ids = [r["id"] for r in rows]
+        flag_mask = np.array([f is None for f in flags], dtype=bool)
+        offset = rows[0]["time"].utcoffset()
+        return cls(
+            time = pd.to_datetime([r["time"] for r in rows], utc=True).tz_localize(None).values,
+            value = np.array([r["value"] for r in rows], dtype=np.float64),
+            flag = np.array([f if f is not None else 0 for f in flags], dtype=np.int64),
+            flag_mask = flag_mask if flag_mask.any() else None,
+            comments = {i: r["comment"] for i, r in enumerate(rows) if r["comment"] is not None},
+            ids = ids if None not in ids else None,
+            timeseries_id = rows[0]["series_id"],
+            time_zone = offset.total_seconds() / 3600 if offset is not None else 0.0
+        )
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def __iter__(self) -> Iterator[TimeseriesValue]:
+        times = self.datetimes()
+        values = self.value.tolist()
+        flags = self.flag.tolist()
+        ids = self.ids.tolist() if self.ids is not None else None
+        for i in range(len(times)):
+            yield TimeseriesValue(
+                time = times[i],
+                value = values[i] if values[i] == values[i] else None,
+                flag = flags[i] if self.flag_mask is None or not self.flag_mask[i] else None,
+                timeseries_id = self.timeseries_id,
+                comment = self.comments.get(i),
+                id = ids[i] if ids is not None else None
+            )
+
+    def __getitem__(self, i : Union[int, slice]) -> Union[TimeseriesValue, Self]:
+        """Value at position i, or a container with the values of slice i (array views, as list slicing would return a list)"""
+        if isinstance(i, slice):
+            positions = range(len(self))[i]
+            return TimeseriesValues(
+                time = self.time[i],
+                value = self.value[i],
+                flag = self.flag[i],
+                flag_mask = self.flag_mask[i] if self.flag_mask is not None else None,
+                comments = {positions.index(j): c for j, c in self.comments.items() if j in positions},
+                ids = self.ids[i] if self.ids is not None else None,
+                timeseries_id = self.timeseries_id,
+                time_zone = self.time_zone
+            )
+        if i < 0:
+            i += len(self)
+        if i < 0 or i >= len(self):
+            raise IndexError("TimeseriesValues index out of range")
+        return TimeseriesValue(
+            time = self.datetimes(i),
+            value = float(self.value[i]) if not np.isnan(self.value[i]) else None,
+            flag = int(self.flag[i]) if self.flag_mask is None or not self.flag_mask[i] else None,
+            timeseries_id = self.timeseries_id,
+            comment = self.comments.get(i),
+            id = int(self.ids[i]) if self.ids is not None else None
+        )
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, list):
+            other = TimeseriesValues.from_list(other)
+        if not isinstance(other, TimeseriesValues):
+            return NotImplemented
+        return (
+            np.array_equal(self.time, other.time)
+            and np.array_equal(self.value, other.value, equal_nan=True)
+            and np.array_equal(self.flag, other.flag)
+            and np.array_equal(self.flag_mask if self.flag_mask is not None else np.zeros(len(self), dtype=bool), other.flag_mask if other.flag_mask is not None else np.zeros(len(other), dtype=bool))
+            and self.comments == other.comments
+        )
+
+    def __repr__(self) -> str:
+        return "TimeseriesValues(len=%i, timeseries_id=%s)" % (len(self), self.timeseries_id)
+
+    def datetimes(self, i : Optional[int] = None):
+        """Times as timezone-aware datetimes in time_zone: all of them, or the one at position i"""
+        index = pd.DatetimeIndex(self.time if i is None else self.time[i:i+1], tz="UTC").tz_convert(_timezone(self.time_zone))
+        return index.to_pydatetime() if i is None else index[0].to_pydatetime()
+
+    def to_rows(self, timeseries_id : Optional[int] = None) -> List[tuple]:
+        """(series_id, time, value, flag, comment) rows for TimeseriesValue.create_rows, skipping missing values"""
+        timeseries_id = timeseries_id if timeseries_id is not None else self.timeseries_id
+        present = ~np.isnan(self.value)
+        positions = np.flatnonzero(present)
+        times = pd.DatetimeIndex(self.time[present], tz="UTC").to_pydatetime()
+        values = self.value[present].tolist()
+        flags = self.flag[present].tolist()
+        flag_mask = self.flag_mask[present].tolist() if self.flag_mask is not None else None
+        return [
+            (
+                timeseries_id,
+                times[j],
+                values[j],
+                flags[j] if flag_mask is None or not flag_mask[j] else None,
+                self.comments.get(int(i)) if len(self.comments) else None
+            )
+            for j, i in enumerate(positions)
+        ]
+
+    def to_chunks(self, timestep : Optional[timedelta], chunk_size : int) -> Optional[List[tuple]]:
+        """(start_time, values, flags) rows for timeseries_packed: runs of up to chunk_size consecutive timesteps from the first present value, with None for missing values and null flags. Chunks without present values are skipped
+
+        Args:
+            timestep (Optional[timedelta]): time between values
+            chunk_size (int): timesteps per chunk
+
+        Returns:
+            Optional[List[tuple]]: chunks, or None if the series does not fit the packed layout (no timestep, present values off the timestep grid, comments or flags out of the smallint range)
+        """
+        present = ~np.isnan(self.value)
+        if not present.any():
+            return []
+        if timestep is None or timestep <= timedelta(0) or len(self.comments):
+            return None
+        step = np.timedelta64(timestep).astype("timedelta64[ns]")
+        time = self.time[present]
+        start = time.min()
+        offset = time - start
+        if (offset % step).any():
+            return None
+        flag = self.flag[present]
+        if flag.min() < -32768 or flag.max() > 32767:
+            return None
+        position = (offset // step).astype(np.int64)
+        length = int(position.max()) + 1
+        value = np.full(length, np.nan)
+        value[position] = self.value[present]
+        flags = np.zeros(length, dtype=np.int64)
+        flags[position] = flag
+        flag_mask = np.ones(length, dtype=bool) # null where missing
+        flag_mask[position] = self.flag_mask[present] if self.flag_mask is not None else False
+        chunks = []
+        for i in range(0, length, chunk_size):
+            chunk_value = value[i:i+chunk_size]
+            if np.isnan(chunk_value).all():
+                continue
+            chunks.append((
+                (start + i * step).astype("datetime64[us]").item().replace(tzinfo=timezone.utc),
+                [None if v != v else v for v in chunk_value.tolist()],
+                [None if m else f for f, m in zip(flags[i:i+chunk_size].tolist(), flag_mask[i:i+chunk_size].tolist())]
+            ))
+        return chunks
+
+    def to_df(self, include_id : bool = True) -> pd.DataFrame:
+        """DataFrame with columns time, value, flag, timeseries_id, comment (and id)"""
+        comments = np.full(len(self), None, dtype=object)
+        for i, comment in self.comments.items():
+            comments[i] = comment
+        columns = {
+            "time": pd.DatetimeIndex(self.time, tz="UTC").tz_convert(_timezone(self.time_zone)),
+            "value": self.value,
+            "flag": pd.array(np.ma.masked_array(self.flag, self.flag_mask).tolist(), dtype="Int64") if self.flag_mask is not None else self.flag,
+            "timeseries_id": np.full(len(self), self.timeseries_id, dtype=object),
+            "comment": comments
+        }
+        if include_id:
+            columns["id"] = self.ids if self.ids is not None else np.full(len(self), None, dtype=object)
+        return pd.DataFrame(columns)
+
+    def to_dicts(self, json_serializable : bool = False, include_id : bool = True) -> List[dict]:
+        """List of value dicts, as dataclasses.asdict of each TimeseriesValue"""
+        dicts = []
+        for v in self:
+            d = {"time": v.time.isoformat() if json_serializable else v.time, "value": v.value, "flag": v.flag}
+            if include_id:
+                d["timeseries_id"] = v.timeseries_id
+            d["comment"] = v.comment
+            if include_id:
+                d["id"] = v.id
+            dicts.append(d)
+        return dicts
 
 
+@dataclass
+class HindcastMatrix:
+    """Every stored forecast of a location aligned by lead time: sim[i, j] is the value forecast on forecast_dates[i] for forecast_dates[i] + lead_times[j] (NaN where missing). obs holds the observed values at the valid times of the forecasts (obs_times)"""
+    locationId : str
+    parameterId : str
+    forecast_dates : np.ndarray # datetime64[ns], UTC, shape (F,)
+    lead_times : np.ndarray # timedelta64[ns], shape (L,)
+    sim : np.ndarray # float64, shape (F, L)
+    obs_times : np.ndarray # datetime64[ns], UTC, shape (T,)
+    obs : np.ndarray # float64, shape (T,)
+    obs_locationId : Optional[str] = None
+
+    def valid_times(self) -> np.ndarray:
+        """datetime64[ns] array of shape (F, L) with the valid time of each cell of sim"""
+        return self.forecast_dates[:, None] + self.lead_times[None, :]
+
+    def obs_matrix(self) -> np.ndarray:
+        """obs aligned with sim: float64 array of shape (F, L), NaN where there is no observation"""
+        valid_times = self.valid_times()
+        result = np.full(valid_times.shape, np.nan)
+        if not len(self.obs_times):
+            return result
+        index = np.searchsorted(self.obs_times, valid_times).clip(0, len(self.obs_times) - 1)
+        found = self.obs_times[index] == valid_times
+        result[found] = self.obs[index[found]]
+        return result
+
+    def to_npz(self, filename : str):
+        np.savez_compressed(
+            filename,
+            forecast_dates = self.forecast_dates,
+            lead_times = self.lead_times,
+            sim = self.sim,
+            obs_times = self.obs_times,
+            obs = self.obs,
+            obs_matrix = self.obs_matrix()
+        )
+        logging.info("Se escribió el archivo %s" % (filename))
 
 @dataclass
 class Timeseries:
@@ -308,20 +894,54 @@ class Timeseries:
     qualifierId : Optional[str] = None
     forecastDate : Optional[datetime] = None
     location : Optional[Location] = None
-    values : Optional[List[TimeseriesValue]] = None
+    values : Optional[TimeseriesValues] = None
     id : Optional[int] = None
 
+    def __post_init__(self):
+        if isinstance(self.values, list):
+            self.values = TimeseriesValues.from_list(self.values)
+
     @classmethod
-    def from_api_response(cls, data : GetTimeseriesResponse, save : bool=False):
+    def from_api_response(cls, data : GetTimeseriesResponse, save : bool=False, batch : bool=False):
+        """Parses the timeseries of a /timeseries response
+
+        Args:
+            data (GetTimeseriesResponse): /timeseries response
+            save (bool, optional): save into database. Defaults to False.
+            batch (bool, optional): with save, save the whole response in a single transaction (see create_batch) instead of one transaction per series. Defaults to False.
+
+        Returns:
+            List[Timeseries]: parsed timeseries
+        """
         time_zone = float(data["timeZone"])
         parsed = []
         for d in data["timeSeries"]:
             ts = Timeseries.parse_one(d, time_zone)
-            if save:
+            if save and not batch:
                 ts.create_all()
             parsed.append(ts)
+        if save and batch:
+            stats = cls.create_batch(parsed)
+            logger.info("Se guardaron %i series temporales, %i valores" % (len(stats), sum(s["values"] for s in stats)))
         return parsed
     
+    @classmethod
+    def from_api_stream(cls, items : Iterator[Tuple[float, TimeseriesResponse]], save : bool=False) -> Iterator[Self]:
+        """Parses (and optionally saves) each (time_zone, TimeseriesResponse) of items as it comes (see stream_timeseries and iter_timeseries)
+
+        Args:
+            items (Iterator[Tuple[float, TimeseriesResponse]]): timeseries items
+            save (bool, optional): save each series into database. Defaults to False.
+
+        Yields:
+            Iterator[Self]: parsed timeseries
+        """
+        for time_zone, d in items:
+            ts = cls.parse_one(d, time_zone)
+            if save:
+                ts.create_all()
+            yield ts
+
     @classmethod
     def parse_and_create(cls, data : GetTimeseriesResponse):
         ts_items = cls.from_api_response(data)
@@ -337,10 +957,13 @@ class Timeseries:
         return timeseries
 
     @classmethod
+    @profiled("parse")
     def parse_one(cls, data : TimeseriesResponse, time_zone : float=0.0):
     # def parseTimeseries(data : TimeseriesResponse, time_zone : float=0.0) -> Timeseries:
         if "header" not in data:
             raise ValueError("Falta el header")
+        profileCount("series_parsed")
+        profileCount("events_parsed", len(data.get("events", [])))
         return cls(
             locationId = data["header"]["locationId"],
             parameterId = data["header"]["parameterId"],
@@ -349,19 +972,113 @@ class Timeseries:
             timestep = parseTimestep(data["header"]["timeStep"]),
             units = data["header"]["units"],
             location = Location.from_api_response(data),
-            values = TimeseriesValue.from_api_response(data, time_zone, float(data["header"]["missVal"]) if "missVal" in data["header"] else None)
+            values = TimeseriesValues.from_api_response(data, time_zone, float(data["header"]["missVal"]) if "missVal" in data["header"] else None)
         )
     
     @classmethod
     def create_many(cls, ts_items : List[Self]) -> List[int]:
         return [ts.create_all()[0] for ts in ts_items]
 
+    @profiled("save")
     def create_all(self) -> Tuple[int, str, List[int]]:
-        location_id = self.location.create()
-        timeseries_id = self.create()
-        values_count = TimeseriesValue.create_many(self.values, timeseries_id)
+        ensure_series_partitions([self])
+        with transaction(config["user_dsn"]):
+            location_id = self.location.create()
+            timeseries_id = self.create()
+            if self.packable():
+                values_count = TimeseriesValue.create_packed(self.values, timeseries_id, self.timestep)
+            else:
+                values_count = TimeseriesValue.create_many(self.values, timeseries_id)
         return (timeseries_id, location_id, values_count)
 
+    def packable(self) -> bool:
+        """Whether the values of the series are saved into timeseries_packed (see packed_config): packed storage is enabled, the series has a timestep and, unless packed_storage.forecasts_only is false, a forecast date"""
+        packed = packed_config()
+        return packed["enabled"] and self.timestep is not None and (self.forecastDate is not None or not packed["forecasts_only"])
+
+    @classmethod
+    @profiled("save")
+    def create_batch(cls, ts_items : List[Self]) -> List[dict]:
+        """Saves locations, headers and values of ts_items in a single transaction: one upsert for all (deduplicated) locations, one for all headers and one load of all values. Items with the same key are saved into the same series. Values of packable series (see packable) are saved with one TimeseriesValue.create_packed_many
+
+        Args:
+            ts_items (List[Self]): timeseries to save
+
+        Returns:
+            List[dict]: per-series stats (id, locationId, parameterId, qualifierId, forecastDate, values)
+        """
+        ensure_series_partitions(ts_items)
+        with transaction(config["user_dsn"]):
+            Location.create_many([ts.location for ts in ts_items if ts.location is not None])
+            ids = cls.create_headers(ts_items)
+            rows = []
+            packed = []
+            stats = []
+            for ts in ts_items:
+                ts.id = ids[ts.key()]
+                if ts.values is not None and ts.packable():
+                    packed.append((ts.values, ts.id, ts.timestep))
+                    count = int((~np.isnan(ts.values.value)).sum())
+                else:
+                    ts_rows = ts.values.to_rows(ts.id) if ts.values is not None else []
+                    rows.extend(ts_rows)
+                    count = len(ts_rows)
+                stats.append({
+                    "id": ts.id,
+                    "locationId": ts.locationId,
+                    "parameterId": ts.parameterId,
+                    "qualifierId": ts.qualifierId,
+                    "forecastDate": ts.forecastDate,
+                    "values": count
+                })
+            TimeseriesValue.create_packed_many(packed)
+            TimeseriesValue.create_rows(rows)
+        return stats
+
+    @classmethod
+    @profiled("header_create")
+    def create_headers(cls, ts_items : List[Self]) -> dict:
+        """Upserts the headers of ts_items in one statement
+
+        Args:
+            ts_items (List[Self]): timeseries
+
+        Returns:
+            dict: timeseries id by key (see key())
+        """
+        unique = {ts.key(): ts for ts in ts_items}
+        if not len(unique):
+            return {}
+        matches = execStmtFetchAll(
+            config["user_dsn"],
+            dedent("""
+                INSERT INTO timeseries (location_id, parameter_id, qualifier_id, forecast_date, timestep, units) 
+                SELECT * 
+                FROM unnest(%s::text[], %s::text[], %s::text[], %s::timestamptz[], %s::interval[], %s::text[])
+                ON CONFLICT (location_id, parameter_id, qualifier_id, forecast_date) 
+                    DO UPDATE SET 
+                        timestep=excluded.timestep, 
+                        units=excluded.units 
+                RETURNING id, location_id, parameter_id, qualifier_id, forecast_date
+            """),
+            (
+                [k[0] for k in unique.keys()],
+                [k[1] for k in unique.keys()],
+                [k[2] for k in unique.keys()],
+                [k[3] for k in unique.keys()],
+                [ts.timestep for ts in unique.values()],
+                [ts.units for ts in unique.values()]
+            ))
+        return {
+            (m["location_id"], m["parameter_id"], m["qualifier_id"], m["forecast_date"]): m["id"]
+            for m in matches
+        }
+
+    def key(self) -> Tuple[str, str, str, datetime]:
+        """Unique key of the series as stored in the timeseries table: (location_id, parameter_id, qualifier_id, forecast_date)"""
+        return (self.locationId, self.parameterId, self.qualifierId if self.qualifierId is not None else "", self.forecastDate or SENTINEL)
+
+    @profiled("header_create")
     def create(self) -> int:
         id = execStmt(
             config["user_dsn"],
@@ -381,7 +1098,7 @@ class Timeseries:
                         units=excluded.units 
                 RETURNING id
             """),
-            (self.locationId, self.parameterId, self.qualifierId if self.qualifierId is not None else "", self.forecastDate or SENTINEL, self.timestep, self.units))
+            (*self.key(), self.timestep, self.units))
         self.id = id
         return id
     
@@ -398,58 +1115,99 @@ class Timeseries:
         timestart : Optional[datetime] = None,
         timeend : Optional[datetime] = None,
         metadata_only : bool = False) -> Iterator[Self]:
+        """Reads series from the database, or from the local series store if one is in use (see use_store)"""
+        kwargs = dict(locationId=locationId, parameterId=parameterId, timestep=timestep, units=units, qualifierId=qualifierId, forecastDate=forecastDate, id=id, timestart=timestart, timeend=timeend, metadata_only=metadata_only)
+        store = get_store()
+        if store is not None:
+            return store.read(**kwargs)
+        return cls.read_db(**kwargs)
+
+    @classmethod
+    def read_db(
+        cls,
+        locationId : Union[str,List[str],None] = None, 
+        parameterId : Union[str,List[str],None] = None, 
+        timestep : Optional[timedelta] = None,
+        units : Optional[str] = None,
+        qualifierId : Union[str,List[str],None] = None,
+        forecastDate : Optional[datetime] = None,
+        id : Optional[int] = None,
+        timestart : Optional[datetime] = None,
+        timeend : Optional[datetime] = None,
+        metadata_only : bool = False) -> Iterator[Self]:
         
         conditions = []
         params = []
 
         if id is not None:
-            conditions.append("id = %s")
+            conditions.append("t.id = %s")
             params.append(id)
 
         if locationId is not None:
-            conditions.append("location_id = ANY(%s)")
+            conditions.append("t.location_id = ANY(%s)")
             params.append([locationId] if type(locationId) == str else locationId)
 
         if parameterId is not None:
-            conditions.append("parameter_id = ANY(%s)")
+            conditions.append("t.parameter_id = ANY(%s)")
             params.append([parameterId] if type(parameterId) == str else parameterId)
 
         if qualifierId is not None:
-            conditions.append("qualifier_id = ANY(%s)")
+            conditions.append("t.qualifier_id = ANY(%s)")
             params.append([qualifierId]  if type(qualifierId) == str else qualifierId)
 
         if forecastDate is not None:
-            conditions.append("forecast_date = %s")
+            conditions.append("t.forecast_date = %s")
             params.append(forecastDate)
 
         if timestep is not None:
-            conditions.append("timestep = %s")
+            conditions.append("t.timestep = %s")
             params.append(timestep)
 
         if units is not None:
-            conditions.append("units = %s")
+            conditions.append("t.units = %s")
             params.append(units)
 
-        sql = "SELECT * FROM timeseries"
+        sql = dedent("""
+            SELECT 
+                t.*, 
+                l.station_name, 
+                st_x(l.geometry) lon, 
+                st_y(l.geometry) lat,
+                l.id IS NOT NULL has_location
+            FROM timeseries t
+            LEFT JOIN locations l ON l.id = t.location_id""")
 
         if conditions:
             sql += " WHERE " + " AND ".join(conditions)
 
+        sql += " ORDER BY t.id"
+
         ts_list = execStmtFetchAll(config["user_dsn"], sql, params)
-        for ts in ts_list:
-            timeseries = cls(
-                locationId = ts["location_id"],
-                parameterId = ts["parameter_id"],
-                timestep = ts["timestep"],
-                units = ts["units"],
-                qualifierId = ts["qualifier_id"] if ts["qualifier_id"] != "" else None,
-                forecastDate = ts["forecast_date"] if ts["forecast_date"] != SENTINEL else None,
-                id = ts["id"]
-            )
-            timeseries.read_location()
-            if not metadata_only:
-                timeseries.read_values(timestart, timeend)
-            yield timeseries
+        # values of up to READ_CHUNK_SIZE series per query, grouped by series_id
+        for i in range(0, len(ts_list), READ_CHUNK_SIZE):
+            chunk = ts_list[i:i+READ_CHUNK_SIZE]
+            values = {} if metadata_only else TimeseriesValue.read_by_series([ts["id"] for ts in chunk], timestart, timeend)
+            for ts in chunk:
+                if not ts["has_location"]:
+                    raise ValueError("No se encontró la location con id=%s" % ts["location_id"])
+                timeseries = cls(
+                    locationId = ts["location_id"],
+                    parameterId = ts["parameter_id"],
+                    timestep = ts["timestep"],
+                    units = ts["units"],
+                    qualifierId = ts["qualifier_id"] if ts["qualifier_id"] != "" else None,
+                    forecastDate = ts["forecast_date"] if ts["forecast_date"] != SENTINEL else None,
+                    location = Location(
+                        locationId = ts["location_id"],
+                        stationName = ts["station_name"],
+                        lat = ts["lat"],
+                        lon = ts["lon"]
+                    ),
+                    id = ts["id"]
+                )
+                if not metadata_only:
+                    timeseries.values = values.get(ts["id"], TimeseriesValues(timeseries_id=ts["id"]))
+                yield timeseries
 
     def read_location(self):
         self.location = Location.read_one(self.locationId)
@@ -457,23 +1215,20 @@ class Timeseries:
     def read_values(self, timestart : datetime = None, timeend : datetime = None):
         if self.id is None:
             raise ValueError("Falta id de timeseries, no se pueden leer los valores")
-        self.values = TimeseriesValue.read(timeseries_id=self.id, timestart=timestart, timeend=timeend)
+        self.values = TimeseriesValue.read_by_series([self.id], timestart, timeend).get(self.id, TimeseriesValues(timeseries_id=self.id))
 
     def to_dict(self, json_serializable : bool=False, include_id : bool = True):
-        data = asdict(self)
+        # built field by field: asdict would deep-copy the values container
+        data = {f.name: getattr(self, f.name) for f in fields(self)}
+        data["location"] = asdict(self.location) if self.location is not None else None
+        data["values"] = self.values.to_dicts(json_serializable, include_id or not json_serializable) if self.values is not None else None
         if json_serializable:
             data["forecastDate"] = data["forecastDate"].isoformat() if data["forecastDate"] is not None else None
             data["timestep"] = {"seconds": int(data["timestep"].total_seconds())}
-            for value in data["values"]:
-                if not include_id:
-                    del value["id"]
-                    del value["timeseries_id"]
-                value["time"] = value["time"].isoformat()
         return data
     
     def to_df(self) -> pd.DataFrame:
-        d = self.to_dict()
-        return pd.DataFrame(d["values"])
+        return self.values.to_df() if self.values is not None else pd.DataFrame()
     
     def to_json(self, filename : str):
         with open(filename, "w", encoding="utf-8") as f:
@@ -486,22 +1241,46 @@ class Timeseries:
                 df = df.drop(columns=["id"])
             df.to_csv(f, index=False)
 
+    def to_record_batch(self, include_id : bool = False):
+        """Values as a pyarrow.RecordBatch of valuesSchema, with the header columns repeated on every row. Missing values and flags are null"""
+        pa = requirePyarrow()
+        schema = valuesSchema(include_id)
+        values = self.values if self.values is not None else TimeseriesValues()
+        n = len(values)
+        comments = [None] * n
+        for i, comment in values.comments.items():
+            comments[i] = comment
+        columns = [
+            pa.array([self.forecastDate] * n, type=schema.field("forecast_date").type),
+            pa.array([self.locationId] * n, type=pa.string()),
+            pa.array([self.parameterId] * n, type=pa.string()),
+            pa.array([self.qualifierId] * n, type=pa.string()),
+            pa.array([self.id] * n, type=pa.int64()),
+            pa.array(values.time.astype("datetime64[us]"), type=schema.field("time").type),
+            pa.array(values.value, type=pa.float64(), from_pandas=True),
+            pa.array(values.flag.astype(np.int32), type=pa.int32(), mask=values.flag_mask),
+            pa.array(comments, type=pa.string())
+        ]
+        if include_id:
+            columns.append(pa.array(values.ids if values.ids is not None else [None] * n, type=pa.int64()))
+        return pa.RecordBatch.from_arrays(columns, schema=schema)
+
     def to_file(self, filename : str, include_id : bool = False, format : str = "json"):
         if format == "json":
             self.to_json(filename)
         elif format == "csv":
             self.to_csv(filename, include_id)
+        elif format in COLUMNAR_FORMATS:
+            writeBatches([self.to_record_batch(include_id)], valuesSchema(include_id), filename, format=format)
+            return
         else:
             raise ValueError("Invalid format: %s" % (format))
         logging.info("Se escribió el archivo %s" % (filename))
     
     @classmethod
     def to_df_many(cls, ts_list : List[Self]) -> pd.DataFrame:
-        values = []
-        for ts in ts_list:
-            ts_d = ts.to_dict()
-            values.extend(ts_d["values"])
-        return pd.DataFrame(values)
+        dfs = [ts.to_df() for ts in ts_list if ts.values is not None and len(ts.values)]
+        return pd.concat(dfs, ignore_index=True) if len(dfs) else pd.DataFrame()
     
     def filename_from_pattern(self, file_pattern, check_placeholders : bool = False) -> str:
         if check_placeholders:
@@ -526,8 +1305,11 @@ class Timeseries:
         filename : Optional[str] = None, 
         file_pattern : Optional[str] = None, 
         format : str = "json", 
-        include_id : bool = False):
-        if filename is not None:
+        include_id : bool = False,
+        dataset_dir : Optional[str] = None):
+        if format in COLUMNAR_FORMATS and (filename is not None or dataset_dir is not None):
+            writeBatches((ts.to_record_batch(include_id) for ts in ts_list), valuesSchema(include_id), filename, dataset_dir, format=format)
+        elif filename is not None:
             with open(filename, "w", encoding="utf-8") as f:
                 if format == "csv":
                     df = cls.to_df_many(ts_list)
@@ -538,7 +1320,7 @@ class Timeseries:
                     json.dump({"timeSeries":[ts.to_dict(True, include_id=include_id) for ts in ts_list]}, f, indent=2)
                 else:
                     raise ValueError("Unknown format: %s" % format)
-                logging.info("Se guardó el archivo %s" % (args.output))
+                logging.info("Se guardó el archivo %s" % (filename))
         elif file_pattern is not None:
             for ts in ts_list:
                 fname = ts.filename_from_pattern(file_pattern)
@@ -550,9 +1332,12 @@ class Timeseries:
                 elif format == "json":
                     with open(fname, "w", encoding="utf-8") as f:
                         json.dump({"timeSeries":[ts.to_dict(True, include_id=include_id)]}, f, indent=2)
+                elif format in COLUMNAR_FORMATS:
+                    writeBatches([ts.to_record_batch(include_id)], valuesSchema(include_id), fname, format=format)
+                    continue
                 logging.info("Se escribió el archivo %s" % (fname))
         else:
-            raise ValueError("Falta filename o file_pattern")
+            raise ValueError("Falta filename, file_pattern o dataset_dir")
 
     @classmethod
     def read_one(
@@ -588,55 +1373,540 @@ class Timeseries:
         obs_flag : Optional[str] = None,
         sim_flag : Optional[str] = None
     ) -> pd.DataFrame:
+        store = get_store()
+        if store is not None:
+            return store.read_paired(obs_key, sim_key, timestart, timeend, obs_flag, sim_flag)
         obs = cls.read_one(**obs_key, metadata_only=True)
         sim = cls.read_one(**sim_key, metadata_only=True)
         return read_paired(obs.id, sim.id, timestart, timeend, obs_flag, sim_flag)
 
     @classmethod
-    def readlist(
+    def read_paired_many(
         cls,
-        **kwargs
-    ) -> List[Self]:
-        ts_list = []
-        for ts in Timeseries.read(
-            **kwargs
-        ):
-            ts_list.append(ts)
-        return ts_list
+        mapping : Union[pd.DataFrame, List[Tuple[str, str]]],
+        forecastDate : Union[datetime, List[datetime]],
+        obs_parameterId : str = "Q.obs",
+        sim_parameterId : str = "Q.sim",
+        timestart : Optional[datetime] = None,
+        timeend : Optional[datetime] = None,
+        obs_flag : Optional[str] = None,
+        sim_flag : Optional[str] = None
+    ) -> pd.DataFrame:
+        """Like read_paired for every obs↔sim station pair of mapping and every forecast date, with one query to resolve all series ids and one set-based join
+
+        Args:
+            mapping (Union[pd.DataFrame, List[Tuple[str, str]]]): obs,sim location pairs (e.g. static/mgb_map.csv)
+            forecastDate (Union[datetime, List[datetime]]): forecast date(s) of the sim series
+            obs_parameterId (str, optional): Defaults to "Q.obs".
+            sim_parameterId (str, optional): Defaults to "Q.sim".
+
+        Returns:
+            pd.DataFrame: columns station (obs location), sim_location, forecast_date, time, obs, sim
+        """
+        if isinstance(mapping, pd.DataFrame):
+            mapping = list(zip(mapping["obs"], mapping["sim"]))
+        mapping = [(str(obs), str(sim)) for obs, sim in mapping]
+        forecast_dates = [forecastDate] if isinstance(forecastDate, datetime) else list(forecastDate)
+        series = execStmtFetchAll(
+            config["user_dsn"],
+            dedent("""
+                SELECT id, location_id, parameter_id, forecast_date
+                FROM timeseries
+                WHERE qualifier_id = ''
+                AND (
+                    (parameter_id = %s AND forecast_date = %s AND location_id = ANY(%s))
+                    OR (parameter_id = %s AND forecast_date = ANY(%s) AND location_id = ANY(%s))
+                )
+            """),
+            (
+                obs_parameterId, SENTINEL, list({obs for obs, sim in mapping}),
+                sim_parameterId, forecast_dates, list({sim for obs, sim in mapping})
+            ))
+        obs_ids = {}
+        sim_ids = {}
+        for ts in series:
+            if ts["parameter_id"] == obs_parameterId and ts["forecast_date"] == SENTINEL:
+                obs_ids[ts["location_id"]] = ts["id"]
+            if ts["parameter_id"] == sim_parameterId and ts["forecast_date"] != SENTINEL:
+                sim_ids.setdefault(ts["location_id"], []).append((ts["forecast_date"], ts["id"]))
+        pairs = []
+        for obs, sim in mapping:
+            if obs not in obs_ids:
+                logging.warning("No se encontró la serie observada de %s" % obs)
+                continue
+            if sim not in sim_ids:
+                logging.warning("No se encontró la serie simulada de %s" % sim)
+                continue
+            for forecast_date, sim_id in sim_ids[sim]:
+                pairs.append((obs_ids[obs], sim_id, obs, sim, forecast_date))
+        return read_paired_many(pairs, timestart, timeend, obs_flag, sim_flag)
 
     @classmethod
-    def read_to_file(      
+    def delete(
         cls,
-        filename : Optional[str] = None, 
-        file_pattern : Optional[str] = None, 
-        format : str = "json", 
-        include_id : bool = False,
-        **kwargs
-        # forecastDate :  = args.forecast_date,
-        # locationId = args.location_id,
-        # parameterId = args.parameter_id,
-        # timestart = args.timestart, 
-        # timeend = args.timeend,
-        # qualifierId = args.qualifier_id
-    ):
-        if filename is not None:
-            ts_list = cls.readlist(**kwargs)
-            logging.info("Se leyeron %i series temporales" % (len(ts_list)))
-            cls.to_file_many(ts_list, filename, format = format, include_id=include_id)
-        elif file_pattern is not None:
-            for ts in Timeseries.read(
-                **kwargs
-                # forecastDate = args.forecast_date,
-                # locationId = args.location_id,
-                # parameterId = args.parameter_id,
-                # timestart = args.timestart, 
-                # timeend = args.timeend,
-                # qualifierId = args.qualifier_id
-            ):
-                fname = ts.filename_from_pattern(file_pattern)
-                ts.to_file(fname, include_id, format=format)
-        else:
-            raise ValueError("Falta filename o file_pattern")  
+        locationId : Union[str,List[str],None] = None,
+        parameterId : Union[str,List[str],None] = None,
+        qualifierId : Union[str,List[str],None] = None,
+        forecastDate : Optional[datetime] = None,
+        timestart : Optional[datetime] = None,
+        timeend : Optional[datetime] = None,
+        dry_run : bool = False,
+        batch_size : int = DELETE_BATCH_SIZE) -> dict:
+        """Deletes the values of the series selected by the filters of read, within [timestart, timeend], then the headers of those series left without values. Values are deleted series by series in statements of up to batch_size rows, each in its own transaction, so that locks on timeseries_values stay short. With packed storage enabled, the packed chunks of each series are then rewritten without the deleted values (see TimeseriesValue.delete_packed)
+
+        Args:
+            dry_run (bool, optional): only count what would be deleted. Defaults to False.
+            batch_size (int, optional): rows per delete statement. Defaults to DELETE_BATCH_SIZE.
+
+        Returns:
+            dict: series selected, values and headers deleted (or to be deleted, with dry_run)
+        """
+        if all(f is None for f in (locationId, parameterId, qualifierId, forecastDate, timestart, timeend)):
+            raise ValueError("Debe indicar al menos un filtro para eliminar")
+        ids = [ts.id for ts in cls.read_db(locationId=locationId, parameterId=parameterId, qualifierId=qualifierId, forecastDate=forecastDate, metadata_only=True)]
+        result = {"series": len(ids), "values": 0, "headers": 0}
+        if not len(ids):
+            return result
+        conditions = []
+        range_params = []
+        if timestart is not None:
+            conditions.append("time >= %s")
+            range_params.append(timestart)
+        if timeend is not None:
+            conditions.append("time <= %s")
+            range_params.append(timeend)
+        time_range = "".join(" AND %s" % c for c in conditions)
+        values = values_relation()
+        if dry_run:
+            result["values"] = execStmt(config["user_dsn"], "SELECT count(*) FROM %s WHERE series_id = ANY(%%s)" % values + time_range, [ids] + range_params)
+            # headers whose values all lie within the range
+            result["headers"] = execStmt(
+                config["user_dsn"],
+                "SELECT count(*) FROM timeseries t WHERE t.id = ANY(%%s) AND NOT EXISTS (SELECT 1 FROM %s v WHERE v.series_id = t.id" % values + (" AND NOT (%s)" % " AND ".join("v.%s" % c for c in conditions) if len(conditions) else " AND false") + ")",
+                [ids] + range_params)
+            logging.info("Se eliminarían %i valores y %i encabezados de %i series temporales" % (result["values"], result["headers"], result["series"]))
+            return result
+        stmt = "DELETE FROM timeseries_values WHERE series_id = %s AND time IN (SELECT time FROM timeseries_values WHERE series_id = %s" + time_range + " ORDER BY time LIMIT %s)"
+        for series_id in ids:
+            while True:
+                count = execStmtMany(config["user_dsn"], stmt, [[series_id, series_id] + range_params + [batch_size]])
+                result["values"] += count
+                if count < batch_size:
+                    break
+        if values != "timeseries_values":
+            for series_id in ids:
+                result["values"] += TimeseriesValue.delete_packed(series_id, timestart, timeend)
+        result["headers"] = execStmtMany(
+            config["user_dsn"],
+            "DELETE FROM timeseries t WHERE t.id = ANY(%%s) AND NOT EXISTS (SELECT 1 FROM %s v WHERE v.series_id = t.id)" % values,
+            [[ids]])
+        logging.info("Se eliminaron %i valores y %i encabezados de %i series temporales" % (result["values"], result["headers"], result["series"]))
+        return result
+
+    @classmethod
+    def read_high_water_marks(
+        cls,
+        locationId : Union[str,List[str],None] = None,
+        parameterId : Union[str,List[str],None] = None,
+        qualifierId : Union[str,List[str],None] = None
+    ) -> dict:
+        """Latest stored value time of each observed series (forecast_date = SENTINEL), read with one index lookup per series
+
+        Returns:
+            dict: time by (location_id, parameter_id, qualifier_id). Series without values are omitted
+        """
+        conditions = ["t.forecast_date = %s"]
+        params = [SENTINEL]
+        if locationId is not None:
+            conditions.append("t.location_id = ANY(%s)")
+            params.append([locationId] if type(locationId) == str else locationId)
+        if parameterId is not None:
+            conditions.append("t.parameter_id = ANY(%s)")
+            params.append([parameterId] if type(parameterId) == str else parameterId)
+        if qualifierId is not None:
+            conditions.append("t.qualifier_id = ANY(%s)")
+            params.append([qualifierId] if type(qualifierId) == str else qualifierId)
+        matches = execStmtFetchAll(
+            config["user_dsn"],
+            dedent("""
+                SELECT t.location_id, t.parameter_id, t.qualifier_id, last.time
+                FROM timeseries t
+                CROSS JOIN LATERAL (
+                    SELECT v.time 
+                    FROM {values} v 
+                    WHERE v.series_id = t.id 
+                    ORDER BY v.time DESC 
+                    LIMIT 1
+                ) last
+                WHERE """).format(values=values_relation()) + " AND ".join(conditions),
+            params)
+        return {(m["location_id"], m["parameter_id"], m["qualifier_id"]): m["time"] for m in matches}
+
+    @classmethod
+    def read_hindcast(
+        cls,
+        locationId : str,
+        parameterId : str = "Q.sim",
+        qualifierId : str = "",
+        obs_locationId : Optional[str] = None,
+        obs_parameterId : str = "Q.obs",
+        forecast_date_start : Optional[datetime] = None,
+        forecast_date_end : Optional[datetime] = None
+    ) -> HindcastMatrix:
+        """Reads every stored forecast of a location (optionally within a forecast date range), with the matching observed values, in one query, and arranges them as a forecast_date x lead step matrix. Lead steps are multiples of the timestep of the series (inferred from the data if not set). Values off the forecast_date + k * timestep grid are discarded with a warning
+
+        Args:
+            locationId (str): sim location
+            parameterId (str, optional): sim parameter. Defaults to "Q.sim".
+            qualifierId (str, optional): sim qualifier. Defaults to "".
+            obs_locationId (Optional[str], optional): observed location. If None, obs is empty. Defaults to None.
+            obs_parameterId (str, optional): observed parameter. Defaults to "Q.obs".
+            forecast_date_start (Optional[datetime], optional): Defaults to None.
+            forecast_date_end (Optional[datetime], optional): Defaults to None.
+
+        Returns:
+            HindcastMatrix: sim matrix and observed vector
+        """
+        sql = dedent("""
+            SELECT 
+                t.forecast_date, 
+                t.timestep, 
+                v.time, 
+                v.value AS sim, 
+                o.value AS obs
+            FROM timeseries t
+            JOIN {values} v 
+                ON v.series_id = t.id
+            LEFT OUTER JOIN {values} o 
+                ON o.time = v.time 
+                AND o.series_id = (
+                    SELECT id 
+                    FROM timeseries 
+                    WHERE location_id = %s 
+                    AND parameter_id = %s 
+                    AND qualifier_id = '' 
+                    AND forecast_date = %s
+                )
+            WHERE t.location_id = %s 
+            AND t.parameter_id = %s 
+            AND t.qualifier_id = %s 
+            AND t.forecast_date <> %s""").format(values=values_relation())
+        params = [obs_locationId, obs_parameterId, SENTINEL, locationId, parameterId, qualifierId, SENTINEL]
+        if forecast_date_start is not None:
+            sql += " AND t.forecast_date >= %s"
+            params.append(forecast_date_start)
+        if forecast_date_end is not None:
+            sql += " AND t.forecast_date <= %s"
+            params.append(forecast_date_end)
+        sql += " ORDER BY t.forecast_date, v.time"
+        rows = execStmtFetchAll(config["user_dsn"], sql, params)
+
+        if not len(rows):
+            raise ValueError("No se encontraron pronósticos de location_id=%s, parameter_id=%s" % (locationId, parameterId))
+        forecast_date = pd.to_datetime([r["forecast_date"] for r in rows], utc=True).tz_localize(None).values.astype("datetime64[ns]")
+        time = pd.to_datetime([r["time"] for r in rows], utc=True).tz_localize(None).values.astype("datetime64[ns]")
+        sim = np.array([r["sim"] for r in rows], dtype=np.float64)
+        obs = np.array([r["obs"] if r["obs"] is not None else np.nan for r in rows], dtype=np.float64)
+        timesteps = {r["timestep"] for r in rows if r["timestep"] is not None}
+        step = None
+        if len(timesteps) == 1:
+            step = np.timedelta64(timesteps.pop()).astype("timedelta64[ns]")
+        else:
+            diffs = np.diff(time)
+            diffs = diffs[diffs > np.timedelta64(0)]
+            if len(diffs):
+                step = diffs.min()
+        offset = time - forecast_date
+        if step is not None:
+            # values off the forecast_date + k * step grid have no cell in the matrix
+            on_grid = offset % step == np.timedelta64(0)
+            if not on_grid.all():
+                logging.warning("read_hindcast %s %s: se descartan %i valores fuera de la grilla del paso de tiempo %s" % (locationId, parameterId, (~on_grid).sum(), pd.Timedelta(step)))
+                forecast_date, time, offset, sim, obs = forecast_date[on_grid], time[on_grid], offset[on_grid], sim[on_grid], obs[on_grid]
+                if not len(time):
+                    raise ValueError("No se encontraron valores de location_id=%s, parameter_id=%s en la grilla del paso de tiempo" % (locationId, parameterId))
+            lead = (offset // step).astype(np.int64)
+            lead_min = lead.min()
+            lead_index = lead - lead_min
+            lead_times = np.arange(lead_min, lead.max() + 1) * step
+        else:
+            # a single valid time: no timestep to infer, one column per distinct lead time
+            lead_times, lead_index = np.unique(offset, return_inverse=True)
+        forecast_dates, row_index = np.unique(forecast_date, return_inverse=True)
+        matrix = np.full((len(forecast_dates), len(lead_times)), np.nan)
+        matrix[row_index, lead_index] = sim
+        obs_times, obs_index = np.unique(time, return_inverse=True)
+        obs_values = np.full(len(obs_times), np.nan)
+        observed = ~np.isnan(obs)
+        obs_values[obs_index[observed]] = obs[observed]
+        return HindcastMatrix(
+            locationId = locationId,
+            parameterId = parameterId,
+            forecast_dates = forecast_dates,
+            lead_times = lead_times,
+            sim = matrix,
+            obs_times = obs_times if obs_locationId is not None else obs_times[:0],
+            obs = obs_values if obs_locationId is not None else obs_values[:0],
+            obs_locationId = obs_locationId
+        )
+
+    @classmethod
+    def readlist(
+        cls,
+        **kwargs
+    ) -> List[Self]:
+        ts_list = []
+        for ts in Timeseries.read(
+            **kwargs
+        ):
+            ts_list.append(ts)
+        return ts_list
+
+    @classmethod
+    def export_to_file(
+        cls,
+        filename : Optional[str],
+        format : str = "json",
+        include_id : bool = False,
+        batch_size : Optional[int] = None,
+        dataset_dir : Optional[str] = None,
+        compression : Optional[str] = "zstd",
+        **kwargs
+    ) -> int:
+        """Writes the series selected by kwargs (see read) into filename, in the same layout as to_file_many. Values are streamed from a server-side cursor and written row by row (batch by batch for parquet and arrow), so memory use does not depend on the exported volume
+
+        Args:
+            filename (Optional[str]): output file
+            format (str, optional): json, csv, parquet or arrow. Defaults to "json".
+            include_id (bool, optional): include value ids. Defaults to False.
+            batch_size (Optional[int], optional): rows fetched per round trip. Defaults to EXPORT_BATCH_SIZE.
+            dataset_dir (Optional[str], optional): with parquet or arrow and no filename, write a dataset partitioned by forecast date and location into this directory. Defaults to None.
+            compression (Optional[str], optional): parquet or arrow compression codec. Defaults to "zstd".
+
+        Returns:
+            int: written value count
+        """
+        if format not in ("json", "csv") + COLUMNAR_FORMATS:
+            raise ValueError("Unknown format: %s" % format)
+        if get_store() is not None:
+            # memory-mapped values: no need to stream
+            ts_list = list(cls.read(**kwargs))
+            cls.to_file_many(ts_list, filename, format=format, include_id=include_id, dataset_dir=dataset_dir)
+            return sum(len(ts.values) for ts in ts_list)
+        timestart = kwargs.pop("timestart", None)
+        timeend = kwargs.pop("timeend", None)
+        headers = list(cls.read(metadata_only=True, **kwargs))
+        logging.info("Se leyeron %i series temporales" % (len(headers)))
+        rows = TimeseriesValue.iter_rows([ts.id for ts in headers], timestart, timeend, batch_size) if len(headers) else iter(())
+        if format in COLUMNAR_FORMATS:
+            return writeBatches(
+                value_row_batches(headers, rows, include_id, batch_size or EXPORT_BATCH_SIZE),
+                valuesSchema(include_id),
+                filename,
+                dataset_dir,
+                format = format,
+                compression = compression
+            )
+        count = 0
+        with open(filename, "w", encoding="utf-8", newline="") as f:
+            if format == "csv":
+                writer = csv.writer(f)
+                columns = ["time", "value", "flag", "timeseries_id", "comment"] + (["id"] if include_id else [])
+                writer.writerow(columns)
+                for row in rows:
+                    writer.writerow([row["time"], row["value"], row["flag"], row["series_id"], row["comment"]] + ([row["id"]] if include_id else []))
+                    count += 1
+            else:
+                f.write('{"timeSeries": [')
+                for i, (ts, values) in enumerate(group_rows_by_series(headers, rows)):
+                    ts.values = TimeseriesValues()
+                    header = ts.to_dict(True, include_id=include_id)
+                    del header["values"]
+                    # header keys one by one, then the streamed "values" key
+                    members = ["%s: %s" % (json.dumps(key), json.dumps(value)) for key, value in header.items()] + ["%s: [" % json.dumps("values")]
+                    f.write("%s\n  {%s" % ("," if i else "", ", ".join(members)))
+                    for j, row in enumerate(values):
+                        value = {"time": row["time"].isoformat(), "value": row["value"], "flag": row["flag"]}
+                        if include_id:
+                            value["timeseries_id"] = row["series_id"]
+                        value["comment"] = row["comment"]
+                        if include_id:
+                            value["id"] = row["id"]
+                        f.write("%s\n    %s" % ("," if j else "", json.dumps(value)))
+                        count += 1
+                    f.write("\n  ]}")
+                f.write("\n]}\n")
+        logging.info("Se escribió el archivo %s (%i valores)" % (filename, count))
+        return count
+
+    @classmethod
+    def read_to_file(      
+        cls,
+        filename : Optional[str] = None, 
+        file_pattern : Optional[str] = None, 
+        format : str = "json", 
+        include_id : bool = False,
+        dataset_dir : Optional[str] = None,
+        compression : Optional[str] = "zstd",
+        **kwargs
+        # forecastDate :  = args.forecast_date,
+        # locationId = args.location_id,
+        # parameterId = args.parameter_id,
+        # timestart = args.timestart, 
+        # timeend = args.timeend,
+        # qualifierId = args.qualifier_id
+    ):
+        if filename is not None or (dataset_dir is not None and format in COLUMNAR_FORMATS):
+            cls.export_to_file(filename, format = format, include_id=include_id, dataset_dir=dataset_dir, compression=compression, **kwargs)
+        elif file_pattern is not None:
+            for ts in Timeseries.read(
+                **kwargs
+                # forecastDate = args.forecast_date,
+                # locationId = args.location_id,
+                # parameterId = args.parameter_id,
+                # timestart = args.timestart, 
+                # timeend = args.timeend,
+                # qualifierId = args.qualifier_id
+            ):
+                fname = ts.filename_from_pattern(file_pattern)
+                ts.to_file(fname, include_id, format=format)
+        else:
+            raise ValueError("Falta filename, file_pattern o dataset_dir")  
+
+def use_config(path : Optional[str] = None, data : Optional[dict] = None):
+    """Loads the configuration now from path (instead of the SSTDFEWS_CONFIG environment variable path or config/config.json), or from data"""
+    config.load(path, data)
+
+_store = None
+
+def use_store(directory : Optional[str]):
+    """Makes Timeseries.read, read_one, read_paired and read_to_file read from the local series store in directory (see app.store.SeriesStore) instead of the database. None goes back to the database"""
+    global _store
+    if directory is None:
+        _store = None
+        return
+    from .store import SeriesStore
+    _store = SeriesStore(directory)
+
+def get_store():
+    """Local series store in use, or None if reads go to the database. Enabled from start by store.enabled of config"""
+    global _store
+    store_config = config.get("store", {})
+    if _store is None and store_config.get("enabled"):
+        use_store(store_config.get("directory", "data/store"))
+    return _store
+
+_ensured_partitions = set()
+
+def ensure_partitions(timestart : datetime, timeend : datetime):
+    """Creates the missing partitions of timeseries_values for [timestart, timeend] (see app.createdb.partitionValues). Ranges already ensured by this process are skipped.
+
+    Outside a transaction() block the partitions are created and committed in a short transaction of their own, so that the advisory lock taken by timeseries_values_ensure_partitions does not serialize concurrent ingests, and the range is remembered. Inside one they are created in it and the range is not remembered, since a rollback undoes them (see ensure_series_partitions)"""
+    interval = config.get("partitioning", {}).get("interval", "month")
+    key = (timestart.astimezone(timezone.utc).year, timestart.astimezone(timezone.utc).month if interval == "month" else 1, timeend.astimezone(timezone.utc).year, timeend.astimezone(timezone.utc).month if interval == "month" else 1)
+    if key in _ensured_partitions:
+        return
+    dsn = config["user_dsn"]
+    committed = not inTransaction(dsn)
+    created = execStmt(
+        dsn,
+        "SELECT timeseries_values_ensure_partitions(%s, %s, %s)",
+        (timestart, timeend, interval))
+    if created:
+        logging.info("Se crearon %i particiones de timeseries_values" % created)
+    if committed:
+        _ensured_partitions.add(key)
+
+def ensure_series_partitions(ts_items : List[Timeseries]):
+    """Creates the partitions of timeseries_values for the values of ts_items, if partitioning is enabled. Called by create_all and create_batch before opening their transaction (see ensure_partitions)"""
+    if not config.get("partitioning", {}).get("enabled"):
+        return
+    times = [ts.values.time[~np.isnan(ts.values.value)] for ts in ts_items if ts.values is not None]
+    times = [t for t in times if len(t)]
+    if not len(times):
+        return
+    ensure_partitions(
+        min(t.min() for t in times).astype("datetime64[us]").item().replace(tzinfo=timezone.utc),
+        max(t.max() for t in times).astype("datetime64[us]").item().replace(tzinfo=timezone.utc))
+
+packed_defaults = {
+    "enabled": False,
+    "chunk_size": 1024,
+    "forecasts_only": True
+}
+
+def packed_config() -> dict:
+    """Packed storage parameters: packed_defaults overridden by config["packed_storage"]"""
+    return {**packed_defaults, **config.get("packed_storage", {})}
+
+def values_relation() -> str:
+    """Relation read for values: the timeseries_values_all view (rows and packed chunks, see schema_packed.sql) if packed storage is enabled, else the timeseries_values table"""
+    return "timeseries_values_all" if packed_config()["enabled"] else "timeseries_values"
+
+def merge_values(old : TimeseriesValues, new : TimeseriesValues) -> TimeseriesValues:
+    """Union of two series by time, with the values of new where both have the same time"""
+    time = np.concatenate([new.time, old.time])
+    unique_time, index = np.unique(time, return_index=True)
+    value = np.concatenate([new.value, old.value])[index]
+    flag = np.concatenate([new.flag, old.flag])[index]
+    flag_mask = None
+    if old.flag_mask is not None or new.flag_mask is not None:
+        flag_mask = np.concatenate([
+            new.flag_mask if new.flag_mask is not None else np.zeros(len(new), dtype=bool),
+            old.flag_mask if old.flag_mask is not None else np.zeros(len(old), dtype=bool)
+        ])[index]
+    # comments by position in the concatenation, then in the result
+    comments_by_position = {**{i + len(new): c for i, c in old.comments.items()}, **new.comments}
+    position = np.full(len(time), -1)
+    position[index] = np.arange(len(index))
+    return TimeseriesValues(
+        time = unique_time,
+        value = value,
+        flag = flag,
+        flag_mask = flag_mask,
+        comments = {int(position[i]): c for i, c in comments_by_position.items() if position[i] >= 0},
+        timeseries_id = new.timeseries_id,
+        time_zone = new.time_zone
+    )
+
+def group_rows_by_series(headers : List[Timeseries], rows : Iterator[dict]) -> Iterator[Tuple[Timeseries, Iterator[dict]]]:
+    """Pairs each of headers with its value rows. Both must be ordered by series id. Each rows iterator must be consumed before advancing to the next series"""
+    groups = groupby(rows, key=lambda r: r["series_id"])
+    current = next(groups, None)
+    for ts in headers:
+        while current is not None and current[0] < ts.id:
+            current = next(groups, None)
+        if current is not None and current[0] == ts.id:
+            yield ts, current[1]
+            current = next(groups, None)
+        else:
+            yield ts, iter(())
+
+def value_row_batches(headers : List[Timeseries], rows : Iterator[dict], include_id : bool = False, batch_size : int = EXPORT_BATCH_SIZE) -> Iterator:
+    """Groups value rows (see TimeseriesValue.iter_rows) into pyarrow.RecordBatches of valuesSchema of up to batch_size rows, with the header columns of their series"""
+    pa = requirePyarrow()
+    schema = valuesSchema(include_id)
+    by_id = {ts.id: ts for ts in headers}
+    names = schema.names
+    columns = {name: [] for name in names}
+    for row in rows:
+        ts = by_id[row["series_id"]]
+        columns["forecast_date"].append(ts.forecastDate)
+        columns["location_id"].append(ts.locationId)
+        columns["parameter_id"].append(ts.parameterId)
+        columns["qualifier_id"].append(ts.qualifierId)
+        columns["timeseries_id"].append(row["series_id"])
+        columns["time"].append(row["time"])
+        columns["value"].append(row["value"])
+        columns["flag"].append(row["flag"])
+        columns["comment"].append(row["comment"])
+        if include_id:
+            columns["id"].append(row["id"])
+        if len(columns["time"]) >= batch_size:
+            yield pa.RecordBatch.from_pydict(columns, schema=schema)
+            columns = {name: [] for name in names}
+    if len(columns["time"]):
+        yield pa.RecordBatch.from_pydict(columns, schema=schema)
 
 def read_paired(
     obs_series_id : int, 
@@ -651,12 +1921,12 @@ def read_paired(
             s.time,
             o.value AS obs,
             s.value AS sim
-        FROM timeseries_values s
-        LEFT OUTER JOIN timeseries_values o
+        FROM {values} s
+        LEFT OUTER JOIN {values} o
             ON o.time = s.time
             AND o.series_id = %s
         WHERE s.series_id = %s
-        """
+        """.format(values=values_relation())
     params = [obs_series_id, sim_series_id]
     conditions = []
     if timestart is not None:
@@ -672,12 +1942,63 @@ def read_paired(
         conditions.append("s.flag = %s")
         params.append(sim_flag)
     if len(conditions):
-        sql += " WHERE " + " AND ".join(conditions)
+        sql += " AND " + " AND ".join(conditions)
     sql += " ORDER BY s.time"
 
     data = execStmtFetchAll(config["user_dsn"], sql, params)
     return pd.DataFrame(data)
 
+def read_paired_many(
+    pairs : List[Tuple[int, int, str, str, datetime]],
+    timestart : Optional[datetime] = None, 
+    timeend : Optional[datetime] = None, 
+    obs_flag : Optional[int] = None, 
+    sim_flag : Optional[int] = None
+    ) -> pd.DataFrame:
+    """Joins the values of many (obs series, sim series) pairs in a single set-based query
+
+    Args:
+        pairs (List[Tuple[int, int, str, str, datetime]]): (obs_series_id, sim_series_id, station, sim_location, forecast_date) tuples
+        
+    Returns:
+        pd.DataFrame: columns station, sim_location, forecast_date, time, obs, sim, ordered by station, forecast_date and time
+    """
+    sql = """
+        SELECT
+            p.station,
+            p.sim_location,
+            p.forecast_date,
+            s.time,
+            o.value AS obs,
+            s.value AS sim
+        FROM unnest(%s::bigint[], %s::bigint[], %s::text[], %s::text[], %s::timestamptz[]) AS p(obs_id, sim_id, station, sim_location, forecast_date)
+        JOIN {values} s
+            ON s.series_id = p.sim_id
+        LEFT OUTER JOIN {values} o
+            ON o.time = s.time
+            AND o.series_id = p.obs_id
+        """.format(values=values_relation())
+    params = [list(c) for c in zip(*pairs)] if len(pairs) else [[], [], [], [], []]
+    conditions = []
+    if timestart is not None:
+        conditions.append("s.time >= %s")
+        params.append(timestart)
+    if timeend is not None:
+        conditions.append("s.time < %s")
+        params.append(timeend)
+    if obs_flag is not None:
+        conditions.append("o.flag = %s")
+        params.append(obs_flag)
+    if sim_flag is not None:
+        conditions.append("s.flag = %s")
+        params.append(sim_flag)
+    if len(conditions):
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY p.station, p.forecast_date, s.time"
+
+    data = execStmtFetchAll(config["user_dsn"], sql, params)
+    return pd.DataFrame(data, columns=["station", "sim_location", "forecast_date", "time", "obs", "sim"])
+
 def download_timeseries(
         fecha_pronostico : Optional[datetime] = None,
         filterId : Optional[str] = None,
@@ -691,6 +2012,570 @@ def download_timeseries(
 
     # if fecha_pronostico is None:
     #     fecha_pronostico = datetime.now()
+    url, params = timeseries_request(fecha_pronostico, filterId, locationIds, parameterIds, timestart, timeend, qualifierIds)
+    cached = cacheGet(url, params)
+    if cached is not None:
+        profileCount("cache_hits")
+        with profileSpan("json_decode"):
+            return json.loads(cached)
+    # logging.debug(f'GET {url}?{urlencode(params)}')
+    response = http_get(
+        url, 
+        params
+    )
+    with profileSpan("json_decode"):
+        data = response.json()
+    if fecha_pronostico is not None:
+        # runs of a past forecast date do not change: expiry depends on the end of that day, not on the simulated period
+        period_end = datetime(fecha_pronostico.year, fecha_pronostico.month, fecha_pronostico.day) + timedelta(days=1)
+    else:
+        period_end = timeend
+    cachePut(url, params, response.content, cacheTtl(fecha_pronostico is not None, period_end))
+    return data
+
+def download_timeseries_many(
+        fecha_pronostico : Optional[datetime] = None,
+        filterId : Optional[str] = None,
+        locationIds : Union[str,List[str],None] = None,
+        parameterIds : Union[str,List[str],None] = None,
+        timestart : Optional[datetime] = None,
+        timeend : Optional[datetime] = None,
+        qualifierIds : Union[str,List[str],None] = None,
+        locations_per_request : Optional[int] = None,
+        window : Optional[timedelta] = None,
+        max_workers : Optional[int] = None,
+        skip_errors : bool = False
+) -> GetTimeseriesResponse:
+    """Splits a download_timeseries request into sub-requests by locationIds and/or time windows, runs them concurrently over the shared HTTP session and merges the results into one response
+
+    Args:
+        locations_per_request (Optional[int], optional): locationIds per sub-request. If None, locations are not split. Defaults to None.
+        window (Optional[timedelta], optional): length of the time window of each sub-request. Requires timestart and timeend. If None, time is not split. Defaults to None.
+        max_workers (Optional[int], optional): concurrent sub-requests. Defaults to config["http"]["max_workers"].
+        skip_errors (bool, optional): log and skip failed sub-requests instead of raising. Defaults to False.
+
+    Returns:
+        GetTimeseriesResponse: merged response
+    """
+    sub_requests = split_request(locationIds, timestart, timeend, locations_per_request, window)
+    responses = []
+    with ThreadPoolExecutor(max_workers=max_workers or http_config()["max_workers"]) as executor:
+        futures = {
+            executor.submit(download_timeseries, fecha_pronostico, filterId, locs, parameterIds, ts, te, qualifierIds): (locs, ts, te)
+            for locs, ts, te in sub_requests
+        }
+        for future in as_completed(futures):
+            try:
+                responses.append(future.result())
+            except Exception as e:
+                if not skip_errors:
+                    raise
+                logging.error("Falló la descarga de locationIds=%s, timestart=%s, timeend=%s: %s" % (*futures[future], e))
+    logging.debug("Se completaron %i de %i descargas" % (len(responses), len(sub_requests)))
+    return merge_responses(responses)
+
+def split_request(
+        locationIds : Union[str,List[str],None] = None,
+        timestart : Optional[datetime] = None,
+        timeend : Optional[datetime] = None,
+        locations_per_request : Optional[int] = None,
+        window : Optional[timedelta] = None) -> List[Tuple[Union[str,List[str],None], Optional[datetime], Optional[datetime]]]:
+    """(locationIds, timestart, timeend) sub-requests of a request, split into chunks of locations_per_request locations and/or time windows of length window (see download_timeseries_many)"""
+    location_chunks = [locationIds]
+    if locations_per_request is not None and locationIds is not None:
+        locationIds = [locationIds] if type(locationIds) == str else locationIds
+        location_chunks = [locationIds[i:i+locations_per_request] for i in range(0, len(locationIds), locations_per_request)]
+    time_windows = [(timestart, timeend)]
+    if window is not None:
+        if timestart is None or timeend is None:
+            raise ValueError("Para dividir por ventanas de tiempo se requieren timestart y timeend")
+        time_windows = []
+        start = timestart
+        while start < timeend:
+            time_windows.append((start, min(start + window, timeend)))
+            start = start + window
+    return [(locs, ts, te) for locs in location_chunks for ts, te in time_windows]
+
+def download_incremental(
+        filterId : Optional[str] = None,
+        locationIds : Union[str,List[str],None] = None,
+        parameterIds : Union[str,List[str],None] = None,
+        timestart : Optional[datetime] = None,
+        timeend : Optional[datetime] = None,
+        qualifierIds : Union[str,List[str],None] = None,
+        overlap : Optional[timedelta] = None,
+        **kwargs
+) -> GetTimeseriesResponse:
+    """Downloads observed series from their latest stored time (high-water mark) minus overlap, instead of the whole period. Locations without stored values are requested from timestart. Locations sharing the same start are requested together, through download_timeseries_many
+
+    Args:
+        timestart (Optional[datetime], optional): start for series not yet stored. Defaults to timeend minus config["incremental"]["default_days"].
+        timeend (Optional[datetime], optional): Defaults to now (UTC).
+        overlap (Optional[timedelta], optional): re-downloaded window before the mark, to pick up corrections. Defaults to config["incremental"]["overlap_hours"].
+        **kwargs: passed to download_timeseries_many (locations_per_request, window, max_workers, skip_errors)
+
+    Returns:
+        GetTimeseriesResponse: merged response
+    """
+    responses = []
+    for location_ids, start, end in incremental_requests(locationIds, parameterIds, timestart, timeend, qualifierIds, overlap):
+        responses.append(download_timeseries_many(None, filterId, location_ids, parameterIds, start, end, qualifierIds, **kwargs))
+    return merge_responses(responses)
+
+def incremental_requests(
+        locationIds : Union[str,List[str],None] = None,
+        parameterIds : Union[str,List[str],None] = None,
+        timestart : Optional[datetime] = None,
+        timeend : Optional[datetime] = None,
+        qualifierIds : Union[str,List[str],None] = None,
+        overlap : Optional[timedelta] = None) -> List[Tuple[Optional[List[str]], datetime, datetime]]:
+    """(locationIds, timestart, timeend) requests of download_incremental: locations grouped by their start (high-water mark minus overlap, or timestart if not stored). Groups already up to date are left out"""
+    incremental = {**incremental_defaults, **config.get("incremental", {})}
+    timeend = timeend if timeend is not None else datetime.now(timezone.utc).replace(tzinfo=None)
+    timestart = timestart if timestart is not None else timeend - timedelta(days=incremental["default_days"])
+    overlap = overlap if overlap is not None else timedelta(hours=incremental["overlap_hours"])
+    marks = Timeseries.read_high_water_marks(locationIds, parameterIds, qualifierIds)
+
+    def start_from(location_marks : List[Optional[datetime]]) -> datetime:
+        if not len(location_marks) or None in location_marks:
+            return timestart
+        # naive UTC, as expected by download_timeseries
+        return max(timestart, min(location_marks).astimezone(timezone.utc).replace(tzinfo=None) - overlap)
+
+    if locationIds is None:
+        starts = {start_from(list(marks.values())): None}
+    else:
+        parameters = [parameterIds] if type(parameterIds) == str else parameterIds
+        starts = {}
+        for location_id in ([locationIds] if type(locationIds) == str else locationIds):
+            location_marks = [t for (l, p, q), t in marks.items() if l == location_id]
+            if parameters is not None:
+                location_marks = [max((t for (l, p, q), t in marks.items() if l == location_id and p == parameter), default=None) for parameter in parameters]
+            starts.setdefault(start_from(location_marks), []).append(location_id)
+    sub_requests = []
+    for start, location_ids in starts.items():
+        logging.info("Descarga incremental desde %s: %s" % (start.isoformat(), ", ".join(location_ids) if location_ids is not None else "todas las locations"))
+        if start >= timeend:
+            continue
+        sub_requests.append((location_ids, start, timeend))
+    return sub_requests
+
+incremental_defaults = {
+    "overlap_hours": 24,
+    "default_days": 365
+}
+
+def merge_responses(responses : List[GetTimeseriesResponse]) -> GetTimeseriesResponse:
+    """Merges /timeseries responses. Items of the same series (location, parameter, qualifier, forecast date) are joined into one, with events sorted by time and without duplicates"""
+    merged = {}
+    for response in responses:
+        for item in response.get("timeSeries", []):
+            header = item["header"]
+            key = (
+                header["locationId"],
+                header["parameterId"],
+                tuple(header["qualifierId"]) if "qualifierId" in header else None,
+                (header["forecastDate"]["date"], header["forecastDate"]["time"]) if "forecastDate" in header else None
+            )
+            if key not in merged:
+                merged[key] = {"header": header, "events": {}}
+            for event in item.get("events", []):
+                merged[key]["events"][(event["date"], event["time"])] = event
+    result = {
+        "version": responses[0].get("version") if len(responses) else None,
+        "timeZone": responses[0].get("timeZone", "0.0") if len(responses) else "0.0",
+        "timeSeries": [
+            {"header": m["header"], "events": [m["events"][k] for k in sorted(m["events"])]}
+            for m in merged.values()
+        ]
+    }
+    return result
+
+## ingest pipeline
+
+@dataclass
+class StageStats:
+    """Counters of a stage of ingest_pipeline"""
+    name : str
+    items : int = 0
+    busy : float = 0.0 # seconds working
+    idle : float = 0.0 # seconds waiting for input
+    blocked : float = 0.0 # seconds waiting for room in the next queue (backpressure)
+
+    def throughput(self) -> float:
+        """Items per busy second"""
+        return self.items / self.busy if self.busy > 0 else 0.0
+
+    def __str__(self) -> str:
+        return "%s: %i items, %.1f items/s, busy %.2f s, idle %.2f s, blocked %.2f s" % (self.name, self.items, self.throughput(), self.busy, self.idle, self.blocked)
+
+_PIPELINE_DONE = object()
+
+def ingest_pipeline(
+        fecha_pronostico : Optional[datetime] = None,
+        filterId : Optional[str] = None,
+        locationIds : Union[str,List[str],None] = None,
+        parameterIds : Union[str,List[str],None] = None,
+        timestart : Optional[datetime] = None,
+        timeend : Optional[datetime] = None,
+        qualifierIds : Union[str,List[str],None] = None,
+        locations_per_request : Optional[int] = 1,
+        window : Optional[timedelta] = None,
+        max_workers : Optional[int] = None,
+        incremental : bool = False,
+        overlap : Optional[timedelta] = None,
+        batch_size : int = 50,
+        queue_size : int = 64,
+        skip_errors : bool = False,
+        writer : Optional[Callable[[List[Timeseries]], object]] = None
+) -> Dict[str, StageStats]:
+    """Downloads, parses and saves series with overlapping stages: max_workers download threads (sub-requests as in download_timeseries_many, or download_incremental if incremental), one parse thread and one writer thread, connected by queues of queue_size items. While a batch is written the next downloads are in flight; when a stage falls behind, the bounded queues block the stages before it
+
+    Args:
+        locations_per_request (Optional[int], optional): locationIds per download. Defaults to 1.
+        window (Optional[timedelta], optional): time window per download. Defaults to None.
+        max_workers (Optional[int], optional): concurrent downloads. Defaults to config["http"]["max_workers"].
+        incremental (bool, optional): download each location from its latest stored time minus overlap (see download_incremental). Defaults to False.
+        overlap (Optional[timedelta], optional): see download_incremental. Defaults to None.
+        batch_size (int, optional): series per write transaction (see Timeseries.create_batch). A smaller batch is written when no series is waiting. Defaults to 50.
+        queue_size (int, optional): capacity of each queue. Defaults to 64.
+        skip_errors (bool, optional): log and skip failed downloads instead of stopping. Defaults to False.
+        writer (Optional[Callable[[List[Timeseries]], object]], optional): saves a batch of series. Defaults to Timeseries.create_batch.
+
+    Returns:
+        Dict[str, StageStats]: counters of the download (responses), parse (series) and write (series) stages
+    """
+    writer = writer or Timeseries.create_batch
+    ranges = incremental_requests(locationIds, parameterIds, timestart, timeend, qualifierIds, overlap) if incremental else [(locationIds, timestart, timeend)]
+    sub_requests = queue.Queue()
+    for locs, start, end in ranges:
+        for sub_request in split_request(locs, start, end, locations_per_request, window):
+            sub_requests.put(sub_request)
+    n_downloaders = max(1, min(max_workers or http_config()["max_workers"], sub_requests.qsize()))
+    parse_queue = queue.Queue(maxsize=queue_size)
+    write_queue = queue.Queue(maxsize=queue_size)
+    stats = {name: StageStats(name) for name in ("download", "parse", "write")}
+    stats_lock = threading.Lock()
+    errors = []
+    stop = threading.Event()
+
+    def put(q : queue.Queue, item, stage : StageStats):
+        # blocks while the next stage is behind, unless the pipeline is stopping
+        t0 = perf_counter()
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                pass
+        with stats_lock:
+            stage.blocked += perf_counter() - t0
+
+    def get(q : queue.Queue, stage : StageStats):
+        t0 = perf_counter()
+        item = q.get()
+        stage.idle += perf_counter() - t0
+        return item
+
+    def fail(e : Exception):
+        errors.append(e)
+        stop.set()
+
+    def download():
+        while not stop.is_set():
+            try:
+                locs, start, end = sub_requests.get_nowait()
+            except queue.Empty:
+                return
+            t0 = perf_counter()
+            try:
+                data = download_timeseries(fecha_pronostico, filterId, locs, parameterIds, start, end, qualifierIds)
+            except Exception as e:
+                if not skip_errors:
+                    fail(e)
+                    return
+                logging.error("Falló la descarga de locationIds=%s, timestart=%s, timeend=%s: %s" % (locs, start, end, e))
+                continue
+            with stats_lock:
+                stats["download"].busy += perf_counter() - t0
+                stats["download"].items += 1
+            time_zone = float(data.get("timeZone", 0.0))
+            for item in data.get("timeSeries", []):
+                put(parse_queue, (time_zone, item), stats["download"])
+
+    def parse():
+        stage = stats["parse"]
+        while True:
+            item = get(parse_queue, stage)
+            if item is _PIPELINE_DONE:
+                break
+            if stop.is_set():
+                continue
+            t0 = perf_counter()
+            try:
+                ts = Timeseries.parse_one(item[1], item[0])
+            except Exception as e:
+                fail(e)
+                continue
+            stage.busy += perf_counter() - t0
+            stage.items += 1
+            put(write_queue, ts, stage)
+        # the writer drains its queue even when stopping
+        write_queue.put(_PIPELINE_DONE)
+
+    def write():
+        stage = stats["write"]
+        batch = []
+        done = False
+        while not done:
+            item = get(write_queue, stage)
+            if item is _PIPELINE_DONE:
+                done = True
+            elif not stop.is_set():
+                batch.append(item)
+            if len(batch) and (done or len(batch) >= batch_size or write_queue.empty()):
+                t0 = perf_counter()
+                try:
+                    writer(batch)
+                    # only series actually written are counted
+                    stage.items += len(batch)
+                except Exception as e:
+                    fail(e)
+                stage.busy += perf_counter() - t0
+                batch = []
+
+    downloaders = [threading.Thread(target=download, name="ingest-download-%i" % i, daemon=True) for i in range(n_downloaders)]
+    parser = threading.Thread(target=parse, name="ingest-parse", daemon=True)
+    writer_thread = threading.Thread(target=write, name="ingest-write", daemon=True)
+    t0 = perf_counter()
+    for thread in downloaders + [parser, writer_thread]:
+        thread.start()
+    for thread in downloaders:
+        thread.join()
+    # the parse stage ends after every downloaded item
+    parse_queue.put(_PIPELINE_DONE)
+    parser.join()
+    writer_thread.join()
+    elapsed = perf_counter() - t0
+    for stage in stats.values():
+        logging.info("%s" % stage)
+    logging.info("Ingesta completada en %.2f s" % elapsed)
+    if len(errors):
+        raise errors[0]
+    return stats
+
+## backfill
+
+backfill_defaults = {
+    "max_workers": 2
+}
+
+backfill_state_stmt = """
+    CREATE TABLE IF NOT EXISTS backfill_state (
+        job             TEXT NOT NULL,
+        forecast_date   DATE NOT NULL,
+        status          TEXT NOT NULL, -- done | empty | failed
+        series          INTEGER,
+        values_count    INTEGER,
+        seconds         DOUBLE PRECISION,
+        error           TEXT,
+        updated_at      TIMESTAMPTZ NOT NULL DEFAULT now(),
+        PRIMARY KEY (job, forecast_date)
+    )"""
+
+def ensure_backfill_state():
+    """Creates the backfill_state table if missing (databases created before it was added to schema.sql)"""
+    with getConnection(config["user_dsn"]) as conn:
+        conn.execute(backfill_state_stmt)
+
+def backfill_job(
+        filterId : Optional[str] = None,
+        locationIds : Union[str,List[str],None] = None,
+        parameterIds : Union[str,List[str],None] = None,
+        qualifierIds : Union[str,List[str],None] = None) -> str:
+    """Name of a backfill in backfill_state: its filters, so that the same command resumes the same job"""
+    def ids(v):
+        return ",".join(sorted([v] if type(v) == str else v)) if v is not None else "*"
+    return "%s|%s|%s|%s" % (filterId or config.get("default_filterId", ""), ids(locationIds), ids(parameterIds), ids(qualifierIds))
+
+def stored_forecast_dates(
+        forecast_date_start : date,
+        forecast_date_end : date,
+        locationIds : Union[str,List[str],None] = None,
+        parameterIds : Union[str,List[str],None] = None) -> set:
+    """Days (UTC) between forecast_date_start and forecast_date_end with stored forecasts in timeseries, optionally of the given locations and parameters"""
+    conditions = ["forecast_date >= %s", "forecast_date < %s", "forecast_date <> %s"]
+    params = [datetime.combine(forecast_date_start, datetime.min.time(), timezone.utc), datetime.combine(forecast_date_end + timedelta(days=1), datetime.min.time(), timezone.utc), SENTINEL]
+    if locationIds is not None:
+        conditions.append("location_id = ANY(%s)")
+        params.append([locationIds] if type(locationIds) == str else locationIds)
+    if parameterIds is not None:
+        conditions.append("parameter_id = ANY(%s)")
+        params.append([parameterIds] if type(parameterIds) == str else parameterIds)
+    rows = execStmtFetchAll(
+        config["user_dsn"],
+        "SELECT DISTINCT (forecast_date AT TIME ZONE 'UTC')::date AS day FROM timeseries WHERE " + " AND ".join(conditions),
+        params)
+    return {row["day"] for row in rows}
+
+def backfill(
+        forecast_date_start : date,
+        forecast_date_end : date,
+        filterId : Optional[str] = None,
+        locationIds : Union[str,List[str],None] = None,
+        parameterIds : Union[str,List[str],None] = None,
+        qualifierIds : Union[str,List[str],None] = None,
+        max_workers : Optional[int] = None,
+        force : bool = False) -> dict:
+    """Downloads and saves the forecasts of every day of a range, one job per forecast date, max_workers at a time. Each date is saved in one transaction and checkpointed in backfill_state, so an interrupted backfill resumes with the dates not yet done. Dates already checkpointed (done or empty) or with forecasts stored in timeseries are skipped unless force is set. Progress, throughput and ETA are logged after each date
+
+    Args:
+        forecast_date_start (date): first forecast date
+        forecast_date_end (date): last forecast date (inclusive)
+        filterId (Optional[str], optional): Defaults to config["default_filterId"].
+        max_workers (Optional[int], optional): concurrent dates. Defaults to config["backfill"]["max_workers"].
+        force (bool, optional): download every date of the range again. Defaults to False.
+
+    Returns:
+        dict: date counts by status (done, empty, failed, skipped), series and values saved, and elapsed seconds
+    """
+    if forecast_date_end < forecast_date_start:
+        raise ValueError("forecast_date_end es anterior a forecast_date_start")
+    max_workers = max_workers or {**backfill_defaults, **config.get("backfill", {})}["max_workers"]
+    job = backfill_job(filterId, locationIds, parameterIds, qualifierIds)
+    ensure_backfill_state()
+    dates = [forecast_date_start + timedelta(days=i) for i in range((forecast_date_end - forecast_date_start).days + 1)]
+    if not force:
+        checkpointed = {
+            row["forecast_date"]
+            for row in execStmtFetchAll(
+                config["user_dsn"],
+                "SELECT forecast_date FROM backfill_state WHERE job = %s AND status IN ('done', 'empty') AND forecast_date BETWEEN %s AND %s",
+                (job, forecast_date_start, forecast_date_end))
+        }
+        stored = stored_forecast_dates(forecast_date_start, forecast_date_end, locationIds, parameterIds)
+        pending = [d for d in dates if d not in checkpointed and d not in stored]
+    else:
+        pending = dates
+    summary = {"done": 0, "empty": 0, "failed": 0, "skipped": len(dates) - len(pending), "series": 0, "values": 0, "seconds": 0.0}
+    logging.info("Backfill %s: %i fechas, %i pendientes" % (job, len(dates), len(pending)))
+
+    def run_date(forecast_date : date) -> dict:
+        t0 = perf_counter()
+        data = download_timeseries(forecast_date, filterId, locationIds, parameterIds, None, None, qualifierIds)
+        ts_list = Timeseries.from_api_response(data, save=False) if len(data.get("timeSeries", [])) else []
+        stats = Timeseries.create_batch(ts_list) if len(ts_list) else []
+        return {
+            "status": "done" if len(ts_list) else "empty",
+            "series": len(stats),
+            "values": sum(s["values"] for s in stats),
+            "seconds": perf_counter() - t0
+        }
+
+    t0 = perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(run_date, d): d for d in pending}
+        for i, future in enumerate(as_completed(futures)):
+            forecast_date = futures[future]
+            try:
+                result = future.result()
+                error = None
+            except Exception as e:
+                result = {"status": "failed", "series": None, "values": None, "seconds": None}
+                error = str(e)
+                logging.error("Backfill %s: falló %s: %s" % (job, forecast_date.isoformat(), error))
+            execStmtMany(
+                config["user_dsn"],
+                """INSERT INTO backfill_state (job, forecast_date, status, series, values_count, seconds, error)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                ON CONFLICT (job, forecast_date) DO UPDATE SET
+                    status = EXCLUDED.status,
+                    series = EXCLUDED.series,
+                    values_count = EXCLUDED.values_count,
+                    seconds = EXCLUDED.seconds,
+                    error = EXCLUDED.error,
+                    updated_at = now()""",
+                [(job, forecast_date, result["status"], result["series"], result["values"], result["seconds"], error)])
+            summary[result["status"]] += 1
+            summary["series"] += result["series"] or 0
+            summary["values"] += result["values"] or 0
+            elapsed = perf_counter() - t0
+            completed = i + 1
+            rate = completed / elapsed if elapsed > 0 else 0.0
+            eta = (len(pending) - completed) / rate if rate > 0 else 0.0
+            logging.info("Backfill %s: %s %s (%i/%i), %.2f fechas/min, %.0f valores/s, ETA %s" % (
+                job, forecast_date.isoformat(), result["status"], completed, len(pending), rate * 60, summary["values"] / elapsed if elapsed > 0 else 0.0, timedelta(seconds=round(eta))))
+    summary["seconds"] = perf_counter() - t0
+    logging.info("Backfill %s terminado: %s" % (job, summary))
+    return summary
+
+http_defaults = {
+    "timeout": 60.0,
+    "max_retries": 4,
+    "backoff": 1.0,
+    "max_workers": 4
+}
+
+def http_config() -> dict:
+    """HTTP client parameters: http_defaults overridden by config["http"]"""
+    return {**http_defaults, **config.get("http", {})}
+
+_session : Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+def get_session() -> requests.Session:
+    """Process-wide keep-alive HTTP session, sized for max_workers concurrent requests"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            pool_size = http_config()["max_workers"]
+            adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+@profiled("http")
+def http_get(url : str, params : dict, stream : bool = False) -> requests.Response:
+    """GET over the shared session with timeout. Retries with exponential backoff (backoff * 2^attempt seconds) on 5xx responses, timeouts and connection errors
+
+    Raises:
+        Exception: on 4xx responses or when retries are exhausted
+    """
+    http = http_config()
+    attempt = 0
+    while True:
+        try:
+            profileCount("http_requests")
+            response = get_session().get(url, params=params, timeout=http["timeout"], stream=stream)
+            if response.status_code < 500:
+                break
+            error = "HTTP %i: %s" % (response.status_code, response.text)
+            response.close()
+        except (requests.Timeout, requests.ConnectionError) as e:
+            error = str(e)
+        if attempt >= http["max_retries"]:
+            raise Exception("Falló la descarga: %s" % (error))
+        delay = http["backoff"] * 2 ** attempt
+        logging.warning("Falló la descarga (%s), reintento en %.1f s" % (error, delay))
+        sleep(delay)
+        attempt += 1
+    if response.status_code >= 400:
+        raise Exception("Falló la descarga: %s" % (response.text))
+    if not stream:
+        profileCount("http_bytes", len(response.content))
+    return response
+
+def timeseries_request(
+        fecha_pronostico : Optional[datetime] = None,
+        filterId : Optional[str] = None,
+        locationIds : Union[str,List[str],None] = None,
+        parameterIds : Union[str,List[str],None] = None,
+        timestart : Optional[datetime] = None,
+        timeend : Optional[datetime] = None,
+        qualifierIds : Union[str,List[str],None] = None
+) -> Tuple[str, dict]:
+    """Returns url and query parameters of a /timeseries request"""
     if filterId is None:
         filterId = config["default_filterId"] if "default_filterId" in config else None
     inicio = datetime(fecha_pronostico.year, fecha_pronostico.month, fecha_pronostico.day) if fecha_pronostico is not None else None
@@ -711,14 +2596,60 @@ def download_timeseries(
             "endTime": endTime,
             "qualifierIds": qualifierIds
         }
-    # logging.debug(f'GET {url}?{urlencode(params)}')
-    response = requests.get(
-        url, 
-        params
-    )
-    if response.status_code >= 400:
-        raise Exception("Falló la descarga: %s" % (response.text))
-    return response.json()
+    return url, params
+
+def stream_timeseries(
+        fecha_pronostico : Optional[datetime] = None,
+        filterId : Optional[str] = None,
+        locationIds : Union[str,List[str],None] = None,
+        parameterIds : Union[str,List[str],None] = None,
+        timestart : Optional[datetime] = None,
+        timeend : Optional[datetime] = None,
+        qualifierIds : Union[str,List[str],None] = None,
+        output : Optional[str] = None
+) -> Iterator[Tuple[float, TimeseriesResponse]]:
+    """Like download_timeseries, but parses the response body incrementally as it arrives, yielding one (time_zone, TimeseriesResponse) at a time
+
+    Args:
+        output (Optional[str], optional): also write the raw response body into this file. Defaults to None.
+    """
+    url, params = timeseries_request(fecha_pronostico, filterId, locationIds, parameterIds, timestart, timeend, qualifierIds)
+    with http_get(url, params, stream=True) as response:
+        response.raw.decode_content = True
+        if output is None:
+            yield from iter_timeseries(response.raw)
+        else:
+            with open(output, "wb") as f:
+                yield from iter_timeseries(TeeReader(response.raw, f))
+            logging.info("Se escribió el archivo %s" % (output))
+
+def iter_timeseries(f) -> Iterator[Tuple[float, TimeseriesResponse]]:
+    """Incrementally parses a GetTimeseriesResponse from binary file-like f, yielding (time_zone, TimeseriesResponse) for each item of timeSeries. Only one item is held in memory at a time. timeZone must precede timeSeries in the document (as in FEWS PI_JSON), otherwise 0.0 is assumed"""
+    time_zone = 0.0
+    builder = None
+    for prefix, event, value in ijson.parse(f, use_float=True):
+        if builder is not None:
+            builder.event(event, value)
+            if prefix == "timeSeries.item" and event == "end_map":
+                yield time_zone, builder.value
+                builder = None
+        elif prefix == "timeSeries.item" and event == "start_map":
+            builder = ijson.ObjectBuilder()
+            builder.event(event, value)
+        elif prefix == "timeZone":
+            time_zone = float(value)
+
+class TeeReader:
+    """Binary file-like wrapper that copies everything read from f into out"""
+    def __init__(self, f, out):
+        self.f = f
+        self.out = out
+
+    def read(self, size : int = -1) -> bytes:
+        data = self.f.read(size)
+        if data:
+            self.out.write(data)
+        return data
 
 time_units = {
     "second": "seconds"
@@ -731,16 +2662,44 @@ def parseTimestep(ts : TimeStep) -> timedelta:
     ts_dict[time_units[ts["unit"]]] = int(ts["multiplier"])
     return timedelta(**ts_dict)
 
+@lru_cache(maxsize=None)
+def _timezone(time_zone : float) -> timezone:
+    return timezone(offset=timedelta(hours=time_zone))
+
 def parseDateTime(date : str, time : str, time_zone : float=None) -> datetime:
     dt = datetime.strptime(
         f'{date} {time}',
         "%Y-%m-%d %H:%M:%S"
     )
     if time_zone is not None:
-        tz = timezone(offset=timedelta(hours=time_zone))
-        dt = dt.replace(tzinfo=tz)
+        dt = dt.replace(tzinfo=_timezone(time_zone))
     return dt
 
+@profiled("parse_events")
+def parseEvents(events : List[Event], time_zone : float=0.0, null_value : Optional[float]=None) -> EventColumns:
+    """Parses the events of a TimeseriesResponse into columns, without building one object per event
+
+    Args:
+        events (List[Event]): events of a TimeseriesResponse
+        time_zone (float, optional): hours offset from UTC of the event dates (timeZone of the response). Defaults to 0.0.
+        null_value (Optional[float], optional): missing value (missVal of the header), masked to NaN. Defaults to None.
+
+    Returns:
+        EventColumns: time (datetime64[ns], converted to UTC), value (float64) and flag (int64) arrays
+    """
+    time = np.array([e["date"] + "T" + e["time"] for e in events], dtype="datetime64[s]")
+    if time_zone:
+        time = time - np.timedelta64(int(round(time_zone * 3600)), "s")
+    value = np.array([e["value"] for e in events], dtype=np.float64)
+    if null_value is not None:
+        value[value == null_value] = np.nan
+    flag = np.array([e["flag"] for e in events], dtype=np.int64)
+    return {
+        "time": time.astype("datetime64[ns]"),
+        "value": value,
+        "flag": flag
+    }
+
     
 # def parseResponseItem(data : TimeseriesResponse, time_zone : float="0.0"):
 #     location = Location.from_api_response(data)
@@ -748,7 +2707,7 @@ def parseDateTime(date : str, time : str, time_zone : float=None) -> datetime:
 #     values = TimeseriesValue.from_api_response(data, time_zone)
 #     return (location, timeseries, values)
 
-ACTIONS = ["get", "read", "delete"]
+ACTIONS = ["get", "read", "delete", "backfill"]
 
 def parse_args():
     parser = argparse.ArgumentParser(description="Forecast processor")
@@ -793,6 +2752,57 @@ def parse_args():
         help="Save into database"
     )
 
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="With --save, save the whole response in a single transaction"
+    )
+
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="With 'get', parse the response (or --input file) incrementally and save each series as it arrives (with --save and/or --store), so that the whole document is never held in memory. The raw response is copied into --output. Not compatible with --batch"
+    )
+
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="With 'get', download observed series only from their latest stored time minus --overlap-hours. Series not yet stored are downloaded from --timestart. Use with --output, --save and/or --store"
+    )
+
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="With 'get', download (split by --locations-per-request), parse and save concurrently, in overlapping stages. Saves into the database, or into --store if set. Combines with --incremental"
+    )
+
+    parser.add_argument(
+        "--locations-per-request",
+        type=int,
+        required=False,
+        default=1,
+        help="With --pipeline, locations per download request. Default: 1"
+    )
+
+    parser.add_argument(
+        "--overlap-hours",
+        type=float,
+        required=False,
+        help="With --incremental, hours re-downloaded before the latest stored time. Default: incremental.overlap_hours of config (24)"
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="With 'get', neither read nor write the local response cache (see cache in config)"
+    )
+
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="With 'get', download again even if the response is cached, and update the cache"
+    )
+
     parser.add_argument(
         "--input",
         type=str,
@@ -840,10 +2850,99 @@ def parse_args():
 
     parser.add_argument(
         "--format",
-        choices=["json","csv"],
+        choices=["json","csv","npz","parquet","arrow"],
         required=False,
         default="json",
-        help="Output format: json, csv. Default: json"
+        help="Output format: json, csv, npz, parquet, arrow. Default: json. With npz, 'read' writes the hindcast matrix (forecast date x lead time) of the only --location-id, with the observed values of --obs-location-id. parquet and arrow (Arrow IPC) require pyarrow"
+    )
+
+    parser.add_argument(
+        "--dataset",
+        type=str,
+        required=False,
+        help="With 'read' and --format parquet/arrow, write a dataset partitioned by forecast date and location into this directory"
+    )
+
+    parser.add_argument(
+        "--store",
+        type=str,
+        required=False,
+        help="Local series store directory (see app.store). With 'get', also save the downloaded series into it. With 'read', read from it instead of the database"
+    )
+
+    parser.add_argument(
+        "--compression",
+        choices=["zstd","lz4","snappy","gzip","none"],
+        required=False,
+        default="zstd",
+        help="With --format parquet/arrow, compression codec (snappy and gzip only for parquet). Default: zstd"
+    )
+
+    parser.add_argument(
+        "--obs-location-id",
+        type=str,
+        required=False,
+        help="With 'read --format npz', observed location paired with --location-id"
+    )
+
+    parser.add_argument(
+        "--forecast-date-start",
+        type=date.fromisoformat,   # expects YYYY-MM-DD
+        required=False,
+        help="Begin of forecast date range (YYYY-MM-DD)"
+    )
+
+    parser.add_argument(
+        "--forecast-date-end",
+        type=date.fromisoformat,   # expects YYYY-MM-DD
+        required=False,
+        help="End of forecast date range (YYYY-MM-DD)"
+    )
+
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        required=False,
+        help="With 'backfill', forecast dates processed concurrently. Default: backfill.max_workers of config (2)"
+    )
+
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="With 'delete', only count the values and headers that would be deleted"
+    )
+
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="With 'backfill', download again dates already done or stored"
+    )
+
+    parser.add_argument(
+        "--config",
+        type=str,
+        required=False,
+        help="Configuration file. Defaults to the SSTDFEWS_CONFIG environment variable, or config/config.json"
+    )
+
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="At exit, print time per stage (HTTP, JSON decoding, parsing, SQL, ...) and counters (requests, bytes, series, events, statements, rows, connections) to stderr"
+    )
+
+    parser.add_argument(
+        "--profile-output",
+        type=str,
+        required=False,
+        help="At exit, save the stage times and counters as JSON into this file"
+    )
+
+    parser.add_argument(
+        "--cprofile",
+        type=str,
+        required=False,
+        help="Run under cProfile and dump its stats into this file (read with python -m pstats)"
     )
 
     return parser.parse_args()
@@ -851,18 +2950,75 @@ def parse_args():
 if __name__ == "__main__":
     args = parse_args()
 
+    configureLogging()
+
+    if args.config is not None:
+        use_config(args.config)
+
+    if args.profile or args.profile_output is not None or args.cprofile is not None:
+        startProfiling(args.profile, args.profile_output, args.cprofile)
+
+    if args.store is not None:
+        use_store(args.store)
+
+    if args.no_cache or args.refresh:
+        configureCache(**{**config.get("cache", {}), "enabled": not args.no_cache, "refresh": args.refresh})
+
     timestart = datetime.combine(args.timestart, datetime.min.time()) if args.timestart is not None else None
     timeend = datetime.combine(args.timeend, datetime.min.time()) if args.timeend is not None else None
 
 
-    if args.action == "get":
+    if args.action == "get" and args.pipeline:
+        ingest_pipeline(
+            args.forecast_date,
+            args.filter_id,
+            args.location_id,
+            args.parameter_id,
+            timestart,
+            timeend,
+            args.qualifier_id,
+            locations_per_request = args.locations_per_request,
+            incremental = args.incremental,
+            overlap = timedelta(hours=args.overlap_hours) if args.overlap_hours is not None else None,
+            writer = get_store().write if args.store is not None else None
+        )
+
+    elif args.action == "get" and args.incremental:
+        if args.output is None and not args.save and args.store is None:
+            raise ValueError("Debe utilizar la opción --output, --save y/o --store")
+        data = download_incremental(args.filter_id, args.location_id, args.parameter_id, timestart, timeend, args.qualifier_id, timedelta(hours=args.overlap_hours) if args.overlap_hours is not None else None)
+        if args.output is not None:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+        if args.save:
+            Timeseries.from_api_response(data, True, batch=args.batch)
+        if args.store is not None:
+            get_store().write(Timeseries.from_api_response(data))
+
+    elif args.action == "get" and args.stream:
+        # each series is saved as it arrives: there is no single transaction for the whole response
+        if args.batch:
+            raise ValueError("La opción --batch no puede combinarse con --stream")
+        if args.input is not None and not args.save and args.store is None:
+            raise ValueError("Debe utilizar la opción --save y/o --store")
+        if args.output is None and not args.save and args.store is None:
+            raise ValueError("Debe utilizar la opción --output, --save y/o --store")
+        with (open(args.input, "rb") if args.input is not None else nullcontext()) as f:
+            items = iter_timeseries(f) if f is not None else stream_timeseries(args.forecast_date, args.filter_id, args.location_id, args.parameter_id, timestart, timeend, args.qualifier_id, output=args.output)
+            ts_items = Timeseries.from_api_stream(items, args.save)
+            if args.store is not None:
+                get_store().write(ts_items)
+            else:
+                logging.info("Se procesaron %i series temporales" % sum(1 for ts in ts_items))
+
+    elif args.action == "get":
         if args.input is not None:
             with open(args.input, "r", encoding="utf-8") as f:
                 data = json.load(f)
-            Timeseries.from_api_response(data, True)
+            Timeseries.from_api_response(data, True, batch=args.batch)
         else:
-            if args.output is None and not args.save:
-                raise ValueError("Debe utilizar la opción --output y/o --save")
+            if args.output is None and not args.save and args.store is None:
+                raise ValueError("Debe utilizar la opción --output, --save y/o --store")
             data = download_timeseries(args.forecast_date, args.filter_id, args.location_id, args.parameter_id, timestart, timeend, args.qualifier_id)
             if args.output is not None:
                 with open(args.output, "w", encoding="utf-8") as f:
@@ -871,13 +3027,29 @@ if __name__ == "__main__":
             #     json.dump(data, sys.stdout, indent=2)
             #     sys.stdout.write("\n")
             if args.save:
-                Timeseries.from_api_response(data, True)
+                Timeseries.from_api_response(data, True, batch=args.batch)
+            if args.store is not None:
+                get_store().write(Timeseries.from_api_response(data))
+
+    elif args.action == "read" and args.format == "npz":
+        if args.output is None or args.location_id is None or len(args.location_id) != 1:
+            raise ValueError("Con --format npz debe indicar --output y una única --location-id")
+        hindcast = Timeseries.read_hindcast(
+            locationId = args.location_id[0],
+            parameterId = args.parameter_id[0] if args.parameter_id else "Q.sim",
+            obs_locationId = args.obs_location_id,
+            forecast_date_start = datetime.combine(args.forecast_date_start, datetime.min.time()) if args.forecast_date_start is not None else None,
+            forecast_date_end = datetime.combine(args.forecast_date_end, datetime.max.time()) if args.forecast_date_end is not None else None
+        )
+        hindcast.to_npz(args.output)
 
     elif args.action == "read":
         Timeseries.read_to_file(
             filename = args.output, 
             file_pattern = args.file_pattern, 
             format=args.format,
+            dataset_dir = args.dataset,
+            compression = args.compression if args.compression != "none" else None,
             forecastDate = args.forecast_date,
             locationId = args.location_id,
             parameterId = args.parameter_id,
@@ -886,8 +3058,30 @@ if __name__ == "__main__":
             qualifierId = args.qualifier_id
         )
 
+    elif args.action == "backfill":
+        if args.forecast_date_start is None or args.forecast_date_end is None:
+            raise ValueError("Con 'backfill' debe indicar --forecast-date-start y --forecast-date-end")
+        backfill(
+            args.forecast_date_start,
+            args.forecast_date_end,
+            args.filter_id,
+            args.location_id,
+            args.parameter_id,
+            args.qualifier_id,
+            max_workers = args.max_workers,
+            force = args.force
+        )
+
     elif args.action == "delete":
-        logging.warning("No implementado")
+        Timeseries.delete(
+            locationId = args.location_id,
+            parameterId = args.parameter_id,
+            qualifierId = args.qualifier_id,
+            forecastDate = args.forecast_date,
+            timestart = timestart,
+            timeend = timeend,
+            dry_run = args.dry_run
+        )
 
     else:
         raise ValueError("Argumento 'action' incorrecto. Valores válidos: %s" % (", ".join(ACTIONS)))
@@ -0,0 +1,266 @@
+import os
+import gzip
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Caché en disco de respuestas HTTP (cuerpos comprimidos con gzip), con vencimiento por entrada y desalojo LRU por tamaño total
+
+cache_config = {
+    "enabled": False,
+    "refresh": False,
+    "directory": "cache",
+    "max_size_mb": 1024.0,
+    "ttl_recent": 600.0,
+    "ttl_forecast": None,
+    "ttl_observed": 604800.0,
+    "recent_hours": 48.0
+}
+
+cache_stats = {
+    "hits": 0,
+    "misses": 0,
+    "writes": 0,
+    "evicted": 0
+}
+
+_cache_lock = threading.Lock()
+
+# total size in bytes of the cache entries, counted on first use and kept up to date by cachePut and entry removals, so that cachePut does not walk the directory. None until counted. Entries written by other processes are counted when cacheEvict recounts
+_cache_size : Optional[int] = None
+
+# cache_config as set by the last applyCacheConfig, to tell explicit settings from configuration file ones
+_applied = dict(cache_config)
+
+# set by configureCache: its settings win over those of configuration files loaded later
+_configured = False
+
+def configureCache(
+        enabled : bool = False,
+        refresh : bool = False,
+        directory : str = "cache",
+        max_size_mb : float = 1024.0,
+        ttl_recent : Optional[float] = 600.0,
+        ttl_forecast : Optional[float] = None,
+        ttl_observed : Optional[float] = 604800.0,
+        recent_hours : float = 48.0):
+    """Sets the process-wide response cache parameters. They are kept when a configuration file is loaded later (see applyCacheConfig)
+
+    Args:
+        enabled (bool, optional): if False, responses are neither read from nor written to the cache. Defaults to False.
+        refresh (bool, optional): ignore cached responses but store the new ones. Defaults to False.
+        directory (str, optional): cache directory. Defaults to "cache".
+        max_size_mb (float, optional): total size above which least recently used entries are removed. Defaults to 1024.0.
+        ttl_recent (Optional[float], optional): seconds to keep responses whose period ends less than recent_hours ago (or later). Defaults to 600.0.
+        ttl_forecast (Optional[float], optional): seconds to keep past forecast runs. None keeps them forever. Defaults to None.
+        ttl_observed (Optional[float], optional): seconds to keep other (past observed) responses. None keeps them forever. Defaults to 604800.0 (one week).
+        recent_hours (float, optional): see ttl_recent. Defaults to 48.0.
+    """
+    global _cache_size, _configured
+    if max_size_mb <= 0:
+        raise ValueError("Parámetro de caché inválido: max_size_mb=%s" % max_size_mb)
+    with _cache_lock:
+        if directory != cache_config["directory"]:
+            _cache_size = None
+    cache_config.update({
+        "enabled": enabled,
+        "refresh": refresh,
+        "directory": directory,
+        "max_size_mb": max_size_mb,
+        "ttl_recent": ttl_recent,
+        "ttl_forecast": ttl_forecast,
+        "ttl_observed": ttl_observed,
+        "recent_hours": recent_hours
+    })
+    _configured = True
+
+def applyCacheConfig(settings : dict):
+    """Applies the "cache" settings of a configuration file under the explicit ones: nothing is applied after a configureCache call, and parameters changed directly in cache_config since the last applied configuration are kept
+
+    Args:
+        settings (dict): configureCache arguments
+    """
+    global _configured
+    if _configured:
+        return
+    overrides = {k: v for k, v in cache_config.items() if _applied.get(k) != v}
+    resolved = {**_applied, **settings}
+    configureCache(**{**resolved, **overrides})
+    _configured = False
+    _applied.update(resolved)
+
+def cacheKey(url : str, params : dict) -> str:
+    """Hash of url and params. Parameters set to None are left out and list values are sorted, so that equivalent requests share the key"""
+    normalized = {}
+    for key, value in params.items():
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple)):
+            value = sorted(str(v) for v in value)
+        normalized[key] = value
+    return hashlib.sha256(json.dumps([url, normalized], sort_keys=True, default=str).encode()).hexdigest()
+
+def cacheTtl(forecast : bool, timeend : Optional[datetime]) -> Optional[float]:
+    """Time to live in seconds of a response: ttl_recent if the requested period ends less than recent_hours before now (or later, or is open), else ttl_forecast for forecast runs and ttl_observed otherwise. None means no expiry
+
+    Args:
+        forecast (bool): the request selects forecast runs by forecast date
+        timeend (Optional[datetime]): end of the requested period (of the forecast dates, for forecast runs). Naive datetimes are taken as UTC
+    """
+    if timeend is not None and timeend.tzinfo is None:
+        timeend = timeend.replace(tzinfo=timezone.utc)
+    if timeend is None or timeend > datetime.now(timezone.utc) - timedelta(hours=cache_config["recent_hours"]):
+        return cache_config["ttl_recent"]
+    return cache_config["ttl_forecast"] if forecast else cache_config["ttl_observed"]
+
+def _path(key : str) -> str:
+    return os.path.join(cache_config["directory"], key[0:2], "%s.json.gz" % key)
+
+def cacheGet(url : str, params : dict) -> Optional[bytes]:
+    """Cached response body of the request, or None if caching is disabled, refresh is set, or there is no valid entry. Expired entries are removed"""
+    if not cache_config["enabled"] or cache_config["refresh"]:
+        return None
+    path = _path(cacheKey(url, params))
+    try:
+        with gzip.open(path, "rb") as f:
+            header = json.loads(f.readline())
+            if header["expires"] is not None and header["expires"] < time.time():
+                body = None
+            else:
+                body = f.read()
+    except FileNotFoundError:
+        body = None
+    except (OSError, EOFError, ValueError, KeyError) as e:
+        logger.warning("Entrada de caché inválida %s: %s" % (path, e))
+        body = None
+    if body is None:
+        _removeEntry(path)
+        with _cache_lock:
+            cache_stats["misses"] += 1
+        return None
+    # access time records last use, for LRU eviction
+    try:
+        os.utime(path, (time.time(), os.stat(path).st_mtime))
+    except FileNotFoundError:
+        pass
+    with _cache_lock:
+        cache_stats["hits"] += 1
+    logger.debug("Respuesta leída de caché: %s" % path)
+    return body
+
+def cachePut(url : str, params : dict, body : bytes, ttl : Optional[float] = None):
+    """Stores a response body (gzip-compressed, after a one-line JSON header with the request and expiry) and evicts least recently used entries above max_size_mb
+
+    Args:
+        url (str): request url
+        params (dict): request parameters
+        body (bytes): response body
+        ttl (Optional[float], optional): seconds until expiry. None means no expiry. Defaults to None.
+    """
+    if not cache_config["enabled"]:
+        return
+    path = _path(cacheKey(url, params))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    header = {
+        "url": url,
+        "params": params,
+        "created": time.time(),
+        "expires": time.time() + ttl if ttl is not None else None
+    }
+    # write to a temporary file and rename, so that concurrent readers never see partial entries
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as f:
+            f.write(json.dumps(header, default=str).encode())
+            f.write(b"\n")
+            f.write(body)
+        size = os.stat(tmp_path).st_size
+        with _cache_lock:
+            counted = _countedSize()
+            try:
+                replaced = os.stat(path).st_size
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp_path, path)
+            cache_stats["writes"] += 1
+            total = counted + size - replaced
+            _setSize(total)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if total > cache_config["max_size_mb"] * 1024 * 1024:
+        cacheEvict()
+
+def _countedSize() -> int:
+    """Total size of the entries, walking the cache directory only the first time. Call with _cache_lock held"""
+    global _cache_size
+    if _cache_size is None:
+        _cache_size = sum(stat.st_size for path, stat in _entries())
+    return _cache_size
+
+def _setSize(size : int):
+    global _cache_size
+    _cache_size = max(size, 0)
+
+def _removeEntry(path : str):
+    """Removes an entry, keeping the running size total"""
+    with _cache_lock:
+        try:
+            size = os.stat(path).st_size
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        if _cache_size is not None:
+            _setSize(_cache_size - size)
+
+def _entries():
+    for root, dirs, files in os.walk(cache_config["directory"]):
+        for name in files:
+            if name.endswith(".json.gz"):
+                path = os.path.join(root, name)
+                try:
+                    yield path, os.stat(path)
+                except FileNotFoundError:
+                    pass
+
+def cacheEvict(max_size_mb : Optional[float] = None) -> int:
+    """Removes least recently used entries until the cache fits in max_size_mb. Walks the cache directory, and recounts the running size total
+
+    Returns:
+        int: removed entries
+    """
+    max_size = (max_size_mb if max_size_mb is not None else cache_config["max_size_mb"]) * 1024 * 1024
+    with _cache_lock:
+        entries = sorted(_entries(), key=lambda entry: entry[1].st_atime)
+        total = sum(stat.st_size for path, stat in entries)
+        removed = 0
+        for path, stat in entries:
+            if total <= max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= stat.st_size
+            removed += 1
+        _setSize(total)
+        cache_stats["evicted"] += removed
+    if removed:
+        logger.debug("Se eliminaron %i entradas de caché" % removed)
+    return removed
+
+def clearCache() -> int:
+    """Removes every entry of the cache
+
+    Returns:
+        int: removed entries
+    """
+    return cacheEvict(0)
@@ -0,0 +1,146 @@
+from __future__ import annotations
+import logging
+from typing import Iterable, List, Optional, Sequence
+from .utils import lazyImport
+
+pd = lazyImport("pandas")
+
+logger = logging.getLogger(__name__)
+
+# Formatos columnares (Parquet, Arrow IPC) para exportaciones. pyarrow es una dependencia opcional: se importa sólo al usar estos formatos
+
+COLUMNAR_FORMATS = ("parquet", "arrow")
+
+# default dataset layout: <dir>/forecast_date=<...>/location_id=<...>/part-0.<ext>. Observed series go under forecast_date=__HIVE_DEFAULT_PARTITION__
+PARTITION_COLUMNS = ["forecast_date", "location_id"]
+
+def requirePyarrow():
+    """Imports pyarrow (with its dataset and parquet modules)
+
+    Raises:
+        ImportError: if pyarrow is not installed
+    """
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Los formatos %s requieren pyarrow (pip install pyarrow): %s" % (", ".join(COLUMNAR_FORMATS), e))
+    return pyarrow
+
+def valuesSchema(include_id : bool = False):
+    """Arrow schema of exported values: one row per value, with the header columns of its series. Times are UTC timestamps"""
+    pa = requirePyarrow()
+    columns = [
+        ("forecast_date", pa.timestamp("us", tz="UTC")),
+        ("location_id", pa.string()),
+        ("parameter_id", pa.string()),
+        ("qualifier_id", pa.string()),
+        ("timeseries_id", pa.int64()),
+        ("time", pa.timestamp("us", tz="UTC")),
+        ("value", pa.float64()),
+        ("flag", pa.int32()),
+        ("comment", pa.string())
+    ]
+    if include_id:
+        columns.append(("id", pa.int64()))
+    return pa.schema(columns)
+
+def _partitioning(schema, columns : Sequence[str]):
+    pa = requirePyarrow()
+    return pa.dataset.partitioning(pa.schema([schema.field(c) for c in columns]), flavor="hive")
+
+def _fileFormat(format : str):
+    pa = requirePyarrow()
+    if format == "parquet":
+        return pa.dataset.ParquetFileFormat()
+    elif format == "arrow":
+        return pa.dataset.IpcFileFormat()
+    raise ValueError("Formato columnar desconocido: %s" % format)
+
+def writeBatches(
+        batches : Iterable,
+        schema,
+        filename : Optional[str] = None,
+        dataset_dir : Optional[str] = None,
+        format : str = "parquet",
+        compression : Optional[str] = "zstd",
+        partitioning : Sequence[str] = PARTITION_COLUMNS) -> int:
+    """Writes record batches as they come into a Parquet or Arrow IPC file, or into a hive-partitioned dataset directory, so that the whole table is never held in memory
+
+    Args:
+        batches (Iterable[pyarrow.RecordBatch]): batches with the given schema
+        schema (pyarrow.Schema): schema of batches
+        filename (Optional[str], optional): output file. Defaults to None.
+        dataset_dir (Optional[str], optional): output dataset directory, used if filename is None. Existing files of the written partitions are overwritten. Defaults to None.
+        format (str, optional): parquet or arrow. Defaults to "parquet".
+        compression (Optional[str], optional): codec (zstd, lz4, and for parquet also snappy or gzip). None for no compression. Defaults to "zstd".
+        partitioning (Sequence[str], optional): partition columns of the dataset layout. Defaults to PARTITION_COLUMNS.
+
+    Returns:
+        int: written row count
+    """
+    pa = requirePyarrow()
+    if format not in COLUMNAR_FORMATS:
+        raise ValueError("Formato columnar desconocido: %s" % format)
+    count = 0
+    def counted(batches):
+        nonlocal count
+        for batch in batches:
+            count += batch.num_rows
+            yield batch
+    if filename is not None:
+        if format == "parquet":
+            with pa.parquet.ParquetWriter(filename, schema, compression=compression or "none") as writer:
+                for batch in counted(batches):
+                    writer.write_batch(batch)
+        else:
+            with pa.ipc.new_file(filename, schema, options=pa.ipc.IpcWriteOptions(compression=compression)) as writer:
+                for batch in counted(batches):
+                    writer.write_batch(batch)
+        logger.info("Se escribió el archivo %s (%i filas)" % (filename, count))
+    elif dataset_dir is not None:
+        file_format = _fileFormat(format)
+        pa.dataset.write_dataset(
+            counted(batches),
+            dataset_dir,
+            schema = schema,
+            format = file_format,
+            partitioning = _partitioning(schema, partitioning),
+            file_options = file_format.make_write_options(compression=compression) if format == "arrow" else file_format.make_write_options(compression=compression or "none"),
+            existing_data_behavior = "delete_matching"
+        )
+        logger.info("Se escribió el dataset %s (%i filas)" % (dataset_dir, count))
+    else:
+        raise ValueError("Falta filename o dataset_dir")
+    return count
+
+def writeFrame(
+        df : pd.DataFrame,
+        filename : Optional[str] = None,
+        dataset_dir : Optional[str] = None,
+        format : str = "parquet",
+        compression : Optional[str] = "zstd",
+        partitioning : Sequence[str] = PARTITION_COLUMNS) -> int:
+    """Writes a DataFrame with writeBatches. Column types are those of the DataFrame (see pyarrow.Table.from_pandas)"""
+    pa = requirePyarrow()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    return writeBatches(table.to_batches(), table.schema, filename, dataset_dir, format, compression, partitioning)
+
+def readFrame(path : str, format : str = "parquet", partitioning : Optional[List[str]] = PARTITION_COLUMNS, filter = None) -> pd.DataFrame:
+    """Reads a file or dataset directory written by writeBatches into a DataFrame. Partition columns are restored as UTC timestamps (forecast_date) or strings
+
+    Args:
+        path (str): file or dataset directory
+        format (str, optional): parquet or arrow. Defaults to "parquet".
+        partitioning (Optional[List[str]], optional): partition columns of a dataset directory. Defaults to PARTITION_COLUMNS.
+        filter (pyarrow.compute.Expression, optional): row filter, e.g. pyarrow.dataset.field("location_id") == "5862". Partition filters skip whole directories. Defaults to None.
+    """
+    pa = requirePyarrow()
+    partition_schema = pa.schema([(c, pa.timestamp("us", tz="UTC") if c == "forecast_date" else pa.string()) for c in partitioning or []])
+    dataset = pa.dataset.dataset(
+        path,
+        format = "ipc" if format == "arrow" else format,
+        partitioning = pa.dataset.partitioning(partition_schema, flavor="hive") if partitioning else None
+    )
+    return dataset.to_table(filter=filter).to_pandas()
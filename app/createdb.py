@@ -1,14 +1,21 @@
-import psycopg
-from psycopg import sql
 import logging
+import argparse
+import re
+from datetime import datetime, timezone
 
-from .utils import loadConfig
+from .utils import LazyConfig, DEFAULT_CONFIG_PATH, lazyImport
+
+psycopg = lazyImport("psycopg")
+sql = lazyImport("psycopg.sql")
 
 logger = logging.getLogger(__name__)
 
-config_path = "config/config.json"
+config_path = DEFAULT_CONFIG_PATH
+
+# read on first use (see app.utils.LazyConfig)
+config = LazyConfig()
 
-config = loadConfig(config_path)
+SENTINEL = datetime(1900, 1, 1, tzinfo=timezone.utc)
 
 def createDb():
     with psycopg.connect(config["admin_dsn"], autocommit=True) as conn:
@@ -38,12 +45,241 @@ def createTables():
             )
             with open("schema.sql", "r", encoding="utf-8") as f:
                 cur.execute(f.read())
+            with open("schema_partitioned.sql", "r", encoding="utf-8") as f:
+                cur.execute(f.read())
+            with open("schema_packed.sql", "r", encoding="utf-8") as f:
+                cur.execute(f.read())
+
+        conn.commit()
+
+def createPacked():
+    """Creates the timeseries_packed table and the timeseries_values_all view (see schema_packed.sql) in an existing database"""
+    with psycopg.connect(config["user_dsn"]) as conn:
+        with conn.cursor() as cur:
+            with open("schema_packed.sql", "r", encoding="utf-8") as f:
+                cur.execute(f.read())
+        conn.commit()
+    logger.info("timeseries_packed y timeseries_values_all creadas")
+
+def isPartitioned(cur) -> bool:
+    cur.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'timeseries_values'::regclass")
+    return cur.fetchone() is not None
+
+def partitionValues(interval : str = "month"):
+    """Converts timeseries_values into a table partitioned by time range (one partition per month or year, plus a default partition), moving the existing rows. Reads and upserts are unaffected: the (series_id, time) unique key is kept. Does nothing if it is already partitioned
+
+    Args:
+        interval (str, optional): month or year. Defaults to "month".
+    """
+    with psycopg.connect(config["user_dsn"]) as conn:
+        with conn.cursor() as cur:
+            with open("schema_partitioned.sql", "r", encoding="utf-8") as f:
+                cur.execute(f.read())
+            if isPartitioned(cur):
+                logger.info("timeseries_values ya está particionada")
+                return
+            cur.execute("LOCK TABLE timeseries_values IN ACCESS EXCLUSIVE MODE")
+            cur.execute("""
+                ALTER TABLE timeseries_values RENAME TO timeseries_values_unpartitioned;
+                ALTER TABLE timeseries_values_unpartitioned RENAME CONSTRAINT timeseries_values_pkey TO timeseries_values_unpartitioned_pkey;
+                ALTER TABLE timeseries_values_unpartitioned RENAME CONSTRAINT timeseries_values_series_id_time_key TO timeseries_values_unpartitioned_series_id_time_key;
+                CREATE TABLE timeseries_values (
+                    id BIGINT NOT NULL DEFAULT nextval('timeseries_values_id_seq'),
+
+                    series_id   BIGINT NOT NULL REFERENCES timeseries(id) ON DELETE CASCADE,
+                    time        TIMESTAMPTZ NOT NULL,
+                    value       DOUBLE PRECISION NOT NULL,
+                    flag        INTEGER,
+                    comment     TEXT,
+
+                    PRIMARY KEY (id, time),
+                    UNIQUE (series_id, time)
+                ) PARTITION BY RANGE (time);
+                CREATE TABLE timeseries_values_default PARTITION OF timeseries_values DEFAULT;
+                ALTER SEQUENCE timeseries_values_id_seq OWNED BY timeseries_values.id;
+            """)
+            cur.execute("SELECT min(time), max(time) FROM timeseries_values_unpartitioned")
+            timestart, timeend = cur.fetchone()
+            if timestart is not None:
+                cur.execute("SELECT timeseries_values_ensure_partitions(%s, %s, %s)", (timestart, timeend, interval))
+                logger.info("Se crearon %i particiones" % cur.fetchone()[0])
+            cur.execute("""
+                INSERT INTO timeseries_values (id, series_id, time, value, flag, comment)
+                SELECT id, series_id, time, value, flag, comment
+                FROM timeseries_values_unpartitioned
+            """)
+            logger.info("Se movieron %i filas" % cur.rowcount)
+            # the timeseries_values_all view follows the renamed table: point it to the new one before dropping
+            with open("schema_packed.sql", "r", encoding="utf-8") as f:
+                cur.execute(f.read())
+            cur.execute("DROP TABLE timeseries_values_unpartitioned")
+        conn.commit()
+    logger.info("timeseries_values particionada por %s" % interval)
+
+def partition_range(name : str):
+    """(lower, upper) UTC bounds of a partition created by timeseries_values_ensure_partitions, from its name, or None for other tables"""
+    match = re.fullmatch(r"timeseries_values_p(\d{4})(\d{2})?", name)
+    if match is None:
+        return None
+    year = int(match.group(1))
+    if match.group(2) is None:
+        return datetime(year, 1, 1, tzinfo=timezone.utc), datetime(year + 1, 1, 1, tzinfo=timezone.utc)
+    month = int(match.group(2))
+    return datetime(year, month, 1, tzinfo=timezone.utc), datetime(year + month // 12, month % 12 + 1, 1, tzinfo=timezone.utc)
+
+def hasPacked(cur) -> bool:
+    cur.execute("SELECT to_regclass('timeseries_packed') IS NOT NULL")
+    return cur.fetchone()[0]
+
+def pruneChunks(cur, before : datetime, keep_observed : bool = True, detach_only : bool = False) -> int:
+    """Deletes the chunks of timeseries_packed whose last timestep is earlier than before, in one set-based statement. Chunks of observed series are kept unless keep_observed is False. With detach_only they are moved into timeseries_packed_detached instead
 
+    Returns:
+        int: removed chunks
+    """
+    conditions = "p.start_time + (array_length(p.value_array, 1) - 1) * p.timestep < %s"
+    params = [before]
+    if keep_observed:
+        conditions += " AND p.series_id IN (SELECT id FROM timeseries WHERE forecast_date <> %s)"
+        params.append(SENTINEL)
+    if detach_only:
+        cur.execute("CREATE TABLE IF NOT EXISTS timeseries_packed_detached (LIKE timeseries_packed INCLUDING DEFAULTS)")
+        cur.execute("WITH moved AS (DELETE FROM timeseries_packed p WHERE " + conditions + " RETURNING p.*) INSERT INTO timeseries_packed_detached SELECT * FROM moved", params)
+    else:
+        cur.execute("DELETE FROM timeseries_packed p WHERE " + conditions, params)
+    logger.info("timeseries_packed: %i tramos %s" % (cur.rowcount, "movidos a timeseries_packed_detached" if detach_only else "eliminados"))
+    return cur.rowcount
+
+def hasForecastRows(cur, name : str) -> bool:
+    """Whether the partition name holds values of forecast series (forecast_date other than '1900-01-01')"""
+    cur.execute(
+        sql.SQL("SELECT EXISTS (SELECT 1 FROM {} v JOIN timeseries t ON t.id = v.series_id WHERE t.forecast_date <> %s)").format(sql.Identifier(name)),
+        (SENTINEL,))
+    return cur.fetchone()[0]
+
+def detachedName(cur, name : str) -> str:
+    """<name>_detached, or <name>_detached_<n> if tables kept by earlier retention runs already use that name"""
+    detached = "%s_detached" % name
+    n = 1
+    while True:
+        cur.execute("SELECT to_regclass(%s) IS NOT NULL", (detached,))
+        if not cur.fetchone()[0]:
+            return detached
+        n += 1
+        detached = "%s_detached_%i" % (name, n)
+
+def applyRetention(before : datetime, keep_observed : bool = True, detach_only : bool = False) -> list:
+    """Removes the partitions of timeseries_values lying entirely before a date, with DETACH/DROP instead of row DELETEs. Observed values (forecast_date = '1900-01-01') of those partitions are copied into a fresh partition for the same range unless keep_observed is False, and partitions holding only observed values (such as those left by earlier runs) are skipped. Chunks of timeseries_packed lying entirely before the date are removed too (see pruneChunks)
+
+    Args:
+        before (datetime): partitions whose upper bound is not later than this are removed
+        keep_observed (bool, optional): keep observed values. Defaults to True.
+        detach_only (bool, optional): keep the detached partitions as standalone tables named <partition>_detached, or <partition>_detached_<n> if taken (and the removed chunks in timeseries_packed_detached) instead of dropping them. Defaults to False.
+
+    Returns:
+        list: removed partition names
+    """
+    removed = []
+    with psycopg.connect(config["user_dsn"]) as conn:
+        with conn.cursor() as cur:
+            partitioned = isPartitioned(cur)
+            packed = hasPacked(cur)
+            if not partitioned and not packed:
+                raise ValueError("timeseries_values no está particionada. Ejecute 'python -m app.createdb partition'")
+            if partitioned:
+                cur.execute("""
+                    SELECT c.relname
+                    FROM pg_inherits i
+                    JOIN pg_class c ON c.oid = i.inhrelid
+                    WHERE i.inhparent = 'timeseries_values'::regclass
+                    ORDER BY c.relname
+                """)
+                for (name,) in cur.fetchall():
+                    bounds = partition_range(name)
+                    if bounds is None or bounds[1] > before:
+                        continue
+                    if keep_observed and not hasForecastRows(cur, name):
+                        continue
+                    detached = detachedName(cur, name)
+                    cur.execute(sql.SQL("ALTER TABLE timeseries_values DETACH PARTITION {}").format(sql.Identifier(name)))
+                    cur.execute(sql.SQL("ALTER TABLE {} RENAME TO {}").format(sql.Identifier(name), sql.Identifier(detached)))
+                    if keep_observed:
+                        interval = "month" if len(name) == len("timeseries_values_pYYYYMM") else "year"
+                        cur.execute("SELECT timeseries_values_ensure_partitions(%s, %s, %s)", (bounds[0], bounds[0], interval))
+                        cur.execute(
+                            sql.SQL("""
+                                INSERT INTO timeseries_values (id, series_id, time, value, flag, comment)
+                                SELECT v.id, v.series_id, v.time, v.value, v.flag, v.comment
+                                FROM {} v
+                                JOIN timeseries t ON t.id = v.series_id
+                                WHERE t.forecast_date = %s
+                            """).format(sql.Identifier(detached)),
+                            (SENTINEL,))
+                        logger.info("%s: se conservaron %i valores observados" % (name, cur.rowcount))
+                    if not detach_only:
+                        cur.execute(sql.SQL("DROP TABLE {}").format(sql.Identifier(detached)))
+                    logger.info("Partición %s %s" % (name, "desvinculada como %s" % detached if detach_only else "eliminada"))
+                    removed.append(name)
+            if packed:
+                pruneChunks(cur, before, keep_observed, detach_only)
         conn.commit()
+    return removed
 
 def bootstrapDb():
     createDb()
     createTables()
+    partitioning = config.get("partitioning", {})
+    if partitioning.get("enabled"):
+        partitionValues(partitioning.get("interval", "month"))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Crea la base de datos y administra el particionado de timeseries_values")
+    parser.add_argument(
+        "action",
+        nargs="?",
+        choices=["bootstrap", "partition", "retention", "packed"],
+        default="bootstrap",
+        help="bootstrap: create database and tables (default). partition: convert timeseries_values into a time-partitioned table. retention: remove partitions older than --before. packed: create the packed storage table and view in an existing database"
+    )
+    parser.add_argument(
+        "--interval",
+        choices=["month", "year"],
+        default=config.get("partitioning", {}).get("interval", "month"),
+        help="Partition range with 'partition'. Default: month"
+    )
+    parser.add_argument(
+        "--before",
+        type=lambda s: datetime.fromisoformat(s).replace(tzinfo=timezone.utc),
+        help="With 'retention', remove partitions lying entirely before this date (YYYY-MM-DD, UTC). Default: now minus partitioning.retention_months of config"
+    )
+    parser.add_argument(
+        "--drop-observed",
+        action="store_true",
+        help="With 'retention', also remove observed values (and packed observed chunks)"
+    )
+    parser.add_argument(
+        "--detach-only",
+        action="store_true",
+        help="With 'retention', keep detached partitions as standalone tables"
+    )
+    return parser.parse_args()
 
 if __name__ == '__main__':
-    bootstrapDb()
\ No newline at end of file
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args()
+    if args.action == "bootstrap":
+        bootstrapDb()
+    elif args.action == "partition":
+        partitionValues(args.interval)
+    elif args.action == "packed":
+        createPacked()
+    elif args.action == "retention":
+        before = args.before
+        if before is None:
+            months = config.get("partitioning", {}).get("retention_months")
+            if months is None:
+                raise ValueError("Falta --before o partitioning.retention_months en config")
+            now = datetime.now(timezone.utc)
+            month_index = now.year * 12 + now.month - 1 - months
+            before = datetime(month_index // 12, month_index % 12 + 1, 1, tzinfo=timezone.utc)
+        applyRetention(before, keep_observed = not args.drop_observed, detach_only = args.detach_only)
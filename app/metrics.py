@@ -0,0 +1,173 @@
+from __future__ import annotations
+import argparse
+import logging
+import sys
+from datetime import datetime
+from typing import List, Optional, Sequence
+import numpy as np
+import pandas as pd
+from .utils import configureLogging
+
+logger = logging.getLogger(__name__)
+
+# Indicadores de eficiencia de pronósticos sobre series emparejadas (obs, sim)
+
+METRICS = ["n", "nse", "kge", "kge_r", "kge_alpha", "kge_beta", "rmse", "mae", "bias", "pbias", "pearson", "spearman"]
+
+def compute_metrics(
+    df : pd.DataFrame,
+    by : Sequence[str] = ("station", "lead_time"),
+    lead_time_freq : Optional[str] = None,
+    min_count : int = 2
+) -> pd.DataFrame:
+    """Computes efficiency indicators of sim against obs for every group of df, vectorized over all groups at once. Rows where obs or sim is NaN are ignored
+
+    Args:
+        df (pd.DataFrame): paired data with columns obs, sim and the columns of by. If by includes lead_time and df lacks it, it is computed as time - forecast_date
+        by (Sequence[str], optional): grouping columns. Defaults to ("station", "lead_time").
+        lead_time_freq (Optional[str], optional): floor lead times to this frequency (e.g. "1D") before grouping. Defaults to None.
+        min_count (int, optional): groups with fewer valid pairs get NaN indicators. Defaults to 2.
+
+    Returns:
+        pd.DataFrame: one row per group with columns by + METRICS
+    """
+    by = list(by)
+    if "lead_time" in by and "lead_time" not in df.columns:
+        df = df.assign(lead_time = pd.to_datetime(df["time"], utc=True) - pd.to_datetime(df["forecast_date"], utc=True))
+    if lead_time_freq is not None and "lead_time" in by:
+        df = df.assign(lead_time = pd.to_timedelta(df["lead_time"]).dt.floor(lead_time_freq))
+
+    grouped = df.groupby(by, sort=True, dropna=False)
+    codes = grouped.ngroup().to_numpy()
+    keys = grouped.size().index.to_frame(index=False)
+    n_groups = len(keys)
+
+    o = df["obs"].to_numpy(dtype=np.float64)
+    s = df["sim"].to_numpy(dtype=np.float64)
+    valid = np.isfinite(o) & np.isfinite(s)
+    codes, o, s = codes[valid], o[valid], s[valid]
+
+    def gsum(x):
+        return np.bincount(codes, weights=x, minlength=n_groups)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        n = np.bincount(codes, minlength=n_groups).astype(np.float64)
+        sum_o = gsum(o)
+        sum_s = gsum(s)
+        mean_o = sum_o / n
+        mean_s = sum_s / n
+        # centered second moments (two-pass, numerically stable)
+        do = o - mean_o[codes]
+        ds = s - mean_s[codes]
+        var_o = gsum(do * do) / n
+        var_s = gsum(ds * ds) / n
+        cov = gsum(do * ds) / n
+        err = s - o
+        sse = gsum(err * err)
+        std_o = np.sqrt(var_o)
+        std_s = np.sqrt(var_s)
+
+        pearson = cov / (std_o * std_s)
+        alpha = std_s / std_o
+        beta = mean_s / mean_o
+        result = {
+            "n": n,
+            "nse": 1 - sse / (var_o * n),
+            "kge": 1 - np.sqrt((pearson - 1) ** 2 + (alpha - 1) ** 2 + (beta - 1) ** 2),
+            "kge_r": pearson,
+            "kge_alpha": alpha,
+            "kge_beta": beta,
+            "rmse": np.sqrt(sse / n),
+            "mae": gsum(np.abs(err)) / n,
+            "bias": gsum(err) / n,
+            "pbias": 100 * gsum(err) / sum_o,
+            "pearson": pearson,
+            "spearman": _grouped_pearson(
+                codes,
+                pd.Series(o).groupby(codes).rank().to_numpy(),
+                pd.Series(s).groupby(codes).rank().to_numpy(),
+                n_groups)
+        }
+
+    metrics = pd.DataFrame(result)
+    metrics.loc[n < min_count, METRICS[1:]] = np.nan
+    metrics["n"] = n.astype(np.int64)
+    return pd.concat([keys, metrics], axis=1)
+
+def _grouped_pearson(codes : np.ndarray, x : np.ndarray, y : np.ndarray, n_groups : int) -> np.ndarray:
+    n = np.bincount(codes, minlength=n_groups)
+    mean_x = np.bincount(codes, weights=x, minlength=n_groups) / n
+    mean_y = np.bincount(codes, weights=y, minlength=n_groups) / n
+    dx = x - mean_x[codes]
+    dy = y - mean_y[codes]
+    return np.bincount(codes, weights=dx * dy, minlength=n_groups) / np.sqrt(
+        np.bincount(codes, weights=dx * dx, minlength=n_groups) * np.bincount(codes, weights=dy * dy, minlength=n_groups))
+
+def read_pairs(
+    mapping : pd.DataFrame,
+    forecast_dates : List[datetime],
+    obs_parameterId : str = "Q.obs",
+    sim_parameterId : str = "Q.sim"
+) -> pd.DataFrame:
+    """Reads paired obs/sim data from the database for every (obs, sim) row of mapping and every forecast date (see Timeseries.read_paired_many)
+
+    Returns:
+        pd.DataFrame: columns station, sim_location, forecast_date, time, obs, sim
+    """
+    from .accessor import Timeseries
+    return Timeseries.read_paired_many(mapping, forecast_dates, obs_parameterId, sim_parameterId)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Calcula indicadores de eficiencia (NSE, KGE, RMSE, MAE, sesgo, PBIAS, Pearson, Spearman) de pronósticos emparejados con observaciones, por estación y anticipación")
+    parser.add_argument(
+        "--input",
+        nargs="*",
+        help="CSV file(s) of paired data with columns station, forecast_date, time, obs, sim. If not set, paired data is read from the database using --mapping-file and --forecast-date"
+    )
+    parser.add_argument(
+        "--mapping-file",
+        default="static/mgb_map.csv",
+        help="obs,sim,name station mapping. Default: static/mgb_map.csv"
+    )
+    parser.add_argument(
+        "--forecast-date",
+        type=datetime.fromisoformat,
+        nargs="*",
+        help="Forecast date(s), YYYY-MM-DD or YYYY-MM-DDTHH:MM"
+    )
+    parser.add_argument(
+        "--by",
+        nargs="+",
+        default=["station", "lead_time"],
+        help="Grouping columns. Default: station lead_time"
+    )
+    parser.add_argument(
+        "--lead-time-freq",
+        default=None,
+        help="Floor lead times to this frequency before grouping, e.g. 1D"
+    )
+    parser.add_argument(
+        "--min-count",
+        type=int,
+        default=2,
+        help="Minimum valid pairs per group. Default: 2"
+    )
+    parser.add_argument(
+        "--output",
+        help="Output CSV file. If not set, writes to stdout"
+    )
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    # the metrics table may go to stdout
+    configureLogging(logging.INFO, sys.stderr)
+    args = parse_args()
+    if args.input:
+        df = pd.concat([pd.read_csv(f) for f in args.input], ignore_index=True)
+    else:
+        if not args.forecast_date:
+            raise ValueError("Debe utilizar la opción --input o --forecast-date")
+        df = read_pairs(pd.read_csv(args.mapping_file), args.forecast_date)
+    logger.info("Se leyeron %i pares" % len(df))
+    metrics = compute_metrics(df, args.by, args.lead_time_freq, args.min_count)
+    metrics.to_csv(args.output if args.output is not None else sys.stdout, index=False)
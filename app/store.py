@@ -0,0 +1,330 @@
+from __future__ import annotations
+import os
+import json
+import uuid
+import shutil
+import logging
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Iterator, List, Optional, Union
+import numpy as np
+import pandas as pd
+
+from .accessor import Timeseries, TimeseriesValues, TimeseriesKey, Location, SENTINEL, config, merge_values
+from .utils import configureLogging
+
+logger = logging.getLogger(__name__)
+
+# Almacén local de series: arreglos time/value/flag por serie en archivos .npy (leídos con memory-map) y un catálogo catalog.json con los encabezados
+
+CATALOG_FILE = "catalog.json"
+
+class SeriesStore:
+    """File-based columnar store of timeseries. Each series is kept as time (datetime64[ns], UTC, sorted), value (float64), flag (int64) and optional flag_mask (bool) .npy files plus sparse comments, under series/<id>.<version>/ of directory, and described in catalog.json. Reads memory-map the arrays and slice them by time range without copying.
+
+    A store has a single writer: every write replaces the files of the series in a new version directory and then the catalog, so concurrent readers keep seeing a consistent version
+    """
+
+    def __init__(self, directory : str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._catalog = None
+        self._catalog_mtime = None
+
+    def _catalog_path(self) -> str:
+        return os.path.join(self.directory, CATALOG_FILE)
+
+    def catalog(self) -> dict:
+        """Catalog contents: {"next_id": int, "series": {id: header}}. Reloaded when the file changes"""
+        path = self._catalog_path()
+        if not os.path.exists(path):
+            return {"next_id": 1, "series": {}}
+        mtime = os.stat(path).st_mtime_ns
+        if self._catalog is None or mtime != self._catalog_mtime:
+            with open(path, "r", encoding="utf-8") as f:
+                self._catalog = json.load(f)
+            self._catalog_mtime = mtime
+        return self._catalog
+
+    def _write_catalog(self, catalog : dict):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = "%s.%s.tmp" % (self._catalog_path(), uuid.uuid4().hex)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(catalog, f, indent=2)
+        os.replace(tmp_path, self._catalog_path())
+        self._catalog = None
+
+    @staticmethod
+    def _key(locationId : str, parameterId : str, qualifierId : Optional[str], forecastDate : Optional[datetime]) -> str:
+        return json.dumps([locationId, parameterId, qualifierId or "", (forecastDate or SENTINEL).astimezone(timezone.utc).isoformat()])
+
+    def write(self, ts_list : Iterable[Timeseries]) -> int:
+        """Stores series, merging with stored values of the same series (location, parameter, qualifier, forecast date): values at already stored times are replaced, as in the database upsert
+
+        Args:
+            ts_list (Iterable[Timeseries]): series to store. May be a generator (see Timeseries.from_api_stream)
+
+        Returns:
+            int: number of values written, not counting missing ones
+        """
+        count = 0
+        series = 0
+        with self._lock:
+            catalog = json.loads(json.dumps(self.catalog()))
+            by_key = {header["key"]: series_id for series_id, header in catalog["series"].items()}
+            obsolete = []
+            for ts in ts_list:
+                key = self._key(ts.locationId, ts.parameterId, ts.qualifierId, ts.forecastDate)
+                series_id = by_key.get(key)
+                if series_id is None:
+                    series_id = str(catalog["next_id"])
+                    catalog["next_id"] += 1
+                    by_key[key] = series_id
+                    previous = None
+                else:
+                    previous = catalog["series"][series_id]
+                values = ts.values if ts.values is not None else TimeseriesValues()
+                if previous is not None and previous["length"]:
+                    values = merge_values(self._load(series_id, previous), values)
+                path = "series/%s.%s" % (series_id, uuid.uuid4().hex[0:8])
+                self._save(path, values)
+                if previous is not None:
+                    obsolete.append(previous["path"])
+                catalog["series"][series_id] = {
+                    "key": key,
+                    "path": path,
+                    "locationId": ts.locationId,
+                    "parameterId": ts.parameterId,
+                    "qualifierId": ts.qualifierId or "",
+                    "forecastDate": ts.forecastDate.isoformat() if ts.forecastDate is not None else None,
+                    "timestep": ts.timestep.total_seconds() if ts.timestep is not None else None,
+                    "units": ts.units,
+                    "location": {
+                        "stationName": ts.location.stationName,
+                        "lat": ts.location.lat,
+                        "lon": ts.location.lon
+                    } if ts.location is not None else (previous or {}).get("location"),
+                    "time_zone": values.time_zone,
+                    "length": len(values),
+                    "timestart": str(values.time[0]) if len(values) else None,
+                    "timeend": str(values.time[-1]) if len(values) else None
+                }
+                # missing values (NaN) are not counted, as in the database
+                count += int(np.count_nonzero(~np.isnan(ts.values.value))) if ts.values is not None else 0
+                series += 1
+            self._write_catalog(catalog)
+            # readers of the previous version keep their open memory maps
+            for path in obsolete:
+                shutil.rmtree(os.path.join(self.directory, path), ignore_errors=True)
+        logger.info("Se guardaron %i series temporales, %i valores en %s" % (series, count, self.directory))
+        return count
+
+    def _save(self, path : str, values : TimeseriesValues):
+        directory = os.path.join(self.directory, path)
+        os.makedirs(directory)
+        np.save(os.path.join(directory, "time.npy"), values.time)
+        np.save(os.path.join(directory, "value.npy"), values.value)
+        np.save(os.path.join(directory, "flag.npy"), values.flag)
+        if values.flag_mask is not None and values.flag_mask.any():
+            np.save(os.path.join(directory, "flag_mask.npy"), values.flag_mask)
+        if len(values.comments):
+            with open(os.path.join(directory, "comments.json"), "w", encoding="utf-8") as f:
+                json.dump({str(i): c for i, c in values.comments.items()}, f)
+
+    def _load(self, series_id : str, header : dict, timestart : Optional[datetime] = None, timeend : Optional[datetime] = None) -> TimeseriesValues:
+        """Memory-mapped values of a series, sliced to [timestart, timeend] (views, no copy)"""
+        directory = os.path.join(self.directory, header["path"])
+        time = np.load(os.path.join(directory, "time.npy"), mmap_mode="r")
+        start = 0 if timestart is None else int(np.searchsorted(time, _datetime64(timestart), side="left"))
+        end = len(time) if timeend is None else int(np.searchsorted(time, _datetime64(timeend), side="right"))
+        flag_mask_path = os.path.join(directory, "flag_mask.npy")
+        comments = {}
+        if os.path.exists(os.path.join(directory, "comments.json")):
+            with open(os.path.join(directory, "comments.json"), "r", encoding="utf-8") as f:
+                comments = {int(i) - start: c for i, c in json.load(f).items() if start <= int(i) < end}
+        return TimeseriesValues(
+            time = time[start:end],
+            value = np.load(os.path.join(directory, "value.npy"), mmap_mode="r")[start:end],
+            flag = np.load(os.path.join(directory, "flag.npy"), mmap_mode="r")[start:end],
+            flag_mask = np.load(flag_mask_path, mmap_mode="r")[start:end] if os.path.exists(flag_mask_path) else None,
+            comments = comments,
+            timeseries_id = int(series_id),
+            time_zone = header["time_zone"]
+        )
+
+    def read(
+        self,
+        locationId : Union[str,List[str],None] = None,
+        parameterId : Union[str,List[str],None] = None,
+        timestep : Optional[timedelta] = None,
+        units : Optional[str] = None,
+        qualifierId : Union[str,List[str],None] = None,
+        forecastDate : Optional[datetime] = None,
+        id : Optional[int] = None,
+        timestart : Optional[datetime] = None,
+        timeend : Optional[datetime] = None,
+        metadata_only : bool = False) -> Iterator[Timeseries]:
+        """Same filters and result as Timeseries.read. Timeseries ids are those of the store. Values are memory-mapped views"""
+        def as_list(v):
+            return [v] if type(v) == str else v
+        locationIds = as_list(locationId)
+        parameterIds = as_list(parameterId)
+        qualifierIds = as_list(qualifierId)
+        for series_id, header in sorted(self.catalog()["series"].items(), key=lambda item: int(item[0])):
+            if id is not None and int(series_id) != id:
+                continue
+            if locationIds is not None and header["locationId"] not in locationIds:
+                continue
+            if parameterIds is not None and header["parameterId"] not in parameterIds:
+                continue
+            if qualifierIds is not None and header["qualifierId"] not in qualifierIds:
+                continue
+            if forecastDate is not None and (header["forecastDate"] is None or datetime.fromisoformat(header["forecastDate"]) != forecastDate):
+                continue
+            if timestep is not None and header["timestep"] != timestep.total_seconds():
+                continue
+            if units is not None and header["units"] != units:
+                continue
+            ts = Timeseries(
+                locationId = header["locationId"],
+                parameterId = header["parameterId"],
+                timestep = timedelta(seconds=header["timestep"]) if header["timestep"] is not None else None,
+                units = header["units"],
+                qualifierId = header["qualifierId"] if header["qualifierId"] != "" else None,
+                forecastDate = datetime.fromisoformat(header["forecastDate"]) if header["forecastDate"] is not None else None,
+                location = Location(locationId = header["locationId"], **header["location"]) if header["location"] is not None else None,
+                id = int(series_id)
+            )
+            if not metadata_only:
+                ts.values = self._load(series_id, header, timestart, timeend) if header["length"] else TimeseriesValues(timeseries_id=int(series_id))
+            yield ts
+
+    def read_one(
+        self,
+        locationId : str,
+        parameterId : str,
+        qualifierId : str = "",
+        forecastDate : Optional[datetime] = None,
+        timestart : Optional[datetime] = None,
+        timeend : Optional[datetime] = None,
+        metadata_only : bool = False) -> Timeseries:
+        ts = next(self.read(locationId=locationId, parameterId=parameterId, qualifierId=qualifierId, forecastDate=forecastDate, timestart=timestart, timeend=timeend, metadata_only=metadata_only), None)
+        if ts is None:
+            raise ValueError("Timeseries not found")
+        return ts
+
+    def read_paired(
+        self,
+        obs_key : TimeseriesKey,
+        sim_key : TimeseriesKey,
+        timestart : Optional[datetime] = None,
+        timeend : Optional[datetime] = None,
+        obs_flag : Optional[int] = None,
+        sim_flag : Optional[int] = None) -> pd.DataFrame:
+        """Same result as Timeseries.read_paired: simulated values in [timestart, timeend) with the observed value at the same time (NaN if missing)"""
+        obs = self.read_one(**obs_key).values
+        sim = self.read_one(**sim_key, timestart=timestart).values
+        keep = np.ones(len(sim), dtype=bool)
+        if timeend is not None:
+            keep &= sim.time < _datetime64(timeend)
+        if sim_flag is not None:
+            keep &= sim.flag == sim_flag
+            if sim.flag_mask is not None:
+                keep &= ~sim.flag_mask
+        index = np.searchsorted(obs.time, sim.time).clip(0, max(len(obs) - 1, 0))
+        found = obs.time[index] == sim.time if len(obs) else np.zeros(len(sim), dtype=bool)
+        if obs_flag is not None:
+            if len(obs):
+                found &= obs.flag[index] == obs_flag
+                if obs.flag_mask is not None:
+                    found &= ~obs.flag_mask[index]
+            keep &= found
+        return pd.DataFrame({
+            "time": pd.DatetimeIndex(sim.time[keep], tz="UTC"),
+            "obs": np.where(found, obs.value[index] if len(obs) else np.nan, np.nan)[keep],
+            "sim": sim.value[keep]
+        })
+
+    def populate(self, **kwargs) -> int:
+        """Copies the series selected by kwargs (see Timeseries.read) from the database
+
+        Returns:
+            int: number of values written
+        """
+        count = 0
+        batch = []
+        for ts in Timeseries.read_db(**kwargs):
+            batch.append(ts)
+            if len(batch) >= 100:
+                count += self.write(batch)
+                batch = []
+        if len(batch):
+            count += self.write(batch)
+        return count
+
+def _datetime64(t : datetime) -> np.datetime64:
+    if t.tzinfo is not None:
+        t = t.astimezone(timezone.utc).replace(tzinfo=None)
+    return np.datetime64(t, "ns")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Almacén local de series (arreglos con memory-map y catálogo), alternativo a la base de datos para lecturas")
+    parser.add_argument(
+        "action",
+        choices=["populate", "ingest", "list"],
+        help="populate: copy series from the database. ingest: store series of PI_JSON files (e.g. written by 'python -m app.accessor get --output'). list: print the catalog"
+    )
+    parser.add_argument(
+        "--store",
+        default=config.get("store", {}).get("directory", "data/store"),
+        help="Store directory. Default: store.directory of config (data/store)"
+    )
+    parser.add_argument(
+        "--input",
+        nargs="*",
+        help="With 'ingest', PI_JSON file(s)"
+    )
+    parser.add_argument(
+        "--location-id",
+        nargs="*",
+        help="With 'populate', only series of this location(s)"
+    )
+    parser.add_argument(
+        "--parameter-id",
+        nargs="*",
+        help="With 'populate', only series of this parameter(s)"
+    )
+    parser.add_argument(
+        "--forecast-date",
+        type=datetime.fromisoformat,
+        help="With 'populate', only series of this forecast date (YYYY-MM-DDTHH:MM+00:00)"
+    )
+    parser.add_argument(
+        "--timestart",
+        type=datetime.fromisoformat,
+        help="With 'populate', only values from this date"
+    )
+    parser.add_argument(
+        "--timeend",
+        type=datetime.fromisoformat,
+        help="With 'populate', only values until this date"
+    )
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    configureLogging()
+    store = SeriesStore(args.store)
+    if args.action == "populate":
+        count = store.populate(locationId=args.location_id, parameterId=args.parameter_id, forecastDate=args.forecast_date, timestart=args.timestart, timeend=args.timeend)
+        logger.info("Se copiaron %i valores" % count)
+    elif args.action == "ingest":
+        if not args.input:
+            raise ValueError("Falta --input")
+        for filename in args.input:
+            with open(filename, "r", encoding="utf-8") as f:
+                store.write(Timeseries.from_api_response(json.load(f)))
+    elif args.action == "list":
+        for series_id, header in sorted(store.catalog()["series"].items(), key=lambda item: int(item[0])):
+            print("%s\t%s\t%s\t%s\t%s\t%i\t%s\t%s" % (series_id, header["locationId"], header["parameterId"], header["qualifierId"], header["forecastDate"], header["length"], header["timestart"], header["timeend"]))
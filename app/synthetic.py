@@ -0,0 +1,104 @@
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta
+from typing import List, Optional
+import numpy as np
+
+# Generador determinístico de respuestas PI_JSON (GetTimeseriesResponse) sintéticas, para pruebas y benchmarks sin API ni base de datos
+
+MISS_VAL = "-999.0"
+
+def synthetic_response(
+        n_series : int = 10,
+        n_events : int = 1000,
+        miss_density : float = 0.0,
+        time_zone : float = -3.0,
+        timestep : timedelta = timedelta(hours=3),
+        forecast_date : Optional[datetime] = datetime(2026, 2, 13),
+        start : Optional[datetime] = None,
+        seed : int = 0,
+        location_ids : Optional[List[str]] = None,
+        parameter_id : Optional[str] = None) -> dict:
+    """Builds a GetTimeseriesResponse like those of FEWS PI_JSON /timeseries. The same arguments always give the same document
+
+    Args:
+        n_series (int, optional): number of series (one location each). Defaults to 10.
+        n_events (int, optional): events per series. Defaults to 1000.
+        miss_density (float, optional): fraction of events with value missVal. Defaults to 0.0.
+        time_zone (float, optional): timeZone of the document, in hours. Defaults to -3.0.
+        timestep (timedelta, optional): time between events. Defaults to 3 hours.
+        forecast_date (Optional[datetime], optional): forecastDate of every series (local time). None for observed series. Defaults to 2026-02-13.
+        start (Optional[datetime], optional): time of the first event (local time). Defaults to forecast_date, or to n_events timesteps before 2026-02-13 for observed series.
+        seed (int, optional): random seed. Defaults to 0.
+        location_ids (Optional[List[str]], optional): locationId of each series. If set, n_series is its length. Defaults to SYN_00000, SYN_00001, ...
+        parameter_id (Optional[str], optional): parameterId of every series. Defaults to Q.sim for forecasts and Q.obs otherwise.
+
+    Returns:
+        dict: GetTimeseriesResponse
+    """
+    rng = np.random.default_rng(seed)
+    if location_ids is not None:
+        n_series = len(location_ids)
+    if parameter_id is None:
+        parameter_id = "Q.sim" if forecast_date is not None else "Q.obs"
+    if start is None:
+        start = forecast_date if forecast_date is not None else datetime(2026, 2, 13) - n_events * timestep
+    times = start + np.arange(n_events) * timestep
+    dates = [t.strftime("%Y-%m-%d") for t in times.tolist()]
+    hours = [t.strftime("%H:%M:%S") for t in times.tolist()]
+    period = {"startDate": {"date": dates[0], "time": hours[0]}, "endDate": {"date": dates[-1], "time": hours[-1]}} if n_events else {}
+    series = []
+    for i in range(n_series):
+        # smooth positive hydrograph plus noise
+        base = rng.uniform(100, 20000)
+        values = base * (1 + 0.3 * np.sin(np.arange(n_events) * 2 * np.pi / rng.uniform(50, 500))) + rng.normal(0, base * 0.01, n_events)
+        missing = rng.random(n_events) < miss_density
+        flags = np.where(missing, 8, rng.choice([0, 0, 0, 2], n_events))
+        header = {
+            "type": "instantaneous",
+            "moduleInstanceId": "Synthetic",
+            "locationId": location_ids[i] if location_ids is not None else "SYN_%05d" % i,
+            "parameterId": parameter_id,
+            "timeStep": {"unit": "second", "multiplier": str(int(timestep.total_seconds()))},
+            **period,
+            "missVal": MISS_VAL,
+            "stationName": "Estación sintética %i" % i,
+            "lat": "%.4f" % rng.uniform(-35, -20),
+            "lon": "%.4f" % rng.uniform(-65, -55),
+            "units": "m3/s"
+        }
+        if forecast_date is not None:
+            header["forecastDate"] = {"date": forecast_date.strftime("%Y-%m-%d"), "time": forecast_date.strftime("%H:%M:%S")}
+        series.append({
+            "header": header,
+            "events": [
+                {"date": dates[j], "time": hours[j], "value": MISS_VAL if missing[j] else "%.3f" % values[j], "flag": str(flags[j])}
+                for j in range(n_events)
+            ]
+        })
+    return {
+        "version": "1.32",
+        "timeZone": str(float(time_zone)),
+        "timeSeries": series
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Genera una respuesta PI_JSON (GetTimeseriesResponse) sintética y determinística")
+    parser.add_argument("--series", type=int, default=10, help="Number of series. Default: 10")
+    parser.add_argument("--events", type=int, default=1000, help="Events per series. Default: 1000")
+    parser.add_argument("--miss-density", type=float, default=0.0, help="Fraction of missing values (missVal). Default: 0.0")
+    parser.add_argument("--time-zone", type=float, default=-3.0, help="timeZone in hours. Default: -3.0")
+    parser.add_argument("--observed", action="store_true", help="Observed series (no forecastDate)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed. Default: 0")
+    parser.add_argument("--output", help="Output file. If not set, writes to stdout")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    data = synthetic_response(args.series, args.events, args.miss_density, args.time_zone, forecast_date=None if args.observed else datetime(2026, 2, 13), seed=args.seed)
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+    else:
+        json.dump(data, sys.stdout)
@@ -1,34 +1,285 @@
+from __future__ import annotations
+import os
 import json
 import logging
 logger = logging.getLogger(__name__)
 import sys
-import psycopg
-from psycopg import sql
-from typing import List
+import threading
+import atexit
+import itertools
+import importlib
+import time
+import functools
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, List, Dict, Optional, Tuple, Iterator
+
+## lazy imports
+
+class LazyModule:
+    """Module imported on first attribute access. Attributes are then copied onto the proxy, so that later accesses cost the same as on the module itself"""
+    def __init__(self, name : str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr : str):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        value = getattr(self._module, attr)
+        setattr(self, attr, value)
+        return value
+
+    def __repr__(self) -> str:
+        return "<lazy module '%s'%s>" % (self._name, "" if self._module is None else " (loaded)")
+
+def lazyImport(name : str) -> LazyModule:
+    """Defers the import of a (heavy) module until it is used, e.g. pd = lazyImport("pandas")"""
+    return LazyModule(name)
+
+psycopg = lazyImport("psycopg")
+sql = lazyImport("psycopg.sql")
+psycopg_pool = lazyImport("psycopg_pool")
+
+## configuration
+
+# environment variable with the path of the configuration file, used when none is given
+CONFIG_ENV = "SSTDFEWS_CONFIG"
+
+DEFAULT_CONFIG_PATH = "config/config.json"
 
 def loadConfig(config_path : str) -> dict:
+    """Reads the JSON configuration file
+
+    Raises:
+        FileNotFoundError: if config_path does not exist
+        ValueError: if it is not valid JSON or lacks base_url
+    """
     try:
         with open(config_path,"r",encoding="utf-8") as f:
             config = json.load(f)
     except FileNotFoundError:
-        logger.error(f"Error: no se encontró el archivo de configuración: {config_path}", file=sys.stderr)
-        sys.exit(1)
-
+        raise FileNotFoundError(f"No se encontró el archivo de configuración: {os.path.abspath(config_path)} (ver la variable de entorno {CONFIG_ENV})")
     except json.JSONDecodeError as e:
-        logger.error(f"Error: JSON inválido en {config_path}: {e}", file=sys.stderr)
-        sys.exit(2)
-
-    except Exception as e:
-        logger.error(f"Error al inentar leer {config_path}: {e}", file=sys.stderr)
-        sys.exit(3) 
+        raise ValueError(f"JSON inválido en {config_path}: {e}")
 
     if "base_url" not in config:
         raise ValueError("Falta base_url en config")
 
     return config
 
+class LazyConfig(MutableMapping):
+    """Configuration dict read from its file on first access, so that importing a module costs no I/O and needs no configuration file. The file is path if given, else the one in the CONFIG_ENV environment variable, else DEFAULT_CONFIG_PATH (relative to the working directory)
+
+    Args:
+        path (Optional[str], optional): configuration file. Defaults to None.
+        on_load (Optional[Callable[[dict], None]], optional): called with the configuration every time it is (re)loaded, e.g. to apply pool settings. Defaults to None.
+    """
+    def __init__(self, path : Optional[str] = None, on_load : Optional[Callable[[dict], None]] = None):
+        self._path = path
+        self._on_load = on_load
+        self._data : Optional[dict] = None
+        self._lock = threading.RLock()
+
+    @property
+    def path(self) -> str:
+        return self._path or os.environ.get(CONFIG_ENV) or DEFAULT_CONFIG_PATH
+
+    @property
+    def loaded(self) -> bool:
+        return self._data is not None
+
+    def load(self, path : Optional[str] = None, data : Optional[dict] = None) -> LazyConfig:
+        """(Re)loads the configuration now, from path (which becomes the file of this configuration) or from data instead of a file"""
+        with self._lock:
+            if path is not None:
+                self._path = path
+            loaded = data if data is not None else loadConfig(self.path)
+            if self._on_load is not None:
+                self._on_load(loaded)
+            self._data = loaded
+            logger.debug("Configuración cargada de %s" % ("datos" if data is not None else self.path))
+        return self
+
+    def _get(self) -> dict:
+        if self._data is None:
+            with self._lock:
+                if self._data is None:
+                    self.load()
+        return self._data
+
+    def __getitem__(self, key):
+        return self._get()[key]
+
+    def __setitem__(self, key, value):
+        self._get()[key] = value
+
+    def __delitem__(self, key):
+        del self._get()[key]
+
+    def __iter__(self):
+        return iter(self._get())
+
+    def __len__(self) -> int:
+        return len(self._get())
+
+    def __repr__(self) -> str:
+        return "LazyConfig(%s)" % (repr(self._data) if self._data is not None else "'%s', not loaded" % self.path)
+
+## logging
+
+def configureLogging(level : int = logging.DEBUG, stream = None):
+    """Root logging setup of the command line tools: level, timestamped format, to stdout (or stream, e.g. sys.stderr for tools writing their output to stdout). Library code never calls it"""
+    logging.basicConfig(
+        level=level,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+        handlers=[
+            logging.StreamHandler(stream if stream is not None else sys.stdout)
+        ]
+    )
+
+## connection pool
+
+pool_config = {
+    "enabled": True,
+    "min_size": 1,
+    "max_size": 4,
+    "timeout": 30.0,
+    "max_idle": 600.0
+}
+
+connection_stats = {
+    "opened": 0
+}
+
+# pool_config as set by the last applyPoolConfig, to tell explicit settings from configuration file ones
+_applied_pool = dict(pool_config)
+
+# set by configurePool: its settings win over those of configuration files loaded later
+_pool_configured = False
+
+_pools : Dict[str, psycopg_pool.ConnectionPool] = {}
+_pools_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_current_connection : ContextVar[Optional[Tuple[str, psycopg.Connection]]] = ContextVar("current_connection", default=None)
+
+def configurePool(
+        enabled : bool = True,
+        min_size : int = 1,
+        max_size : int = 4,
+        timeout : float = 30.0,
+        max_idle : float = 600.0):
+    """Sets the process-wide connection pool parameters. Pools already opened are closed so that the new parameters apply to the next connection request. The parameters are kept when a configuration file is loaded later (see applyPoolConfig)
+
+    Args:
+        enabled (bool, optional): if False, every statement opens its own connection. Defaults to True.
+        min_size (int, optional): connections kept open per dsn. Defaults to 1.
+        max_size (int, optional): maximum connections per dsn. Defaults to 4.
+        timeout (float, optional): seconds to wait for a free connection. Defaults to 30.0.
+        max_idle (float, optional): seconds before an idle connection above min_size is closed. Defaults to 600.0.
+    """
+    if min_size < 0 or max_size < 1 or max_size < min_size:
+        raise ValueError("Parámetros de pool inválidos: min_size=%s, max_size=%s" % (min_size, max_size))
+    global _pool_configured
+    closePools()
+    pool_config.update({
+        "enabled": enabled,
+        "min_size": min_size,
+        "max_size": max_size,
+        "timeout": timeout,
+        "max_idle": max_idle
+    })
+    _pool_configured = True
+
+def applyPoolConfig(settings : dict):
+    """Applies the "pool" settings of a configuration file under the explicit ones: nothing is applied after a configurePool call, and parameters changed directly in pool_config since the last applied configuration are kept
+
+    Args:
+        settings (dict): configurePool arguments
+    """
+    global _pool_configured
+    if _pool_configured:
+        return
+    overrides = {k: v for k, v in pool_config.items() if _applied_pool.get(k) != v}
+    resolved = {**_applied_pool, **settings}
+    configurePool(**{**resolved, **overrides})
+    _pool_configured = False
+    _applied_pool.update(resolved)
+
+def _countConnection(conn : psycopg.Connection):
+    with _stats_lock:
+        connection_stats["opened"] += 1
+    profileCount("connections_opened")
+
+def resetConnectionStats():
+    with _stats_lock:
+        connection_stats["opened"] = 0
+
+def getPool(dsn : str) -> psycopg_pool.ConnectionPool:
+    with _pools_lock:
+        if dsn not in _pools:
+            _pools[dsn] = psycopg_pool.ConnectionPool(
+                dsn,
+                min_size = pool_config["min_size"],
+                max_size = pool_config["max_size"],
+                timeout = pool_config["timeout"],
+                max_idle = pool_config["max_idle"],
+                configure = _countConnection,
+                check = psycopg_pool.ConnectionPool.check_connection,
+                open = True
+            )
+            logger.debug("Pool de conexiones abierto (min_size=%i, max_size=%i)" % (pool_config["min_size"], pool_config["max_size"]))
+        return _pools[dsn]
+
+def closePools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
+atexit.register(closePools)
+
+@contextmanager
+def getConnection(dsn : str):
+    """Yields a connection for dsn: the one of the enclosing transaction() block if any, else a pooled one (or a new one if the pool is disabled). Outside a transaction() block the work is committed when the block exits
+    """
+    current = _current_connection.get()
+    if current is not None and current[0] == dsn:
+        yield current[1]
+        return
+    if pool_config["enabled"]:
+        with getPool(dsn).connection() as conn:
+            yield conn
+    else:
+        with psycopg.connect(dsn) as conn:
+            _countConnection(conn)
+            yield conn
+
+@contextmanager
+def transaction(dsn : str):
+    """Runs every execStmt* call for dsn inside the block on a single connection and transaction. Commits on exit, rolls back on error. Nested blocks become savepoints
+    """
+    current = _current_connection.get()
+    if current is not None and current[0] == dsn:
+        with current[1].transaction():
+            yield current[1]
+        return
+    with getConnection(dsn) as conn:
+        with conn.transaction():
+            token = _current_connection.set((dsn, conn))
+            try:
+                yield conn
+            finally:
+                _current_connection.reset(token)
+
+def inTransaction(dsn : str) -> bool:
+    """Whether the caller runs inside a transaction() block for dsn"""
+    current = _current_connection.get()
+    return current is not None and current[0] == dsn
+
 def execStmt(dsn, stmt : str, params : tuple=()):
-    with psycopg.connect(dsn) as conn:
+    profileCount("sql_statements")
+    with profileSpan("sql"), getConnection(dsn) as conn:
         with conn.cursor() as cur:
             cur.execute(
                 sql.SQL(stmt),
@@ -37,19 +288,222 @@ def execStmt(dsn, stmt : str, params : tuple=()):
             return cur.fetchone()[0]
 
 def execStmtMany(dsn, stmt : str, rows : List[tuple]):
-    with psycopg.connect(dsn) as conn:
+    profileCount("sql_statements")
+    with profileSpan("sql"), getConnection(dsn) as conn:
         with conn.cursor() as cur:
             cur.executemany(
                 sql.SQL(stmt),
                 rows
             )
+            profileCount("rows_written", len(rows))
             return cur.rowcount # [row[0] for row in cur.fetchall()]
 
 def execStmtFetchAll(dsn, stmt : str, params : tuple=()):
-    with psycopg.connect(dsn) as conn:
+    profileCount("sql_statements")
+    with profileSpan("sql"), getConnection(dsn) as conn:
         with conn.cursor(row_factory=psycopg.rows.dict_row) as cur:
             cur.execute(
                 sql.SQL(stmt),
                 params
             )
             return cur.fetchall()
+
+def execStmtCopy(dsn, stage_stmt : str, copy_stmt : str, merge_stmt : str, rows : List[tuple]) -> int:
+    """Bulk loads rows with COPY into a staging table and merges them with a single set-based statement, in one transaction
+
+    Args:
+        dsn (str): connection string
+        stage_stmt (str): creates (and empties) the staging table
+        copy_stmt (str): COPY ... FROM STDIN into the staging table
+        merge_stmt (str): moves the staged rows into the target table
+        rows (List[tuple]): rows to copy, in the column order of copy_stmt
+
+    Returns:
+        int: copied row count
+    """
+    count = 0
+    profileCount("sql_statements", 3)
+    with profileSpan("sql"), transaction(dsn) as conn:
+        with conn.cursor() as cur:
+            cur.execute(stage_stmt)
+            with cur.copy(copy_stmt) as copy:
+                for row in rows:
+                    copy.write_row(row)
+                    count += 1
+            cur.execute(merge_stmt)
+    profileCount("rows_written", count)
+    return count
+
+_cursor_count = itertools.count()
+
+def execStmtIter(dsn, stmt : str, params : tuple=(), batch_size : int = 10000) -> Iterator[dict]:
+    """Runs stmt through a named server-side cursor and yields the resulting rows (as dicts), fetching batch_size rows at a time so that memory use does not depend on the result size
+
+    Args:
+        dsn (str): connection string
+        stmt (str): query
+        params (tuple, optional): query parameters. Defaults to ().
+        batch_size (int, optional): rows per fetch. Defaults to 10000.
+
+    Yields:
+        Iterator[dict]: rows
+    """
+    profileCount("sql_statements")
+    with getConnection(dsn) as conn:
+        # named cursors live inside a transaction
+        with conn.transaction():
+            with conn.cursor(name="stream_%i" % next(_cursor_count), row_factory=psycopg.rows.dict_row) as cur:
+                cur.itersize = batch_size
+                cur.execute(
+                    sql.SQL(stmt),
+                    params
+                )
+                while True:
+                    rows = cur.fetchmany(batch_size)
+                    if not len(rows):
+                        break
+                    yield from rows
+
+## instrumentation
+
+profile_config = {
+    "enabled": False
+}
+
+# name -> [calls, total seconds, max seconds]
+profile_spans : Dict[str, List[float]] = {}
+
+profile_counters : Dict[str, int] = {}
+
+_profile_lock = threading.Lock()
+_profile_start : Optional[float] = None
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name : str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        with _profile_lock:
+            stats = profile_spans.get(self.name)
+            if stats is None:
+                profile_spans[self.name] = [1, elapsed, elapsed]
+            else:
+                stats[0] += 1
+                stats[1] += elapsed
+                if elapsed > stats[2]:
+                    stats[2] = elapsed
+        return False
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_no_span = _NoSpan()
+
+def profileSpan(name : str):
+    """Context manager that adds the elapsed time of its block to the span name, while profiling is enabled (else it does nothing). Spans may nest and run in several threads at once, so their totals are busy times and may add up to more than the wall time
+
+    Example:
+        with profileSpan("http"):
+            response = session.get(url)
+    """
+    return _Span(name) if profile_config["enabled"] else _no_span
+
+def profiled(name : str):
+    """Decorator that times every call of the function into the span name (see profileSpan)"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not profile_config["enabled"]:
+                return fn(*args, **kwargs)
+            with _Span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def profileCount(name : str, n : int = 1):
+    """Adds n to the counter name, while profiling is enabled"""
+    if not profile_config["enabled"]:
+        return
+    with _profile_lock:
+        profile_counters[name] = profile_counters.get(name, 0) + n
+
+def enableProfiling(enabled : bool = True):
+    """Enables (and resets) or disables the collection of spans and counters"""
+    if enabled:
+        resetProfile()
+    profile_config["enabled"] = enabled
+
+def resetProfile():
+    global _profile_start
+    with _profile_lock:
+        profile_spans.clear()
+        profile_counters.clear()
+        _profile_start = time.perf_counter()
+
+def profileReport() -> dict:
+    """Spans (calls, total, mean and max seconds) and counters collected since profiling was enabled, with the wall time"""
+    with _profile_lock:
+        return {
+            "wall_seconds": time.perf_counter() - _profile_start if _profile_start is not None else None,
+            "spans": {
+                name: {"calls": int(calls), "total": total, "mean": total / calls, "max": max_}
+                for name, (calls, total, max_) in sorted(profile_spans.items(), key=lambda item: -item[1][1])
+            },
+            "counters": dict(sorted(profile_counters.items()))
+        }
+
+def profileTable(report : dict) -> str:
+    """Per-stage summary of a profileReport, as text"""
+    lines = ["%-20s %10s %12s %12s %12s %8s" % ("span", "calls", "total s", "mean ms", "max ms", "% wall")]
+    wall = report["wall_seconds"] or 0
+    for name, s in report["spans"].items():
+        lines.append("%-20s %10i %12.3f %12.3f %12.3f %8.1f" % (name, s["calls"], s["total"], s["mean"] * 1000, s["max"] * 1000, 100 * s["total"] / wall if wall else 0))
+    lines.append("")
+    lines.append("%-20s %10s" % ("counter", "value"))
+    for name, value in report["counters"].items():
+        lines.append("%-20s %10i" % (name, value))
+    lines.append("%-20s %10.3f" % ("wall_seconds", wall))
+    return "\n".join(lines)
+
+def startProfiling(table : bool = True, output : Optional[str] = None, cprofile_output : Optional[str] = None):
+    """Enables profiling for the rest of the process. At exit, prints the summary table (to stderr), writes the JSON report and dumps cProfile stats, as requested
+
+    Args:
+        table (bool, optional): print profileTable at exit. Defaults to True.
+        output (Optional[str], optional): write profileReport as JSON into this file at exit. Defaults to None.
+        cprofile_output (Optional[str], optional): also run cProfile and dump its stats (see pstats) into this file at exit. Defaults to None.
+    """
+    profiler = None
+    if cprofile_output is not None:
+        import cProfile
+        profiler = cProfile.Profile()
+    enableProfiling()
+    def report():
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(cprofile_output)
+            logger.info("Se escribió el perfil de cProfile en %s" % cprofile_output)
+        result = profileReport()
+        if table:
+            print(profileTable(result), file=sys.stderr)
+        if output is not None:
+            with open(output, "w", encoding="utf-8") as f:
+                json.dump(result, f, indent=2)
+            logger.info("Se escribió el reporte de perfil en %s" % output)
+    # registered after closePools, so it runs before it
+    atexit.register(report)
+    if profiler is not None:
+        profiler.enable()
@@ -39,6 +39,19 @@ CREATE TABLE  IF NOT EXISTS timeseries_values (
     UNIQUE (series_id, time)
 );
 
+-- forecast dates processed by 'python -m app.accessor backfill' (job = filters of the backfill)
+CREATE TABLE IF NOT EXISTS backfill_state (
+    job             TEXT NOT NULL,
+    forecast_date   DATE NOT NULL,
+    status          TEXT NOT NULL, -- done | empty | failed
+    series          INTEGER,
+    values_count    INTEGER,
+    seconds         DOUBLE PRECISION,
+    error           TEXT,
+    updated_at      TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (job, forecast_date)
+);
+
 CREATE INDEX IF NOT EXISTS idx_locations_ts ON timeseries (location_id);
 CREATE INDEX IF NOT EXISTS idx_parameter_ts ON timeseries (parameter_id);
 CREATE INDEX IF NOT EXISTS idx_forecast_date_ts ON timeseries (forecast_date);
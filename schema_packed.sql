@@ -0,0 +1,28 @@
+-- packed storage of regular-timestep series (see packed_storage in config/config.json and app/accessor.py)
+
+-- one row per chunk of consecutive timesteps: the value of step i (1-based) is at start_time + (i - 1) * timestep. Missing values are NULL elements
+CREATE TABLE IF NOT EXISTS timeseries_packed (
+    series_id   BIGINT NOT NULL REFERENCES timeseries(id) ON DELETE CASCADE,
+    start_time  TIMESTAMPTZ NOT NULL,
+    timestep    INTERVAL NOT NULL,
+    value_array DOUBLE PRECISION[] NOT NULL,
+    flag_array  SMALLINT[] NOT NULL,
+
+    PRIMARY KEY (series_id, start_time)
+);
+
+-- values of both layouts with the columns of timeseries_values. Packed values have no id. Filters on series_id are pushed down into both branches
+CREATE OR REPLACE VIEW timeseries_values_all AS
+SELECT series_id, time, value, flag, comment, id
+FROM timeseries_values
+UNION ALL
+SELECT
+    p.series_id,
+    p.start_time + (u.i - 1) * p.timestep AS time,
+    u.value,
+    u.flag::INTEGER AS flag,
+    NULL::TEXT AS comment,
+    NULL::BIGINT AS id
+FROM timeseries_packed p
+CROSS JOIN LATERAL unnest(p.value_array, p.flag_array) WITH ORDINALITY AS u(value, flag, i)
+WHERE u.value IS NOT NULL;
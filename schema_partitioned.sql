@@ -0,0 +1,40 @@
+-- partitioning of timeseries_values by time range (see app/createdb.py)
+
+-- creates the missing range partitions of timeseries_values covering [tstart, tend]. Rows already in the default partition for a new range are moved into it. Does nothing if timeseries_values is not partitioned. Returns the number of partitions created
+CREATE OR REPLACE FUNCTION timeseries_values_ensure_partitions(tstart TIMESTAMPTZ, tend TIMESTAMPTZ, step TEXT DEFAULT 'month')
+RETURNS INTEGER AS $$
+DECLARE
+    lower_bound TIMESTAMP; -- UTC
+    upper_bound TIMESTAMP;
+    partition_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    IF step NOT IN ('month', 'year') THEN
+        RAISE EXCEPTION 'Intervalo de partición inválido: %', step;
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'timeseries_values'::regclass) THEN
+        RETURN 0;
+    END IF;
+    -- serializes concurrent ingests creating the same partition
+    PERFORM pg_advisory_xact_lock(hashtext('timeseries_values_partitions'));
+    lower_bound := date_trunc(step, tstart AT TIME ZONE 'UTC');
+    WHILE lower_bound <= tend AT TIME ZONE 'UTC' LOOP
+        upper_bound := lower_bound + ('1 ' || step)::INTERVAL;
+        partition_name := 'timeseries_values_p' || to_char(lower_bound, CASE step WHEN 'month' THEN 'YYYYMM' ELSE 'YYYY' END);
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format('CREATE TABLE %I (LIKE timeseries_values INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', partition_name);
+            IF to_regclass('timeseries_values_default') IS NOT NULL THEN
+                EXECUTE format(
+                    'WITH moved AS (DELETE FROM timeseries_values_default WHERE time >= %L AND time < %L RETURNING *) INSERT INTO %I SELECT * FROM moved',
+                    lower_bound AT TIME ZONE 'UTC', upper_bound AT TIME ZONE 'UTC', partition_name);
+            END IF;
+            EXECUTE format(
+                'ALTER TABLE timeseries_values ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                partition_name, lower_bound AT TIME ZONE 'UTC', upper_bound AT TIME ZONE 'UTC');
+            created := created + 1;
+        END IF;
+        lower_bound := upper_bound;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,51 @@
+import json
+import argparse
+import time
+from app.accessor import Timeseries, config
+from app.utils import configureLogging, configurePool, closePools, connection_stats, resetConnectionStats
+
+# Compara las conexiones abiertas por una ingesta (Timeseries.from_api_response(data, save=True)) sin pool y con pool
+
+def run_once(data, pool_enabled : bool) -> dict:
+    pool_params = dict(config.get("pool", {}))
+    pool_params["enabled"] = pool_enabled
+    configurePool(**pool_params)
+    resetConnectionStats()
+    t0 = time.perf_counter()
+    ts_list = Timeseries.from_api_response(data, save=True)
+    elapsed = time.perf_counter() - t0
+    closePools()
+    return {
+        "pool": pool_enabled,
+        "series": len(ts_list),
+        "connections_opened": connection_stats["opened"],
+        "seconds": round(elapsed, 3)
+    }
+
+def run(args):
+    with open(args.input, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    results = []
+    for pool_enabled in (False, True):
+        for i in range(args.repeat):
+            result = run_once(data, pool_enabled)
+            print("pool=%s\tseries=%i\tconnections_opened=%i\tseconds=%.3f" % (result["pool"], result["series"], result["connections_opened"], result["seconds"]))
+            results.append(result)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de conexiones abiertas por ingesta, sin y con pool de conexiones")
+    parser.add_argument(
+        "--input",
+        required=True,
+        help="Archivo PI_JSON (GetTimeseriesResponse) a ingestar, p. ej. generado con 'python -m app.accessor get --output'"
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=1,
+        help="Repeticiones por modo"
+    )
+    args = parser.parse_args()
+    configureLogging()
+    run(args)
@@ -0,0 +1,104 @@
+import json
+import logging
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta
+from app import accessor
+from app.accessor import Timeseries, config
+from app.synthetic import synthetic_response
+from app.utils import configureLogging, execStmt
+
+# Compara el almacenamiento de pronósticos de paso regular como filas (timeseries_values) y como arreglos empaquetados (timeseries_packed): tamaño en disco, tiempo de guardado y latencia de lectura
+
+ROWS_PARAMETER = "Q.bench_rows"
+PACKED_PARAMETER = "Q.bench_packed"
+
+relation_size_stmt = "SELECT coalesce(sum(pg_total_relation_size(relid)), 0) FROM pg_partition_tree(%s::regclass)"
+
+column_size_stmts = {
+    "rows": "SELECT coalesce(sum(pg_column_size(v.*)), 0) FROM timeseries_values v JOIN timeseries t ON t.id = v.series_id WHERE t.parameter_id = %s",
+    "packed": "SELECT coalesce(sum(pg_column_size(p.*)), 0) FROM timeseries_packed p JOIN timeseries t ON t.id = p.series_id WHERE t.parameter_id = %s"
+}
+
+def relation_sizes() -> dict:
+    return {name: execStmt(config["user_dsn"], relation_size_stmt, (name,)) for name in ("timeseries_values", "timeseries_packed")}
+
+def set_packed(enabled : bool, chunk_size : int):
+    config["packed_storage"] = {**accessor.packed_config(), "enabled": enabled, "chunk_size": chunk_size}
+
+def save(data : dict) -> float:
+    t0 = time.perf_counter()
+    Timeseries.from_api_response(data, save=True, batch=True)
+    return time.perf_counter() - t0
+
+def time_read(parameter_id : str, repeat : int) -> dict:
+    samples = []
+    values = 0
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        values = sum(len(ts.values) for ts in Timeseries.read_db(parameterId=parameter_id))
+        samples.append(time.perf_counter() - t0)
+    return {"values": values, "min_s": min(samples), "median_s": statistics.median(samples)}
+
+def run(args) -> dict:
+    data = {
+        layout: synthetic_response(args.series, args.events, args.miss_density, timestep=timedelta(hours=args.timestep_hours), forecast_date=args.forecast_date, seed=args.seed, parameter_id=parameter_id)
+        for layout, parameter_id in (("rows", ROWS_PARAMETER), ("packed", PACKED_PARAMETER))
+    }
+    report = {
+        "created": datetime.now().isoformat(),
+        "params": {k: (v.isoformat() if isinstance(v, datetime) else v) for k, v in vars(args).items() if k != "output"},
+        "layouts": {}
+    }
+    original = config.get("packed_storage")
+    try:
+        for layout, parameter_id in (("rows", ROWS_PARAMETER), ("packed", PACKED_PARAMETER)):
+            set_packed(layout == "packed", args.chunk_size)
+            before = relation_sizes()
+            seconds = save(data[layout])
+            after = relation_sizes()
+            report["layouts"][layout] = {
+                "save_s": seconds,
+                "relation_bytes": {name: after[name] - before[name] for name in after},
+                "tuple_bytes": execStmt(config["user_dsn"], column_size_stmts[layout], (parameter_id,))
+            }
+        # rows table as read without packed storage, and both layouts through the timeseries_values_all view
+        set_packed(False, args.chunk_size)
+        report["layouts"]["rows"]["read"] = time_read(ROWS_PARAMETER, args.repeat)
+        set_packed(True, args.chunk_size)
+        report["layouts"]["rows"]["read_view"] = time_read(ROWS_PARAMETER, args.repeat)
+        report["layouts"]["packed"]["read_view"] = time_read(PACKED_PARAMETER, args.repeat)
+        if not args.keep:
+            Timeseries.delete(parameterId=[ROWS_PARAMETER, PACKED_PARAMETER])
+    finally:
+        if original is None:
+            config.pop("packed_storage", None)
+        else:
+            config["packed_storage"] = original
+    for layout, result in report["layouts"].items():
+        print("== %s: guardado %.2f s, %i bytes en tuplas, %s" % (layout, result["save_s"], result["tuple_bytes"], ", ".join("%s +%i bytes" % (name, size) for name, size in result["relation_bytes"].items())))
+        for name in ("read", "read_view"):
+            if name in result:
+                print("   %-10s\t%i valores\tmin=%.4f s\tmedian=%.4f s" % (name, result[name]["values"], result[name]["min_s"], result[name]["median_s"]))
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de almacenamiento de pronósticos en filas (timeseries_values) y en arreglos empaquetados (timeseries_packed), con series sintéticas. Requiere 'python -m app.createdb packed'")
+    parser.add_argument("--series", type=int, default=50, help="Series per layout. Default: 50")
+    parser.add_argument("--events", type=int, default=2000, help="Events per series. Default: 2000")
+    parser.add_argument("--miss-density", type=float, default=0.05, help="Fraction of missing values. Default: 0.05")
+    parser.add_argument("--timestep-hours", type=float, default=3, help="Time between events. Default: 3")
+    parser.add_argument("--forecast-date", type=lambda v: datetime.strptime(v, "%Y-%m-%d"), default=datetime(2026, 2, 13), help="Forecast date (YYYY-MM-DD). Default: 2026-02-13")
+    parser.add_argument("--chunk-size", type=int, default=accessor.packed_defaults["chunk_size"], help="Timesteps per packed row. Default: %i" % accessor.packed_defaults["chunk_size"])
+    parser.add_argument("--repeat", type=int, default=5, help="Reads per layout (min and median are reported). Default: 5")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic series. Default: 0")
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark series in the database")
+    parser.add_argument("--output", help="Save the report as JSON into this file")
+    args = parser.parse_args()
+    # per-series log lines would dominate the timings
+    configureLogging(logging.INFO)
+    report = run(args)
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
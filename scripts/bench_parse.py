@@ -0,0 +1,118 @@
+import os
+import sys
+import json
+import logging
+import argparse
+import platform
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from app.accessor import Timeseries, TimeseriesValue, parseDateTime, parseEvents
+from app.synthetic import synthetic_response
+
+# Micro-benchmarks de las rutas críticas de parseo y serialización, sobre respuestas PI_JSON sintéticas (ver app/synthetic.py). Sin API ni base de datos
+
+# allowed slowdown (fraction) against the baseline before a case counts as a regression
+REGRESSION_THRESHOLD = 0.1
+
+def measure(fn, repeat : int) -> dict:
+    """Best wall time of repeat calls of fn, and peak traced memory of one extra call"""
+    times = []
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "seconds": min(times),
+        "peak_mb": peak / 1024 / 1024
+    }
+
+def cases(data : dict, directory : str) -> dict:
+    """Benchmark cases: name -> (function, processed event count)"""
+    time_zone = float(data["timeZone"])
+    ts_list = Timeseries.from_api_response(data)
+    events = [e for ts in data["timeSeries"] for e in ts["events"]]
+    n = len(events)
+    return {
+        "from_api_response": (lambda: Timeseries.from_api_response(data), n),
+        "parseEvents": (lambda: [parseEvents(ts["events"], time_zone, float(ts["header"]["missVal"])) for ts in data["timeSeries"]], n),
+        "TimeseriesValue.parse_one": (lambda: [TimeseriesValue.parse_one(e, time_zone, -999.0) for e in events], n),
+        "parseDateTime": (lambda: [parseDateTime(e["date"], e["time"], time_zone) for e in events], n),
+        "to_dict": (lambda: [ts.to_dict(True) for ts in ts_list], n),
+        "to_df_many": (lambda: Timeseries.to_df_many(ts_list), n),
+        "to_file_many.json": (lambda: Timeseries.to_file_many(ts_list, os.path.join(directory, "bench.json"), format="json"), n),
+        "to_file_many.csv": (lambda: Timeseries.to_file_many(ts_list, os.path.join(directory, "bench.csv"), format="csv"), n)
+    }
+
+def run(args) -> dict:
+    data = synthetic_response(args.series, args.events, args.miss_density, args.time_zone, seed=args.seed)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name, (fn, n) in cases(data, directory).items():
+            if args.case is not None and name not in args.case:
+                continue
+            result = measure(fn, args.repeat)
+            result["events"] = n
+            result["events_per_second"] = n / result["seconds"] if result["seconds"] > 0 else None
+            results[name] = result
+            print("%-28s\tseconds=%.4f\tevents/s=%12.0f\tpeak_mb=%.1f" % (name, result["seconds"], result["events_per_second"] or 0, result["peak_mb"]))
+    return {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "params": {
+            "series": args.series,
+            "events": args.events,
+            "miss_density": args.miss_density,
+            "time_zone": args.time_zone,
+            "seed": args.seed,
+            "repeat": args.repeat
+        },
+        "results": results
+    }
+
+def compare(report : dict, baseline : dict, threshold : float = REGRESSION_THRESHOLD) -> list:
+    """Names of the cases whose best time is more than threshold slower than in baseline"""
+    if report["params"] != baseline.get("params"):
+        logging.warning("Los parámetros del benchmark difieren de los de la línea de base: %s != %s" % (report["params"], baseline.get("params")))
+    regressions = []
+    for name, result in report["results"].items():
+        if name not in baseline["results"]:
+            continue
+        base = baseline["results"][name]["seconds"]
+        change = result["seconds"] / base - 1 if base > 0 else 0
+        print("%-28s\tbaseline=%.4f\tseconds=%.4f\tchange=%+.1f%%" % (name, base, result["seconds"], change * 100))
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmarks de parseo y serialización sobre respuestas PI_JSON sintéticas")
+    parser.add_argument("--series", type=int, default=20, help="Number of series. Default: 20")
+    parser.add_argument("--events", type=int, default=5000, help="Events per series. Default: 5000")
+    parser.add_argument("--miss-density", type=float, default=0.05, help="Fraction of missing values. Default: 0.05")
+    parser.add_argument("--time-zone", type=float, default=-3.0, help="timeZone in hours. Default: -3.0")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed. Default: 0")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case (the best one is reported). Default: 3")
+    parser.add_argument("--case", action="append", help="Run only this case (repeatable)")
+    parser.add_argument("--output", help="Save results as JSON into this file")
+    parser.add_argument("--baseline", help="Compare against results saved with --output. Exits with status 1 on regression")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="Allowed slowdown against baseline (fraction). Default: %s" % REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+    # keep per-series log lines out of the timings
+    logging.getLogger().setLevel(logging.WARNING)
+    report = run(args)
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline is not None:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if len(regressions):
+            print("Regresiones: %s" % ", ".join(regressions))
+            sys.exit(1)
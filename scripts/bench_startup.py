@@ -0,0 +1,77 @@
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+import time
+
+# Mide el tiempo de arranque de los comandos (import de app.accessor, --help de los CLI) en procesos nuevos, y qué módulos pesados carga el import
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMMANDS = {
+    "python": ["-c", "pass"],
+    "import app.accessor": ["-c", "import app.accessor"],
+    "app.accessor --help": ["-m", "app.accessor", "--help"],
+    "app.createdb --help": ["-m", "app.createdb", "--help"],
+    "pair_up_obs_sim --help": ["-m", "scripts.pair_up_obs_sim", "--help"]
+}
+
+# modules that importing app.accessor should not load
+HEAVY_MODULES = ["pandas", "numpy", "requests", "psycopg", "psycopg_pool", "ijson", "pyarrow"]
+
+def time_command(arguments, repeat : int) -> dict:
+    samples = []
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, *arguments], cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        samples.append(time.perf_counter() - t0)
+    return {
+        "min_ms": min(samples) * 1000,
+        "median_ms": statistics.median(samples) * 1000
+    }
+
+def loaded_heavy_modules() -> list:
+    result = subprocess.run(
+        [sys.executable, "-c", "import sys, json, app.accessor; print(json.dumps([m for m in %s if m in sys.modules]))" % json.dumps(HEAVY_MODULES)],
+        cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+def slowest_imports(n : int = 10) -> list:
+    """(cumulative ms, module) of the slowest imports of app.accessor, from python -X importtime"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.accessor"], cwd=ROOT, capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]) / 1000, parts[2].strip()))
+    return sorted(rows, reverse=True)[0:n]
+
+def run(args) -> dict:
+    results = {}
+    for name, arguments in COMMANDS.items():
+        results[name] = time_command(arguments, args.repeat)
+        print("%-24s\tmin=%7.1f ms\tmedian=%7.1f ms" % (name, results[name]["min_ms"], results[name]["median_ms"]))
+    heavy = loaded_heavy_modules()
+    print("Módulos pesados cargados por 'import app.accessor': %s" % (", ".join(heavy) if len(heavy) else "ninguno"))
+    imports = slowest_imports()
+    for ms, module in imports:
+        print("   %7.1f ms\t%s" % (ms, module))
+    return {
+        "python": sys.version.split()[0],
+        "repeat": args.repeat,
+        "commands": results,
+        "heavy_modules_loaded": heavy,
+        "slowest_imports": imports
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de tiempo de arranque: import de app.accessor y --help de los comandos, en procesos nuevos")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per command (min and median are reported). Default: 5")
+    parser.add_argument("--output", help="Save results as JSON into this file")
+    args = parser.parse_args()
+    report = run(args)
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
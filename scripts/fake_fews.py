@@ -0,0 +1,215 @@
+import json
+import time
+import zlib
+import logging
+import argparse
+import threading
+import random
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from typing import List, Optional, Tuple
+import pandas as pd
+from app.synthetic import synthetic_response
+
+logger = logging.getLogger(__name__)
+
+# Servidor local que imita el endpoint /timeseries (PI_JSON) de FEWS con datos sintéticos, latencia y tasa de errores configurables, para pruebas de carga sin el servicio real
+
+# path of base_url in the real service
+BASE_PATH = "/FewsWebServices/rest/fewspiservice/v1"
+
+# filterId -> (mapping file column with its locations, parameterId, forecast filter)
+FILTERS = {
+    "Mod_Hydro_Output_Selected": ("sim", "Q.sim", True),
+    "Tablero_Hydro": ("obs", "Q.obs", False)
+}
+
+def _parseTime(value : Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).astimezone(timezone.utc).replace(tzinfo=None) if value is not None else None
+
+def _alignUp(t : datetime, step : timedelta) -> datetime:
+    offset = (t - datetime(1970, 1, 1)) % step
+    return t + (step - offset) if offset else t
+
+class FakeFews:
+    """Synthetic /timeseries service. Series are deterministic by (locationId, parameterId, forecastDate), so that repeated or overlapping requests return the same values
+
+    Args:
+        mapping_file (str, optional): csv with the obs and sim location ids of each filter (see FILTERS). Defaults to "static/mgb_map.csv".
+        timestep (timedelta, optional): time between events. Defaults to 3 hours.
+        time_zone (float, optional): timeZone of responses, in hours. Defaults to 0.0.
+        hindcast_days (float, optional): days before the forecast date included in forecast runs. Defaults to 30.
+        horizon_days (float, optional): days after the forecast date included in forecast runs. Defaults to 15.
+        observed_days (float, optional): days of observations served when startTime is not set. Defaults to 30.
+        miss_density (float, optional): fraction of missing values. Defaults to 0.05.
+        latency (float, optional): mean response delay in seconds. Defaults to 0.0.
+        jitter (float, optional): the delay is uniform in latency ± jitter. Defaults to 0.0.
+        error_rate (float, optional): fraction of requests answered with HTTP 503. Defaults to 0.0.
+        seed (int, optional): seed of latencies and errors. Defaults to 0.
+    """
+    def __init__(
+            self,
+            mapping_file : str = "static/mgb_map.csv",
+            timestep : timedelta = timedelta(hours=3),
+            time_zone : float = 0.0,
+            hindcast_days : float = 30,
+            horizon_days : float = 15,
+            observed_days : float = 30,
+            miss_density : float = 0.05,
+            latency : float = 0.0,
+            jitter : float = 0.0,
+            error_rate : float = 0.0,
+            seed : int = 0):
+        mapping = pd.read_csv(mapping_file)
+        self.locations = {column: [str(l) for l in mapping[column]] for column in ("obs", "sim")}
+        self.timestep = timestep
+        self.time_zone = time_zone
+        self.hindcast = timedelta(days=hindcast_days)
+        self.horizon = timedelta(days=horizon_days)
+        self.observed = timedelta(days=observed_days)
+        self.miss_density = miss_density
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        # one (seconds, status, series, events) item per request
+        self.requests : List[Tuple[float, int, int, int]] = []
+
+    def _series(self, location_id : str, parameter_id : str, forecast_date : Optional[datetime], start : datetime, end : datetime) -> List[dict]:
+        start = _alignUp(start, self.timestep)
+        n_events = max(0, int((end - start) / self.timestep) + 1) if end >= start else 0
+        local = timedelta(hours=self.time_zone)
+        seed = zlib.crc32(("%s|%s|%s" % (location_id, parameter_id, forecast_date)).encode())
+        data = synthetic_response(
+            n_events = n_events,
+            miss_density = self.miss_density,
+            time_zone = self.time_zone,
+            timestep = self.timestep,
+            forecast_date = forecast_date + local if forecast_date is not None else None,
+            start = start + local,
+            seed = seed,
+            location_ids = [location_id],
+            parameter_id = parameter_id)
+        return data["timeSeries"]
+
+    def timeseries(self, query : dict) -> Tuple[int, dict]:
+        """Status and body of a /timeseries request (parsed query string, see urllib.parse.parse_qs)"""
+        filter_id = query.get("filterId", [None])[0]
+        if filter_id not in FILTERS:
+            return 400, {"error": "filterId desconocido: %s" % filter_id}
+        column, parameter_id, forecast = FILTERS[filter_id]
+        if "parameterIds" in query and parameter_id not in query["parameterIds"]:
+            return 200, {"version": "1.32", "timeZone": str(float(self.time_zone)), "timeSeries": []}
+        locations = self.locations[column]
+        if "locationIds" in query:
+            locations = [l for l in query["locationIds"] if l in set(locations)]
+        start = _parseTime(query.get("startTime", [None])[0])
+        end = _parseTime(query.get("endTime", [None])[0])
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        series = []
+        if forecast:
+            # one run per day at 00:00 UTC within the forecast window, or the last one
+            forecast_start = _parseTime(query.get("startForecastTime", [None])[0])
+            forecast_end = _parseTime(query.get("endForecastTime", [None])[0])
+            if forecast_start is None:
+                forecast_dates = [datetime(now.year, now.month, now.day)]
+            else:
+                forecast_dates = []
+                fd = _alignUp(forecast_start, timedelta(days=1))
+                while fd < (forecast_end or forecast_start + timedelta(days=1)):
+                    forecast_dates.append(fd)
+                    fd += timedelta(days=1)
+            for fd in forecast_dates:
+                run_start = max(start, fd - self.hindcast) if start is not None else fd - self.hindcast
+                run_end = min(end, fd + self.horizon) if end is not None else fd + self.horizon
+                for location_id in locations:
+                    series.extend(self._series(location_id, parameter_id, fd, run_start, run_end))
+        else:
+            obs_end = min(end, now) if end is not None else now
+            obs_start = start if start is not None else obs_end - self.observed
+            for location_id in locations:
+                series.extend(self._series(location_id, parameter_id, None, obs_start, obs_end))
+        return 200, {"version": "1.32", "timeZone": str(float(self.time_zone)), "timeSeries": series}
+
+    def handler(self):
+        """BaseHTTPRequestHandler class serving this service under BASE_PATH"""
+        service = self
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                t0 = time.perf_counter()
+                url = urlparse(self.path)
+                with service._lock:
+                    delay = max(0.0, service.latency + service._random.uniform(-service.jitter, service.jitter))
+                    fail = service._random.random() < service.error_rate
+                series = events = 0
+                if url.path != BASE_PATH + "/timeseries":
+                    status, body = 404, {"error": "No encontrado: %s" % url.path}
+                elif fail:
+                    status, body = 503, {"error": "Error simulado"}
+                else:
+                    status, body = service.timeseries(parse_qs(url.query))
+                    series = len(body.get("timeSeries", []))
+                    events = sum(len(ts["events"]) for ts in body.get("timeSeries", []))
+                content = json.dumps(body).encode()
+                elapsed = time.perf_counter() - t0
+                if delay > elapsed:
+                    time.sleep(delay - elapsed)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+                with service._lock:
+                    service.requests.append((time.perf_counter() - t0, status, series, events))
+
+            def log_message(self, format, *args):
+                logger.debug("%s - %s" % (self.address_string(), format % args))
+        return Handler
+
+    def start(self, host : str = "127.0.0.1", port : int = 0) -> Tuple[ThreadingHTTPServer, str]:
+        """Serves in a background thread. Returns the server (stop it with shutdown()) and the base_url to set in config"""
+        server = ThreadingHTTPServer((host, port), self.handler())
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server, "http://%s:%i%s" % (host, server.server_address[1], BASE_PATH)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor FEWS PI_JSON /timeseries local con datos sintéticos, para pruebas de carga")
+    parser.add_argument("--host", default="127.0.0.1", help="Default: 127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080, help="Default: 8080")
+    parser.add_argument("--mapping-file", default="static/mgb_map.csv", help="csv with the obs and sim location ids. Default: static/mgb_map.csv")
+    parser.add_argument("--timestep-hours", type=float, default=3, help="Time between events. Default: 3")
+    parser.add_argument("--time-zone", type=float, default=0.0, help="timeZone of responses in hours. Default: 0.0")
+    parser.add_argument("--hindcast-days", type=float, default=30, help="Days before the forecast date in forecast runs. Default: 30")
+    parser.add_argument("--horizon-days", type=float, default=15, help="Days after the forecast date in forecast runs. Default: 15")
+    parser.add_argument("--miss-density", type=float, default=0.05, help="Fraction of missing values. Default: 0.05")
+    parser.add_argument("--latency", type=float, default=0.0, help="Mean response delay in seconds. Default: 0")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Delay varies uniformly by ± this many seconds. Default: 0")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 503. Default: 0")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of latencies and errors. Default: 0")
+    return parser.parse_args(argv)
+
+def service_from_args(args) -> FakeFews:
+    return FakeFews(
+        mapping_file = args.mapping_file,
+        timestep = timedelta(hours=args.timestep_hours),
+        time_zone = args.time_zone,
+        hindcast_days = args.hindcast_days,
+        horizon_days = args.horizon_days,
+        miss_density = args.miss_density,
+        latency = args.latency,
+        jitter = args.jitter,
+        error_rate = args.error_rate,
+        seed = args.seed)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    args = parse_args()
+    server = ThreadingHTTPServer((args.host, args.port), service_from_args(args).handler())
+    logger.info("Sirviendo en http://%s:%i%s (usar como base_url en config/config.json)" % (args.host, server.server_address[1], BASE_PATH))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
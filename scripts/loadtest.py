@@ -0,0 +1,212 @@
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+import subprocess
+from datetime import datetime, timedelta
+from typing import Dict, List
+import numpy as np
+from app import accessor
+from app.accessor import Timeseries, config
+from app.cache import configureCache
+from app.utils import CONFIG_ENV, configureLogging, execStmtFetchAll, closePools
+from scripts import pair_up_obs_sim
+from scripts.fake_fews import FakeFews
+
+# Prueba de carga de punta a punta contra un servidor FEWS local (scripts/fake_fews.py) y una base PostgreSQL local: 'get --save' del accessor y scripts/pair_up_obs_sim.run
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SIM_FILTER = "Mod_Hydro_Output_Selected"
+OBS_FILTER = "Tablero_Hydro"
+
+write_stats_stmt = "SELECT coalesce(sum(n_tup_ins), 0) AS inserted, coalesce(sum(n_tup_upd), 0) AS updated FROM pg_stat_user_tables WHERE relname LIKE 'timeseries_values%%' OR relname = 'timeseries_packed'"
+
+def percentiles(samples : List[float]) -> dict:
+    if not len(samples):
+        return {"count": 0}
+    p50, p90, p99 = np.percentile(samples, [50, 90, 99])
+    return {"count": len(samples), "p50": p50, "p90": p90, "p99": p99, "max": max(samples), "total": sum(samples)}
+
+def write_stats() -> dict:
+    """Rows inserted and updated in timeseries_values (and its partitions) and timeseries_packed since the statistics reset. Pool connections are closed first, so that their counters are flushed"""
+    closePools()
+    return execStmtFetchAll(config["user_dsn"], write_stats_stmt)[0]
+
+class StageTimer:
+    """Times calls of the download, parse and save functions of app.accessor (and the references imported by pair_up_obs_sim) while active"""
+    def __init__(self):
+        self.samples : Dict[str, List[float]] = {}
+        self.values_saved = 0
+        self._lock = threading.Lock()
+        self._patched = []
+
+    def _record(self, stage : str, seconds : float, values : int = 0):
+        with self._lock:
+            self.samples.setdefault(stage, []).append(seconds)
+            self.values_saved += values
+
+    def _wrap(self, stage : str, fn, count_values = None):
+        def timed(*args, **kwargs):
+            t0 = time.perf_counter()
+            result = fn(*args, **kwargs)
+            self._record(stage, time.perf_counter() - t0, count_values(args) if count_values is not None else 0)
+            return result
+        return timed
+
+    def _patch(self, owner, name : str, value):
+        self._patched.append((owner, name, owner.__dict__[name]))
+        setattr(owner, name, value)
+
+    def __enter__(self):
+        download = self._wrap("download", accessor.download_timeseries)
+        self._patch(accessor, "download_timeseries", download)
+        self._patch(pair_up_obs_sim, "download_timeseries", download)
+        self._patch(Timeseries, "parse_one", classmethod(self._wrap("parse", Timeseries.parse_one.__func__)))
+        self._patch(Timeseries, "create_all", self._wrap("save", Timeseries.create_all, lambda args: len(args[0].values)))
+        self._patch(Timeseries, "create_batch", classmethod(self._wrap("save", Timeseries.create_batch.__func__, lambda args: sum(len(ts.values) for ts in args[1]))))
+        self._patch(Timeseries, "read_paired_many", classmethod(self._wrap("read_paired", Timeseries.read_paired_many.__func__)))
+        return self
+
+    def __exit__(self, *exc):
+        for owner, name, value in reversed(self._patched):
+            setattr(owner, name, value)
+        self._patched = []
+
+def scenario_get(args, base_url : str) -> dict:
+    """Runs 'python -m app.accessor get --save' once per forecast date, in a subprocess whose config points to the fake server"""
+    run_config = {**config, "base_url": base_url, "cache": {**config.get("cache", {}), "enabled": False}}
+    samples = []
+    with tempfile.TemporaryDirectory() as directory:
+        config_file = os.path.join(directory, "config.json")
+        with open(config_file, "w", encoding="utf-8") as f:
+            json.dump(run_config, f)
+        env = {**os.environ, "PYTHONPATH": ROOT, CONFIG_ENV: config_file}
+        for i in range(args.days):
+            forecast_date = args.forecast_date + timedelta(days=i)
+            command = [sys.executable, "-m", "app.accessor", "get", "--save", "--forecast-date", forecast_date.isoformat()[0:10], "--filter-id", SIM_FILTER]
+            if args.batch:
+                command.append("--batch")
+            t0 = time.perf_counter()
+            result = subprocess.run(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+            samples.append(time.perf_counter() - t0)
+            if result.returncode != 0:
+                raise Exception("Falló 'get --save' para %s: %s" % (forecast_date.date(), result.stderr[-2000:]))
+            logging.info("get --save %s: %.2f s" % (forecast_date.date(), samples[-1]))
+    return {"stages": {"run": percentiles(samples)}}
+
+def scenario_pair_up(args, base_url : str) -> dict:
+    """Runs pair_up_obs_sim.run in this process against the fake server, timing each stage"""
+    config["base_url"] = base_url
+    configureCache(**{**config.get("cache", {}), "enabled": False})
+    output_dir = tempfile.mkdtemp()
+    params = {
+        **pair_up_obs_sim.default_params,
+        "forecast_date": args.forecast_date,
+        "timestart": args.forecast_date - timedelta(days=args.obs_days),
+        "timeend": args.forecast_date + timedelta(days=15),
+        "mapping_file": args.mapping_file,
+        "sim_filterId": SIM_FILTER,
+        "obs_filterId": OBS_FILTER,
+        "incremental_obs": not args.full_obs,
+        "pipeline": args.pipeline,
+        "output_dir": output_dir,
+        "dataset": None
+    }
+    try:
+        with StageTimer() as timer:
+            for i in range(args.repeat):
+                pair_up_obs_sim.run(argparse.Namespace(**params))
+    finally:
+        shutil.rmtree(output_dir)
+    return {"stages": {stage: percentiles(samples) for stage, samples in timer.samples.items()}, "values_saved": timer.values_saved}
+
+SCENARIOS = {
+    "get": scenario_get,
+    "pair_up": scenario_pair_up
+}
+
+def run(args) -> dict:
+    service = FakeFews(
+        mapping_file = args.mapping_file,
+        timestep = timedelta(hours=args.timestep_hours),
+        miss_density = args.miss_density,
+        latency = args.latency,
+        jitter = args.jitter,
+        error_rate = args.error_rate,
+        seed = args.seed)
+    server, base_url = service.start()
+    logging.info("Servidor FEWS local en %s" % base_url)
+    report = {
+        "created": datetime.now().isoformat(),
+        "params": {k: (v.isoformat() if isinstance(v, datetime) else v) for k, v in vars(args).items() if k != "output"},
+        "scenarios": {}
+    }
+    try:
+        for name in args.scenario:
+            first_request = len(service.requests)
+            before = write_stats()
+            t0 = time.perf_counter()
+            result = SCENARIOS[name](args, base_url)
+            seconds = time.perf_counter() - t0
+            after = write_stats()
+            requests = service.requests[first_request:]
+            events = sum(r[3] for r in requests)
+            rows = (after["inserted"] - before["inserted"]) + (after["updated"] - before["updated"])
+            result.update({
+                "seconds": seconds,
+                "requests": len(requests),
+                "failed_requests": sum(1 for r in requests if r[1] >= 400),
+                "series_served": sum(r[2] for r in requests),
+                "events_served": events,
+                "events_per_second": events / seconds,
+                "server_latency": percentiles([r[0] for r in requests]),
+                "db_rows_inserted": after["inserted"] - before["inserted"],
+                "db_rows_updated": after["updated"] - before["updated"],
+                "db_rows_per_second": rows / seconds
+            })
+            report["scenarios"][name] = result
+            print_result(name, result)
+    finally:
+        server.shutdown()
+    return report
+
+def print_result(name : str, result : dict):
+    print("== %s: %.2f s, %i requests (%i failed), %i series, %i events, %.0f events/s, %.0f db rows/s (%i inserted, %i updated)" % (
+        name, result["seconds"], result["requests"], result["failed_requests"], result["series_served"], result["events_served"],
+        result["events_per_second"], result["db_rows_per_second"], result["db_rows_inserted"], result["db_rows_updated"]))
+    for stage, p in [("server", result["server_latency"])] + list(result["stages"].items()):
+        if p["count"]:
+            print("   %-12s\tn=%i\tp50=%.4f\tp90=%.4f\tp99=%.4f\tmax=%.4f\ttotal=%.2f" % (stage, p["count"], p["p50"], p["p90"], p["p99"], p["max"], p["total"]))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prueba de carga de punta a punta (descarga, lectura y guardado en base de datos) contra un servidor FEWS local con datos sintéticos")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS.keys()), help="Scenario to run (repeatable). Default: all")
+    parser.add_argument("--forecast-date", type=lambda v: datetime.strptime(v, "%Y-%m-%d"), default=datetime(2026, 2, 13), help="First forecast date (YYYY-MM-DD). Default: 2026-02-13")
+    parser.add_argument("--days", type=int, default=3, help="get: consecutive forecast dates to ingest. Default: 3")
+    parser.add_argument("--batch", action="store_true", help="get: save each response in a single transaction")
+    parser.add_argument("--repeat", type=int, default=1, help="pair_up: runs. Default: 1")
+    parser.add_argument("--obs-days", type=float, default=365, help="pair_up: days of observations before the forecast date. Default: 365")
+    parser.add_argument("--full-obs", action="store_true", help="pair_up: download the whole observed period instead of incrementally")
+    parser.add_argument("--pipeline", action="store_true", help="pair_up: download, parse and save in overlapping stages")
+    parser.add_argument("--mapping-file", default="static/mgb_map.csv", help="Stations served and paired. Default: static/mgb_map.csv")
+    parser.add_argument("--timestep-hours", type=float, default=3, help="Time between served events. Default: 3")
+    parser.add_argument("--miss-density", type=float, default=0.05, help="Fraction of served missing values. Default: 0.05")
+    parser.add_argument("--latency", type=float, default=0.2, help="Mean server response delay in seconds. Default: 0.2")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Server delay varies uniformly by ± this many seconds. Default: 0.1")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 503 (retried by the client). Default: 0")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of server latencies and errors. Default: 0")
+    parser.add_argument("--output", help="Save the report as JSON into this file")
+    args = parser.parse_args()
+    args.scenario = args.scenario or list(SCENARIOS.keys())
+    # per-series log lines would dominate the timings
+    configureLogging(logging.INFO)
+    report = run(args)
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
@@ -1,9 +1,13 @@
-import pandas as pd
-from app.accessor import Timeseries, download_timeseries
+from app.accessor import Timeseries, download_timeseries, download_timeseries_many, download_incremental, ingest_pipeline, config
+from app.cache import configureCache
+from app.utils import configureLogging, startProfiling, lazyImport
+from app.columnar import writeFrame
 from datetime import datetime, timezone, timedelta
 import argparse
 from pathlib import Path
 
+pd = lazyImport("pandas")
+
 # Importa simulado y observado de estaciones en mapping_file y guarda emparejado en .csv (1 archivo por estación)  
 
 def parse_date(value: str):
@@ -35,7 +39,10 @@ default_params = {
 "obs_filterId":  "Tablero_Hydro",
 "import_obs":  True,
 "import_sim": True,
-"output_dir": None
+"incremental_obs": True,
+"pipeline": False,
+"output_dir": None,
+"format": "csv"
 }
 ###
 
@@ -43,29 +50,50 @@ def run(args):
 
     df = pd.read_csv(open(args.mapping_file))
 
-    if args.import_sim:
+    if args.pipeline:
+        # descarga, lectura y guardado superpuestos
+        if args.import_sim:
+            ingest_pipeline(args.forecast_date, args.sim_filterId, parameterIds=["Q.sim"], timestart=args.timestart, timeend=args.timeend, locations_per_request=None)
+        if args.import_obs:
+            ingest_pipeline(filterId=args.obs_filterId, locationIds=list(df["obs"]), parameterIds=["Q.obs"], timestart=args.timestart, timeend=args.timeend, incremental=args.incremental_obs, skip_errors=True)
+
+    if args.import_sim and not args.pipeline:
         sim_data = download_timeseries(fecha_pronostico=args.forecast_date,filterId=args.sim_filterId, parameterIds=["Q.sim"], timestart = args.timestart, timeend=args.timeend)
         if "timeSeries" not in sim_data:
             raise ValueError("No se encontraron timeseries sim")
         sim_ts = Timeseries.from_api_response(sim_data, save=True)
 
+    if args.import_obs and not args.pipeline:
+        # una descarga por estación, concurrentes
+        if args.incremental_obs:
+            # sólo desde el último dato guardado de cada estación
+            obs_data = download_incremental(filterId=args.obs_filterId, locationIds = list(df["obs"]), parameterIds=["Q.obs"], timestart= args.timestart, timeend= args.timeend, locations_per_request=1, skip_errors=True)
+        else:
+            obs_data = download_timeseries_many(filterId=args.obs_filterId, locationIds = list(df["obs"]), parameterIds=["Q.obs"], timestart= args.timestart, timeend= args.timeend, locations_per_request=1, skip_errors=True)
+        obs_ts = Timeseries.from_api_response(obs_data, save=True)
+
+    # todas las estaciones en una consulta
+    paired = Timeseries.read_paired_many(df, args.forecast_date)
+    paired_groups = dict(list(paired.groupby(["station", "sim_location"])))
+
+    if args.dataset is not None:
+        # un único dataset particionado por fecha de pronóstico y estación
+        writeFrame(paired, dataset_dir=args.dataset, format=args.format if args.format != "csv" else "parquet", partitioning=["forecast_date", "station"])
+        return
+
+    Path(args.output_dir).mkdir(parents=True, exist_ok=True)
     for i, row in df.iterrows():
         print("Estación %s" % row["obs"])
-        try:
-            if args.import_obs:
-                data = download_timeseries(filterId=args.obs_filterId, locationIds = [row["obs"]], parameterIds=["Q.obs"], timestart= args.timestart, timeend= args.timeend)
-                ts = Timeseries.from_api_response(data, save=True)
-            df_paired = Timeseries.read_paired(
-                {"locationId": row["obs"], "parameterId": "Q.obs"},
-                {"locationId": str(row["sim"]), "parameterId": "Q.sim", "forecastDate": args.forecast_date}
-            )
-
-            Path(args.output_dir).mkdir(parents=True, exist_ok=True)
-            paired_filename = "%s/%s-%s-%s-%s.csv" % (args.output_dir, row["obs"], row["name"].replace(" ","")[0:12], str(row["sim"]), args.forecast_date.isoformat()[0:13])
-            df_paired.to_csv(open(paired_filename, "w"), index=False)
-        except Exception as e:
-            print(str(e))
+        key = (row["obs"], str(row["sim"]))
+        if key not in paired_groups:
+            print("Timeseries not found")
             continue
+        df_paired = paired_groups[key][["time", "obs", "sim"]]
+        paired_filename = "%s/%s-%s-%s-%s.%s" % (args.output_dir, row["obs"], row["name"].replace(" ","")[0:12], str(row["sim"]), args.forecast_date.isoformat()[0:13], args.format)
+        if args.format == "csv":
+            df_paired.to_csv(open(paired_filename, "w"), index=False)
+        else:
+            writeFrame(df_paired, paired_filename, format=args.format)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Importa simulado y observado de estaciones en mapping_file y guarda emparejado en .csv (1 archivo por estación)")
@@ -127,6 +155,14 @@ if __name__ == "__main__":
     )
     # parser.set_defaults(import_obs=default_params["import_obs"])
 
+    parser.add_argument(
+        "-f", "--full-obs",
+        dest="incremental_obs",
+        action="store_false",
+        help="Download the whole timestart-timeend period of observations instead of only what is newer than the stored data",
+        default=default_params["incremental_obs"]
+    )
+
     # parser.add_argument(
     #     "--import-sim",
     #     action=argparse.BooleanOptionalAction,
@@ -142,6 +178,43 @@ if __name__ == "__main__":
     )
     # parser.set_defaults(import_sim=default_params["import_sim"])
 
+    parser.add_argument(
+        "-p", "--pipeline",
+        action="store_true",
+        help="Download, parse and save concurrently in overlapping stages",
+        default=default_params["pipeline"]
+    )
+
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="At exit, print time per stage and counters to stderr"
+    )
+
+    parser.add_argument(
+        "--profile-output",
+        default=None,
+        help="At exit, save the stage times and counters as JSON into this file"
+    )
+
+    parser.add_argument(
+        "--cprofile",
+        default=None,
+        help="Run under cProfile and dump its stats into this file"
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Neither read nor write the local response cache"
+    )
+
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Download again even if responses are cached, and update the cache"
+    )
+
     # --- OUTPUT ---
 
     parser.add_argument(
@@ -149,10 +222,31 @@ if __name__ == "__main__":
         default=default_params["output_dir"],
     )
 
+    parser.add_argument(
+        "--format",
+        choices=["csv", "parquet", "arrow"],
+        default=default_params["format"],
+        help="Output file format. parquet and arrow (Arrow IPC) require pyarrow. Default: csv"
+    )
+
+    parser.add_argument(
+        "--dataset",
+        default=None,
+        help="Write all stations into a single dataset partitioned by forecast date and station, in this directory (parquet unless --format arrow), instead of one file per station"
+    )
+
     args = parser.parse_args()
 
     args.output_dir = args.output_dir if args.output_dir is not None else "%s/%04d-%02d-%02d" % (output_dir_root, args.forecast_date.year, args.forecast_date.month, args.forecast_date.day)
 
     print(args)
 
+    configureLogging()
+
+    if args.profile or args.profile_output is not None or args.cprofile is not None:
+        startProfiling(args.profile, args.profile_output, args.cprofile)
+
+    if args.no_cache or args.refresh:
+        configureCache(**{**config.get("cache", {}), "enabled": not args.no_cache, "refresh": args.refresh})
+
     run(args)
\ No newline at end of file
@@ -0,0 +1,40 @@
+from app import accessor
+from app.accessor import backfill
+from datetime import date
+
+def test_backfill(monkeypatch):
+    state = {date(2026, 2, 2): "done"}
+    monkeypatch.setattr(accessor, "ensure_backfill_state", lambda: None)
+    def fake_fetch_all(dsn, stmt, params=()):
+        if "FROM backfill_state" in stmt:
+            return [{"forecast_date": d} for d, status in state.items() if status in ("done", "empty")]
+        # forecasts of 2026-02-03 are already stored
+        return [{"day": date(2026, 2, 3)}]
+    def fake_many(dsn, stmt, rows):
+        for job, forecast_date, status, *rest in rows:
+            state[forecast_date] = status
+        return len(rows)
+    downloaded = []
+    def fake_download(forecast_date, filterId, locationIds, parameterIds, timestart, timeend, qualifierIds):
+        downloaded.append(forecast_date)
+        if forecast_date == date(2026, 2, 5):
+            raise Exception("HTTP 500")
+        series = [] if forecast_date == date(2026, 2, 4) else [{
+            "header": {"locationId": "5862", "parameterId": "Q.sim", "timeStep": {"unit": "second", "multiplier": "10800"}, "units": "m3/s", "lat": "-27.4", "lon": "-58.8", "stationName": "Corrientes", "forecastDate": {"date": forecast_date.isoformat(), "time": "03:00:00"}},
+            "events": [{"date": forecast_date.isoformat(), "time": "03:00:00", "value": "1.0", "flag": "0"}]
+        }]
+        return {"timeZone": "0.0", "timeSeries": series}
+    monkeypatch.setattr(accessor, "execStmtFetchAll", fake_fetch_all)
+    monkeypatch.setattr(accessor, "execStmtMany", fake_many)
+    monkeypatch.setattr(accessor, "download_timeseries", fake_download)
+    monkeypatch.setattr(accessor.Timeseries, "create_batch", classmethod(lambda cls, ts_list: [{"values": len(ts.values)} for ts in ts_list]))
+
+    summary = backfill(date(2026, 2, 1), date(2026, 2, 5), parameterIds=["Q.sim"], max_workers=2)
+    assert sorted(downloaded) == [date(2026, 2, 1), date(2026, 2, 4), date(2026, 2, 5)]
+    assert (summary["done"], summary["empty"], summary["failed"], summary["skipped"], summary["values"]) == (1, 1, 1, 2, 1)
+    assert state[date(2026, 2, 5)] == "failed"
+
+    # resume: only the failed date is retried
+    downloaded.clear()
+    backfill(date(2026, 2, 1), date(2026, 2, 5), parameterIds=["Q.sim"])
+    assert downloaded == [date(2026, 2, 5)]
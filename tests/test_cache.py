@@ -0,0 +1,68 @@
+from app import accessor, cache
+from app.accessor import download_timeseries
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import json
+import os
+
+requests_received = []
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        requests_received.append(self.path)
+        body = json.dumps({
+            "version": "1.32",
+            "timeZone": "0.0",
+            "timeSeries": [{
+                "header": {"locationId": "A", "parameterId": "Q.obs"},
+                "events": [{"date": "2026-02-01", "time": "00:00:00", "value": str(len(requests_received)), "flag": "0"}]
+            }]
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def test_cache(monkeypatch, tmp_path):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setitem(accessor.config, "base_url", "http://127.0.0.1:%i" % server.server_address[1])
+    monkeypatch.setattr(cache, "cache_config", dict(cache.cache_config))
+    monkeypatch.setattr(cache, "_cache_size", None)
+    monkeypatch.setattr(cache, "_configured", False)
+    cache.configureCache(enabled = True, directory = str(tmp_path), ttl_observed = None)
+    try:
+        get = lambda locationIds: download_timeseries(None, "Tablero_Hydro", locationIds, ["Q.obs"], datetime(2026, 2, 1), datetime(2026, 2, 3))
+        first = get(["A", "B"])
+        # same request with locations in another order is served from the cache
+        assert get(["B", "A"]) == first
+        assert len(requests_received) == 1
+        # refresh downloads again and updates the entry
+        cache.configureCache(enabled = True, directory = str(tmp_path), ttl_observed = None, refresh = True)
+        assert get(["A", "B"])["timeSeries"][0]["events"][0]["value"] == "2"
+        cache.configureCache(enabled = True, directory = str(tmp_path), ttl_observed = None)
+        assert get(["A", "B"])["timeSeries"][0]["events"][0]["value"] == "2"
+        assert len(requests_received) == 2
+        # expired entries are not used
+        cache.configureCache(enabled = True, directory = str(tmp_path), ttl_observed = -1)
+        get(["C"])
+        get(["C"])
+        assert len(requests_received) == 4
+    finally:
+        server.shutdown()
+    # least recently used entries are evicted first
+    entries = sorted(os.path.join(root, f) for root, dirs, files in os.walk(tmp_path) for f in files)
+    assert len(entries) == 2
+    # running size total, kept without walking the directory
+    assert cache._cache_size == sum(os.path.getsize(e) for e in entries)
+    os.utime(entries[0], (1, 1))
+    size = os.path.getsize(entries[1])
+    assert cache.cacheEvict(size / 1024 / 1024) == 1
+    assert not os.path.exists(entries[0]) and os.path.exists(entries[1])
+    assert cache.clearCache() == 1
+    assert cache._cache_size == 0
@@ -0,0 +1,50 @@
+import pytest
+pa = pytest.importorskip("pyarrow")
+from app.accessor import Timeseries, TimeseriesValue, value_row_batches
+from app.columnar import readFrame
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import os
+
+def make_series():
+    tz = timezone(timedelta(hours=-3))
+    sim = Timeseries(locationId="5862", parameterId="Q.sim", timestep=timedelta(hours=3), units="m3/s", forecastDate=datetime(2026, 2, 13, 3, tzinfo=timezone.utc), id=1, values=[
+        TimeseriesValue(time=datetime(2026, 2, 13, 0, tzinfo=tz), value=1520.5, flag=0),
+        TimeseriesValue(time=datetime(2026, 2, 13, 3, tzinfo=tz), value=None, flag=None, comment="sin dato")
+    ])
+    obs = Timeseries(locationId="AR_INA_19_INA_24_Q", parameterId="Q.obs", timestep=timedelta(days=1), units="m3/s", id=2, values=[
+        TimeseriesValue(time=datetime(2026, 2, 13, tzinfo=timezone.utc), value=1510.0, flag=1)
+    ])
+    return [sim, obs]
+
+def test_columnar_file_and_dataset(tmp_path):
+    ts_list = make_series()
+    for format in ("parquet", "arrow"):
+        filename = str(tmp_path / ("values.%s" % format))
+        Timeseries.to_file_many(ts_list, filename=filename, format=format)
+        df = readFrame(filename, format=format, partitioning=None)
+        assert list(df["location_id"]) == ["5862", "5862", "AR_INA_19_INA_24_Q"]
+        assert str(df["time"].dt.tz) == "UTC"
+        assert df["time"].iloc[0] == datetime(2026, 2, 13, 3, tzinfo=timezone.utc)
+        assert np.isnan(df["value"].iloc[1]) and df["comment"].iloc[1] == "sin dato"
+        assert df["flag"].isna().tolist() == [False, True, False]
+
+    dataset_dir = str(tmp_path / "dataset")
+    Timeseries.to_file_many(ts_list, format="parquet", dataset_dir=dataset_dir)
+    assert sorted(os.listdir(dataset_dir))[-1] == "forecast_date=__HIVE_DEFAULT_PARTITION__"
+    df = readFrame(dataset_dir, filter=pa.dataset.field("location_id") == "5862")
+    assert len(df) == 2
+    assert (df["forecast_date"] == datetime(2026, 2, 13, 3, tzinfo=timezone.utc)).all()
+
+def test_value_row_batches():
+    headers = make_series()
+    rows = [
+        {"series_id": 1, "time": datetime(2026, 2, 13, 3, tzinfo=timezone.utc), "value": float(i), "flag": None, "comment": None, "id": i}
+        for i in range(5)
+    ] + [{"series_id": 2, "time": datetime(2026, 2, 13, tzinfo=timezone.utc), "value": 1.0, "flag": 1, "comment": None, "id": 5}]
+    batches = list(value_row_batches(headers, iter(rows), include_id=True, batch_size=4))
+    assert [b.num_rows for b in batches] == [4, 2]
+    table = pa.Table.from_batches(batches)
+    assert table.column("location_id").to_pylist()[-1] == "AR_INA_19_INA_24_Q"
+    assert table.column("forecast_date").null_count == 1
+    assert table.column("id").to_pylist() == list(range(6))
@@ -0,0 +1,89 @@
+from app import accessor
+from app.accessor import Timeseries, TimeseriesValue, Location
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+import pytest
+
+forecast_date = datetime(2026, 2, 13, tzinfo=timezone.utc)
+t0 = datetime(2026, 2, 13, 3, tzinfo=timezone.utc)
+step = timedelta(hours=3)
+
+def series(location_id, parameter_id, values, forecast=True):
+    return Timeseries(
+        locationId=location_id,
+        parameterId=parameter_id,
+        timestep=step,
+        units="m3/s",
+        forecastDate=forecast_date if forecast else None,
+        location=Location(locationId=location_id, stationName="Estación %s" % location_id, lat=-27.47, lon=-58.84),
+        values=[TimeseriesValue(time=t0 + i * step, value=v, flag=0) for i, v in enumerate(values)])
+
+def test_create_batch(monkeypatch):
+    events = []
+    headers = {}
+    @contextmanager
+    def fake_transaction(dsn):
+        events.append("begin")
+        try:
+            yield
+        except Exception:
+            events.append("rollback")
+            raise
+        events.append("commit")
+    def fake_fetchall(dsn, stmt, params=()):
+        if "INSERT INTO locations" in stmt:
+            events.append(("locations", list(params[0])))
+            return [{"id": i} for i in params[0]]
+        if "INSERT INTO timeseries" in stmt:
+            events.append(("headers", len(params[0])))
+            matches = []
+            for key in zip(*params[:4]):
+                headers.setdefault(key, len(headers) + 1)
+                matches.append(dict(zip(("location_id", "parameter_id", "qualifier_id", "forecast_date"), key), id=headers[key]))
+            # RETURNING does not follow the order of the input arrays
+            return matches[::-1]
+        raise AssertionError(stmt)
+    def fake_many(dsn, stmt, rows):
+        events.append(("values", sorted(rows)))
+        return len(rows)
+    monkeypatch.setattr(accessor, "transaction", fake_transaction)
+    monkeypatch.setattr(accessor, "execStmtFetchAll", fake_fetchall)
+    monkeypatch.setattr(accessor, "execStmtMany", fake_many)
+    monkeypatch.setitem(accessor.config, "user_dsn", "dbname=test")
+    monkeypatch.setitem(accessor.config, "partitioning", {"enabled": False})
+    monkeypatch.setitem(accessor.config, "packed_storage", {"enabled": False})
+
+    ts_items = [
+        series("5862", "Q.sim", [1.0, None, 3.0]),
+        series("5862", "H.sim", [0.5]),
+        series("6315", "Q.sim", [2.0]),
+        series("5862", "Q.sim", [4.0], forecast=False)
+    ]
+    stats = Timeseries.create_batch(ts_items)
+    # one statement per table, inside a single transaction
+    assert(events[0] == "begin" and events[-1] == "commit")
+    assert(events[1] == ("locations", ["5862", "6315"]))
+    assert(events[2] == ("headers", 4))
+    assert([ts.id for ts in ts_items] == [headers[ts.key()] for ts in ts_items])
+    assert(len(set(ts.id for ts in ts_items)) == 4)
+    # missing values are not written
+    assert(events[3] == ("values", sorted([(ts_items[0].id, t0, 1.0, 0, None), (ts_items[0].id, t0 + 2 * step, 3.0, 0, None), (ts_items[1].id, t0, 0.5, 0, None), (ts_items[2].id, t0, 2.0, 0, None), (ts_items[3].id, t0, 4.0, 0, None)])))
+    assert(stats[0] == {"id": ts_items[0].id, "locationId": "5862", "parameterId": "Q.sim", "qualifierId": None, "forecastDate": forecast_date, "values": 2})
+    assert([s["values"] for s in stats] == [2, 1, 1, 1])
+
+    # items with the same key are saved into the same series
+    events.clear()
+    repeated = [series("5862", "Q.sim", [5.0]), series("5862", "Q.sim", [6.0])]
+    Timeseries.create_batch(repeated)
+    assert(events[2] == ("headers", 1))
+    assert(repeated[0].id == repeated[1].id == ts_items[0].id)
+
+    # a failing statement rolls back the whole batch
+    events.clear()
+    def failing_many(dsn, stmt, rows):
+        raise RuntimeError("conexión perdida")
+    monkeypatch.setattr(accessor, "execStmtMany", failing_many)
+    with pytest.raises(RuntimeError):
+        Timeseries.create_batch(ts_items)
+    assert(events[0] == "begin" and events[-1] == "rollback")
+    assert("commit" not in events)
@@ -0,0 +1,87 @@
+from app import accessor, utils
+from app.accessor import TimeseriesValue
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone
+
+t0 = datetime(2026, 2, 13, 3, tzinfo=timezone.utc)
+
+class FakeDatabase:
+    """timeseries_values by (series_id, time), and the staging table of the COPY path"""
+    def __init__(self):
+        self.values = {}
+        self.stage = []
+        self.statements = []
+
+class FakeCopy:
+    def __init__(self, db):
+        self.db = db
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        return False
+    def write_row(self, row):
+        self.db.stage.append(tuple(row))
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self.rowcount = 0
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        return False
+    def execute(self, stmt, params=()):
+        stmt = stmt if isinstance(stmt, str) else stmt.as_string(None)
+        self.db.statements.append(stmt)
+        if "CREATE TEMP TABLE" in stmt:
+            self.db.stage.clear()
+        elif "FROM timeseries_values_stage" in stmt:
+            # DISTINCT ON keeps the first row of each (series_id, time) in the ORDER BY of the statement
+            merged = {}
+            for i in sorted(range(len(self.db.stage)), reverse="ord DESC" in stmt):
+                merged.setdefault(self.db.stage[i][:2], self.db.stage[i])
+            for row in merged.values():
+                self.db.values[row[:2]] = row[2:]
+            self.rowcount = len(merged)
+    def executemany(self, stmt, rows):
+        self.db.statements.append(stmt.as_string(None))
+        for row in rows:
+            self.db.values[row[:2]] = row[2:]
+        self.rowcount = len(rows)
+    def copy(self, stmt):
+        self.db.statements.append(stmt)
+        return FakeCopy(self.db)
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+    def cursor(self):
+        return FakeCursor(self.db)
+    def transaction(self):
+        return nullcontext()
+
+rows = [
+    (1, t0, 1.0, 0, None),
+    (1, t0 + timedelta(hours=3), 2.0, 0, None),
+    (1, t0, 1.5, 1, "corregido"),
+    (2, t0, 3.0, 0, None)
+]
+
+def create_rows(monkeypatch, copy_threshold):
+    db = FakeDatabase()
+    monkeypatch.setattr(utils, "getConnection", lambda dsn: nullcontext(FakeConnection(db)))
+    monkeypatch.setitem(accessor.config, "user_dsn", "dbname=test")
+    monkeypatch.setitem(accessor.config, "partitioning", {"enabled": False})
+    monkeypatch.setitem(accessor.config, "copy_threshold", copy_threshold)
+    return TimeseriesValue.create_rows(rows), db
+
+def test_create_rows_copy(monkeypatch):
+    count_many, many = create_rows(monkeypatch, len(rows) + 1)
+    assert(not any(s.startswith("COPY") for s in many.statements))
+    count_copy, copied = create_rows(monkeypatch, len(rows))
+    assert(copied.statements == [TimeseriesValue.copy_stage_stmt, TimeseriesValue.copy_stmt, TimeseriesValue.copy_merge_stmt])
+    # same count and same stored values: the last row of a repeated (series_id, time) wins in both paths
+    assert(count_copy == count_many == len(rows))
+    assert(copied.values == many.values)
+    assert(copied.values[(1, t0)] == (1.5, 1, "corregido"))
+    assert(len(copied.values) == 3)
@@ -0,0 +1,29 @@
+from app import accessor
+from app.accessor import Timeseries
+from datetime import datetime, timedelta, timezone
+import pytest
+
+def test_delete(monkeypatch):
+    t0 = datetime(2026, 2, 1, tzinfo=timezone.utc)
+    values = {1: [t0 + timedelta(hours=i) for i in range(25)], 2: [t0]}
+    statements = []
+    monkeypatch.setattr(Timeseries, "read_db", classmethod(lambda cls, **kwargs: iter([Timeseries(locationId="5862", parameterId="Q.sim", timestep=None, units=None, id=i) for i in values])))
+    def fake_many(dsn, stmt, rows):
+        statements.append(stmt)
+        params = rows[0]
+        if stmt.startswith("DELETE FROM timeseries_values"):
+            series_id, timestart, limit = params[0], params[2], params[-1]
+            deleted = [t for t in values[series_id] if t >= timestart][:limit]
+            values[series_id] = [t for t in values[series_id] if t not in deleted]
+            return len(deleted)
+        return len([i for i in params[0] if not len(values[i])])
+    monkeypatch.setattr(accessor, "execStmtMany", fake_many)
+
+    with pytest.raises(ValueError):
+        Timeseries.delete()
+    result = Timeseries.delete(parameterId="Q.sim", timestart=t0 + timedelta(hours=1), batch_size=10)
+    assert result == {"series": 2, "values": 24, "headers": 0}
+    # series 1: batches of 10, 10 and 4 rows; series 2: nothing in range
+    assert len([s for s in statements if s.startswith("DELETE FROM timeseries_values")]) == 4
+    result = Timeseries.delete(parameterId="Q.sim", timestart=t0, batch_size=10)
+    assert result == {"series": 2, "values": 2, "headers": 2}
@@ -0,0 +1,24 @@
+from app import accessor
+from app.accessor import download_incremental
+from datetime import datetime, timedelta, timezone
+
+def test_download_incremental(monkeypatch):
+    marks = {
+        ("A", "Q.obs", ""): datetime(2026, 2, 1, 3, tzinfo=timezone.utc),
+        ("B", "Q.obs", ""): datetime(2026, 2, 1, 3, tzinfo=timezone.utc)
+    }
+    monkeypatch.setattr(accessor.Timeseries, "read_high_water_marks", classmethod(lambda cls, *args: marks))
+    calls = []
+    def fake_download_many(forecastDate, filterId, locationIds, parameterIds, timestart, timeend, qualifierIds, **kwargs):
+        calls.append((sorted(locationIds), timestart, timeend))
+        return {"timeZone": "0.0", "timeSeries": [{"header": {"locationId": l, "parameterId": "Q.obs"}, "events": []} for l in locationIds]}
+    monkeypatch.setattr(accessor, "download_timeseries_many", fake_download_many)
+
+    data = download_incremental("F", ["A", "B", "C"], ["Q.obs"], datetime(2025, 1, 1), datetime(2026, 2, 10), overlap=timedelta(hours=6))
+
+    # A and B share their start (mark minus overlap), C is not stored yet
+    assert sorted(calls) == [
+        (["A", "B"], datetime(2026, 1, 31, 21), datetime(2026, 2, 10)),
+        (["C"], datetime(2025, 1, 1), datetime(2026, 2, 10))
+    ]
+    assert sorted(ts["header"]["locationId"] for ts in data["timeSeries"]) == ["A", "B", "C"]
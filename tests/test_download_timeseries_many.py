@@ -0,0 +1,61 @@
+from app import accessor, cache
+from app.accessor import download_timeseries_many
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import threading
+import json
+
+requests_received = []
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        requests_received.append(query)
+        # first request of each location fails, to exercise retries
+        if len([q for q in requests_received if q["locationIds"] == query["locationIds"]]) == 1:
+            self.send_response(503)
+            self.end_headers()
+            return
+        location_id = query["locationIds"][0]
+        day = query["startTime"][0][0:10]
+        body = json.dumps({
+            "version": "1.32",
+            "timeZone": "0.0",
+            "timeSeries": [{
+                "header": {"locationId": location_id, "parameterId": "Q.obs"},
+                "events": [{"date": day, "time": "00:00:00", "value": "1.0", "flag": "0"}]
+            }]
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def test_download_timeseries_many(monkeypatch):
+    # every request must reach the stub server
+    monkeypatch.setitem(cache.cache_config, "enabled", False)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setitem(accessor.config, "base_url", "http://127.0.0.1:%i" % server.server_address[1])
+    monkeypatch.setitem(accessor.config, "http", {"backoff": 0.01, "max_retries": 2, "timeout": 5.0})
+    try:
+        data = download_timeseries_many(
+            filterId = "Tablero_Hydro",
+            locationIds = ["A", "B"],
+            parameterIds = ["Q.obs"],
+            timestart = datetime(2026, 2, 1),
+            timeend = datetime(2026, 2, 3),
+            locations_per_request = 1,
+            window = timedelta(days=1),
+            max_workers = 4
+        )
+    finally:
+        server.shutdown()
+    assert(sorted(ts["header"]["locationId"] for ts in data["timeSeries"]) == ["A", "B"])
+    for ts in data["timeSeries"]:
+        assert([e["date"] for e in ts["events"]] == ["2026-02-01", "2026-02-02"])
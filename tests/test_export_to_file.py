@@ -0,0 +1,22 @@
+from app import accessor
+from app.accessor import Timeseries, TimeseriesValue
+from datetime import datetime, timedelta, timezone
+import json
+
+def test_export_to_file_json(monkeypatch, tmp_path):
+    t0 = datetime(2026, 2, 13, 3, tzinfo=timezone.utc)
+    headers = [Timeseries(locationId=location_id, parameterId="Q.sim", timestep=timedelta(hours=3), units="m3/s", forecastDate=t0, id=i) for i, location_id in ((1, "5862"), (2, "5863"))]
+    rows = [{"series_id": 1, "time": t0 + timedelta(hours=3 * j), "value": float(j), "flag": 0, "comment": None, "id": None} for j in range(3)]
+    monkeypatch.setattr(accessor, "_store", None)
+    monkeypatch.setitem(accessor.config, "store", {"enabled": False})
+    monkeypatch.setattr(Timeseries, "read", classmethod(lambda cls, **kwargs: iter(headers)))
+    monkeypatch.setattr(TimeseriesValue, "iter_rows", classmethod(lambda cls, *args: iter(rows)))
+    filename = str(tmp_path / "export.json")
+    assert(Timeseries.export_to_file(filename, format="json") == 3)
+    with open(filename, encoding="utf-8") as f:
+        data = json.load(f)
+    # same document as to_file_many: header keys, then values
+    assert([ts["locationId"] for ts in data["timeSeries"]] == ["5862", "5863"])
+    assert(list(data["timeSeries"][0].keys())[-1] == "values")
+    assert([v["value"] for v in data["timeSeries"][0]["values"]] == [0.0, 1.0, 2.0])
+    assert(data["timeSeries"][1]["values"] == [])
@@ -0,0 +1,28 @@
+from app import accessor, cache
+from app.accessor import Timeseries, download_timeseries
+from scripts.fake_fews import FakeFews
+from datetime import datetime, timezone
+
+def test_fake_fews(monkeypatch):
+    monkeypatch.setitem(cache.cache_config, "enabled", False)
+    monkeypatch.setitem(accessor.config, "http", {"backoff": 0.01, "max_retries": 5, "timeout": 5.0})
+    service = FakeFews(hindcast_days=1, horizon_days=2, error_rate=0.3, seed=1)
+    server, base_url = service.start()
+    monkeypatch.setitem(accessor.config, "base_url", base_url)
+    try:
+        sim = Timeseries.from_api_response(download_timeseries(datetime(2026, 2, 13), "Mod_Hydro_Output_Selected"))
+        obs = download_timeseries(None, "Tablero_Hydro", ["AR_INA_19_INA_24_Q", "unknown"], ["Q.obs"], datetime(2026, 2, 1), datetime(2026, 2, 2))
+        again = download_timeseries(None, "Tablero_Hydro", ["AR_INA_19_INA_24_Q"], ["Q.obs"], datetime(2026, 2, 1), datetime(2026, 2, 2))
+    finally:
+        server.shutdown()
+    # every series of the filter, from one day before to two days after the forecast date, every 3 hours
+    assert(len(sim) == len(service.locations["sim"]))
+    assert(sim[0].forecastDate == datetime(2026, 2, 13, tzinfo=timezone.utc))
+    assert(len(sim[0].values) == 25)
+    assert(sim[0].values.datetimes(0) == datetime(2026, 2, 12, tzinfo=timezone.utc))
+    # unknown locations are left out, and responses are deterministic
+    assert([ts["header"]["locationId"] for ts in obs["timeSeries"]] == ["AR_INA_19_INA_24_Q"])
+    assert(len(obs["timeSeries"][0]["events"]) == 9)
+    assert(obs == again)
+    # failed requests were retried
+    assert(any(r[1] == 503 for r in service.requests))
@@ -0,0 +1,35 @@
+from app import accessor
+from app.accessor import ingest_pipeline
+import threading
+import time
+import pytest
+
+def fake_download(fecha_pronostico, filterId, locationIds, parameterIds, timestart, timeend, qualifierIds):
+    time.sleep(0.01)
+    if locationIds == ["L13"]:
+        raise Exception("HTTP 500")
+    return {
+        "timeZone": "-3.0",
+        "timeSeries": [{
+            "header": {"locationId": l, "parameterId": "Q.obs", "timeStep": {"unit": "second", "multiplier": "86400"}, "units": "m3/s", "lat": "-27.4", "lon": "-58.8", "stationName": l},
+            "events": [{"date": "2026-02-0%i" % (d + 1), "time": "00:00:00", "value": str(d), "flag": "0"} for d in range(5)]
+        } for l in locationIds]
+    }
+
+def test_ingest_pipeline(monkeypatch):
+    monkeypatch.setattr(accessor, "download_timeseries", fake_download)
+    written = []
+    def slow_writer(batch):
+        time.sleep(0.02)
+        written.extend(ts.locationId for ts in batch)
+    stats = ingest_pipeline(locationIds=["L%i" % i for i in range(30)], parameterIds=["Q.obs"], max_workers=4, batch_size=4, queue_size=2, skip_errors=True, writer=slow_writer)
+    assert sorted(written) == sorted("L%i" % i for i in range(30) if i != 13)
+    assert stats["download"].items == 29 and stats["parse"].items == 29 and stats["write"].items == 29
+    # the writer is the bottleneck: upstream stages wait for room in the queues
+    assert stats["download"].blocked + stats["parse"].blocked > 0
+
+def test_ingest_pipeline_error(monkeypatch):
+    monkeypatch.setattr(accessor, "download_timeseries", fake_download)
+    with pytest.raises(Exception, match="HTTP 500"):
+        ingest_pipeline(locationIds=["L%i" % i for i in range(30)], parameterIds=["Q.obs"], max_workers=4, writer=lambda batch: None)
+    assert not [t for t in threading.enumerate() if t.name.startswith("ingest-")]
@@ -0,0 +1,26 @@
+from app.accessor import Timeseries, iter_timeseries, TeeReader
+import io
+import json
+
+data = {
+    "version": "1.32",
+    "timeZone": "-3.0",
+    "timeSeries": [
+        {
+            "header": {"type": "instantaneous", "locationId": "5862", "parameterId": "Q.sim", "timeStep": {"unit": "second", "multiplier": "86400"}, "forecastDate": {"date": "2026-02-13", "time": "00:00:00"}, "missVal": "-999.0", "stationName": "5862", "lat": "-27.47", "lon": "-58.84", "units": "m3/s"},
+            "events": [{"date": "2026-02-13", "time": "00:00:00", "value": "1520.5", "flag": "0"}]
+        },
+        {
+            "header": {"type": "instantaneous", "locationId": "6315", "parameterId": "Q.sim", "timeStep": {"unit": "second", "multiplier": "86400"}, "forecastDate": {"date": "2026-02-13", "time": "00:00:00"}, "missVal": "-999.0", "stationName": "6315", "lat": "-27.48", "lon": "-58.85", "units": "m3/s"},
+            "events": [{"date": "2026-02-13", "time": "00:00:00", "value": "-999.0", "flag": "8"}]
+        }
+    ]
+}
+
+def test_iter_timeseries():
+    raw = json.dumps(data).encode()
+    out = io.BytesIO()
+    ts_list = list(Timeseries.from_api_stream(iter_timeseries(TeeReader(io.BytesIO(raw), out))))
+    assert(out.getvalue() == raw)
+    assert([ts.locationId for ts in ts_list] == ["5862", "6315"])
+    assert(ts_list == Timeseries.from_api_response(data))
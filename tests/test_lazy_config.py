@@ -0,0 +1,49 @@
+from app import cache, utils
+from app.accessor import apply_config
+from app.utils import LazyConfig, CONFIG_ENV
+import subprocess
+from pathlib import Path
+import sys
+import json
+import pytest
+
+def test_lazy_config(tmp_path, monkeypatch):
+    loaded = []
+    config = LazyConfig(on_load=loaded.append)
+    monkeypatch.setenv(CONFIG_ENV, str(tmp_path / "missing.json"))
+    assert(not config.loaded)
+    with pytest.raises(FileNotFoundError):
+        config["base_url"]
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps({"base_url": "http://localhost", "pool": {"max_size": 2}}))
+    monkeypatch.setenv(CONFIG_ENV, str(config_file))
+    assert(config.get("pool") == {"max_size": 2})
+    assert(loaded == [{"base_url": "http://localhost", "pool": {"max_size": 2}}])
+    # explicit data or path wins over the environment variable
+    config.load(data={"base_url": "http://other"})
+    assert(dict(config) == {"base_url": "http://other"})
+
+def test_import_side_effects(tmp_path):
+    # no configuration file, logging setup or heavy import when importing app.accessor
+    code = "import sys, logging, json, app.accessor; print(json.dumps([[m for m in ('pandas', 'numpy', 'requests', 'psycopg') if m in sys.modules], len(logging.getLogger().handlers)]))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env={"PYTHONPATH": str(Path(__file__).parents[1])}, capture_output=True, text=True)
+    assert(result.returncode == 0), result.stderr
+    assert(json.loads(result.stdout) == [[], 0])
+
+def test_explicit_settings_survive_load(tmp_path, monkeypatch):
+    for module, name in ((cache, "cache_config"), (cache, "_applied"), (utils, "pool_config"), (utils, "_applied_pool")):
+        monkeypatch.setattr(module, name, dict(getattr(module, name)))
+    monkeypatch.setattr(cache, "_configured", False)
+    monkeypatch.setattr(utils, "_pool_configured", False)
+    # set before the configuration is first read: with configureCache, and directly in pool_config
+    cache.configureCache(enabled=False, directory=str(tmp_path))
+    utils.pool_config["max_size"] = 2
+    config = LazyConfig(on_load=apply_config)
+    config.load(data={"cache": {"enabled": True, "max_size_mb": 5}, "pool": {"max_size": 8, "timeout": 5.0}})
+    assert(cache.cache_config["enabled"] is False and cache.cache_config["directory"] == str(tmp_path))
+    assert(cache.cache_config["max_size_mb"] == 1024.0)
+    assert(utils.pool_config["max_size"] == 2 and utils.pool_config["timeout"] == 5.0)
+    # a reload applies the new file settings, still under the explicit ones
+    config.load(data={"pool": {"max_size": 8, "timeout": 7.0}})
+    assert(utils.pool_config["max_size"] == 2 and utils.pool_config["timeout"] == 7.0)
+    assert(cache.cache_config["enabled"] is False)
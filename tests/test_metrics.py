@@ -0,0 +1,34 @@
+from app.metrics import compute_metrics
+import numpy as np
+import pandas as pd
+
+def make_pairs(n_stations = 3, n_dates = 20, n_leads = 5, seed = 0):
+    rng = np.random.default_rng(seed)
+    forecast_dates = pd.date_range("2025-01-01", periods=n_dates, freq="D", tz="UTC")
+    rows = []
+    for station in range(n_stations):
+        for fd in forecast_dates:
+            for lead in range(n_leads):
+                obs = rng.gamma(2.0, 100.0)
+                rows.append({"station": "S%i" % station, "forecast_date": fd, "time": fd + pd.Timedelta(days=lead), "obs": obs, "sim": obs * rng.normal(1.0, 0.1 * (lead + 1))})
+    return pd.DataFrame(rows)
+
+def test_compute_metrics():
+    df = make_pairs()
+    df.loc[3, "obs"] = np.nan
+    metrics = compute_metrics(df)
+    assert(len(metrics) == 3 * 5)
+    # reference values for one group
+    g = df[(df["station"] == "S1") & (df["time"] - df["forecast_date"] == pd.Timedelta(days=2))].dropna()
+    o, s = g["obs"].to_numpy(), g["sim"].to_numpy()
+    row = metrics[(metrics["station"] == "S1") & (metrics["lead_time"] == pd.Timedelta(days=2))].iloc[0]
+    r = np.corrcoef(o, s)[0, 1]
+    assert(row["n"] == len(g))
+    assert(np.isclose(row["nse"], 1 - ((s - o) ** 2).sum() / ((o - o.mean()) ** 2).sum()))
+    assert(np.isclose(row["pearson"], r))
+    assert(np.isclose(row["kge"], 1 - np.sqrt((r - 1) ** 2 + (s.std() / o.std() - 1) ** 2 + (s.mean() / o.mean() - 1) ** 2)))
+    assert(np.isclose(row["rmse"], np.sqrt(((s - o) ** 2).mean())))
+    assert(np.isclose(row["pbias"], 100 * (s - o).sum() / o.sum()))
+    assert(np.isclose(row["spearman"], np.corrcoef(pd.Series(o).rank(), pd.Series(s).rank())[0, 1]))
+    # the NaN pair is excluded
+    assert(metrics[(metrics["station"] == "S0") & (metrics["lead_time"] == pd.Timedelta(days=3))].iloc[0]["n"] == 19)
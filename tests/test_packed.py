@@ -0,0 +1,86 @@
+from app import accessor
+from app.accessor import Timeseries, TimeseriesValue, TimeseriesValues
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone
+
+t0 = datetime(2026, 2, 13, 3, tzinfo=timezone.utc)
+step = timedelta(hours=3)
+
+def regular(values, start=t0, flag=0):
+    return TimeseriesValues.from_list([TimeseriesValue(time=start + i * step, value=v, flag=flag) for i, v in enumerate(values) if v is not None])
+
+def test_to_chunks():
+    chunks = regular([1.0, None, 3.0, 4.0, None, None, None, None, 9.0]).to_chunks(step, 4)
+    # missing values inside a chunk are None, chunks without values are skipped
+    assert chunks == [
+        (t0, [1.0, None, 3.0, 4.0], [0, None, 0, 0]),
+        (t0 + 8 * step, [9.0], [0])
+    ]
+    assert regular([]).to_chunks(step, 4) == []
+    # off-grid times, comments, large flags or no timestep fit only the row layout
+    off_grid = TimeseriesValues.from_list([TimeseriesValue(time=t0, value=1.0, flag=0), TimeseriesValue(time=t0 + timedelta(hours=4), value=2.0, flag=0)])
+    assert off_grid.to_chunks(step, 4) is None
+    assert TimeseriesValues.from_list([TimeseriesValue(time=t0, value=1.0, flag=0, comment="corregido")]).to_chunks(step, 4) is None
+    assert regular([1.0], flag=40000).to_chunks(step, 4) is None
+    assert regular([1.0]).to_chunks(None, 4) is None
+
+def test_create_packed(monkeypatch):
+    # timeseries_packed by series id, read back through the timeseries_values_all view
+    packed = {}
+    statements = []
+    def stored_rows(ids):
+        return [
+            {"series_id": series_id, "time": start + i * timestep, "value": v, "flag": f, "comment": None, "id": None}
+            for series_id in sorted(ids)
+            for start, (timestep, values, flags) in sorted(packed.get(series_id, {}).items())
+            for i, (v, f) in enumerate(zip(values, flags)) if v is not None
+        ]
+    def fake_fetchall(dsn, stmt, params=()):
+        statements.append(stmt)
+        return stored_rows(params[0]) if stmt == TimeseriesValue.packed_read_stmt else []
+    def fake_many(dsn, stmt, rows):
+        statements.append(stmt)
+        if stmt.startswith("DELETE FROM timeseries_packed"):
+            for series_id in rows[0][0]:
+                packed.pop(series_id, None)
+        elif stmt == TimeseriesValue.packed_create_stmt:
+            for series_id, start, timestep, values, flags in rows:
+                packed.setdefault(series_id, {})[start] = (timestep, values, flags)
+        else:
+            raise AssertionError(stmt)
+        return len(rows)
+    rows_created = []
+    monkeypatch.setattr(accessor, "transaction", lambda dsn: nullcontext())
+    monkeypatch.setattr(accessor, "execStmtFetchAll", fake_fetchall)
+    monkeypatch.setattr(accessor, "execStmtMany", fake_many)
+    monkeypatch.setattr(TimeseriesValue, "create_rows", classmethod(lambda cls, rows: rows_created.extend(rows) or len(rows)))
+    monkeypatch.setitem(accessor.config, "user_dsn", "dbname=test")
+    monkeypatch.setitem(accessor.config, "packed_storage", {"enabled": True, "chunk_size": 4})
+
+    assert TimeseriesValue.create_packed(regular([1.0, 2.0, 3.0, 4.0, 5.0]), 1, step) == 5
+    assert sorted(packed[1]) == [t0, t0 + 4 * step]
+    # upsert: new values win at equal times, the series is extended and rewritten
+    assert TimeseriesValue.create_packed(regular([2.5, None, 6.0], start=t0 + step), 1, step) == 2
+    stored = TimeseriesValues.from_rows(stored_rows([1]))
+    assert [v.value for v in stored] == [1.0, 2.5, 3.0, 6.0, 5.0]
+    assert stored.ids is None
+
+    # several series in a fixed number of statements; an off-grid series falls back to rows
+    statements.clear()
+    off_grid = TimeseriesValues.from_list([TimeseriesValue(time=t0, value=1.0, flag=0), TimeseriesValue(time=t0 + timedelta(hours=4), value=2.0, flag=0)])
+    counts = TimeseriesValue.create_packed_many([(regular([7.0]), 1, step), (regular([1.0, 2.0]), 2, step), (regular([3.0], start=t0 + step), 2, step), (off_grid, 3, step)])
+    assert counts == [1, 2, 1, 2]
+    assert len(statements) == 4
+    assert [v.value for v in TimeseriesValues.from_rows(stored_rows([1]))] == [7.0, 2.5, 3.0, 6.0, 5.0]
+    assert [v.value for v in TimeseriesValues.from_rows(stored_rows([2]))] == [1.0, 3.0]
+    assert [r[0] for r in rows_created] == [3, 3] and 3 not in packed
+
+    sim = Timeseries(locationId="5862", parameterId="Q.sim", timestep=step, units="m3/s", forecastDate=t0)
+    obs = Timeseries(locationId="AR_INA_8_INA_24_Q", parameterId="Q.obs", timestep=step, units="m3/s")
+    assert sim.packable() and not obs.packable()
+    monkeypatch.setitem(accessor.config, "packed_storage", {"enabled": True, "forecasts_only": False})
+    assert obs.packable()
+    assert accessor.values_relation() == "timeseries_values_all"
+    monkeypatch.setitem(accessor.config, "packed_storage", {"enabled": False})
+    assert not sim.packable()
+    assert accessor.values_relation() == "timeseries_values"
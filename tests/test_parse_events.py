@@ -0,0 +1,15 @@
+from app.accessor import TimeseriesValue, parseEvents
+import numpy as np
+
+events = [
+    {"date": "2026-02-13", "time": "00:00:00", "value": "1520.5", "flag": "0"},
+    {"date": "2026-02-13", "time": "03:00:00", "value": "-999.0", "flag": "8"},
+    {"date": "2026-02-13", "time": "06:00:00", "value": "1498.0", "flag": "2"}
+]
+
+def test_parse_events():
+    columns = parseEvents(events, -3.0, -999.0)
+    assert(columns["time"][0] == np.datetime64("2026-02-13T03:00:00"))
+    assert(np.isnan(columns["value"][1]))
+    assert(columns["flag"].tolist() == [0, 8, 2])
+    assert(TimeseriesValue.from_columns(columns, -3.0) == [TimeseriesValue.parse_one(e, -3.0, -999.0) for e in events])
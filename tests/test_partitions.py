@@ -0,0 +1,166 @@
+from app import accessor, createdb
+from app.accessor import Timeseries, TimeseriesValue, ensure_partitions
+from app.createdb import applyRetention, partitionValues, pruneChunks
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+import os
+import pytest
+
+t0 = datetime(2026, 2, 13, 3, tzinfo=timezone.utc)
+
+def test_ensure_partitions(monkeypatch):
+    calls = []
+    in_transaction = [True]
+    monkeypatch.setattr(accessor, "_ensured_partitions", set())
+    monkeypatch.setattr(accessor, "execStmt", lambda dsn, stmt, params: calls.append(params) or 1)
+    monkeypatch.setattr(accessor, "inTransaction", lambda dsn: in_transaction[0])
+    monkeypatch.setitem(accessor.config, "user_dsn", "dbname=test")
+    monkeypatch.setitem(accessor.config, "partitioning", {"enabled": True, "interval": "month"})
+    # inside a transaction the range is not remembered: a rollback would undo the partitions
+    ensure_partitions(t0, t0)
+    ensure_partitions(t0, t0)
+    assert(len(calls) == 2)
+    # committed on its own: remembered
+    in_transaction[0] = False
+    ensure_partitions(t0, t0)
+    ensure_partitions(t0, t0)
+    assert(len(calls) == 3)
+    # range of the present values of the series to save
+    calls.clear()
+    accessor._ensured_partitions.clear()
+    ts = Timeseries(locationId="5862", parameterId="Q.sim", timestep=timedelta(hours=3), units="m3/s", values=[
+        TimeseriesValue(time=t0 - timedelta(days=30), value=None, flag=0),
+        TimeseriesValue(time=t0, value=1.0, flag=0),
+        TimeseriesValue(time=t0 + timedelta(days=20), value=2.0, flag=0)
+    ])
+    accessor.ensure_series_partitions([ts, Timeseries(locationId="5863", parameterId="Q.sim", timestep=None, units=None)])
+    assert(calls == [(t0, t0 + timedelta(days=20), "month")])
+
+class FakeCursor:
+    """Cursor over an in-memory catalog: partitions of timeseries_values (name -> holds forecast values) and other tables"""
+    def __init__(self, partitions, tables=(), partitioned=True, packed=False):
+        self.partitions = dict(partitions)
+        self.tables = set(tables)
+        self.partitioned = partitioned
+        self.packed = packed
+        self.statements = []
+        self.rowcount = 0
+        self.result = None
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        return False
+    def execute(self, stmt, params=()):
+        stmt = stmt if isinstance(stmt, str) else stmt.as_string(None)
+        self.statements.append(" ".join(stmt.split()))
+        self.rowcount = 1
+        self.result = None
+        name = stmt.split('"')[1] if '"' in stmt else None
+        if "pg_partitioned_table" in stmt and "partrelid" in stmt and "FUNCTION" not in stmt:
+            self.result = [(1,)] if self.partitioned else []
+        elif "to_regclass('timeseries_packed')" in stmt:
+            self.result = [(self.packed,)]
+        elif "pg_inherits" in stmt:
+            self.result = [(n,) for n in sorted(self.partitions)]
+        elif stmt.startswith("SELECT EXISTS"):
+            self.result = [(self.partitions[name],)]
+        elif stmt.startswith("SELECT to_regclass(%s)"):
+            self.result = [(params[0] in self.tables or params[0] in self.partitions,)]
+        elif "DETACH PARTITION" in stmt:
+            self.tables.add(name)
+            del self.partitions[name]
+        elif "RENAME TO" in stmt and name is not None:
+            self.tables.remove(name)
+            self.tables.add(stmt.split('"')[3])
+        elif "timeseries_values_ensure_partitions" in stmt and "FUNCTION" not in stmt:
+            bounds = params[0]
+            self.partitions["timeseries_values_p%04i%02i" % (bounds.year, bounds.month)] = False
+            self.result = [(1,)]
+        elif stmt.startswith("DROP TABLE") and name is not None:
+            self.tables.remove(name)
+        elif "min(time), max(time)" in stmt:
+            self.result = [(t0, t0 + timedelta(days=40))]
+    def fetchone(self):
+        return self.result[0] if self.result else None
+    def fetchall(self):
+        return self.result
+
+class FakeConnection:
+    def __init__(self, cur):
+        self.cur = cur
+        self.committed = False
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        return False
+    def cursor(self):
+        return self.cur
+    def commit(self):
+        self.committed = True
+
+def use_cursor(monkeypatch, cur):
+    conn = FakeConnection(cur)
+    monkeypatch.setattr(createdb, "psycopg", SimpleNamespace(connect=lambda dsn: conn))
+    monkeypatch.setitem(createdb.config, "user_dsn", "dbname=test")
+    # schema files are read from the working directory
+    monkeypatch.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return conn
+
+def test_partition_values(monkeypatch):
+    cur = FakeCursor({}, partitioned=False)
+    conn = use_cursor(monkeypatch, cur)
+    partitionValues("month")
+    assert(conn.committed)
+    assert(any(s.startswith("LOCK TABLE timeseries_values") for s in cur.statements))
+    assert(any("PARTITION BY RANGE (time)" in s for s in cur.statements))
+    assert(any("timeseries_values_ensure_partitions(%s, %s, %s)" in s for s in cur.statements))
+    assert(cur.statements[-1] == "DROP TABLE timeseries_values_unpartitioned")
+    # already partitioned: nothing is moved
+    cur = FakeCursor({})
+    use_cursor(monkeypatch, cur)
+    partitionValues("month")
+    assert(not any(s.startswith("LOCK TABLE") for s in cur.statements))
+
+def test_apply_retention(monkeypatch):
+    before = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    cur = FakeCursor({"timeseries_values_p202511": True, "timeseries_values_p202512": True, "timeseries_values_p202601": True, "timeseries_values_default": True})
+    use_cursor(monkeypatch, cur)
+    assert(applyRetention(before) == ["timeseries_values_p202511", "timeseries_values_p202512"])
+    assert(len([s for s in cur.statements if s.startswith("INSERT INTO timeseries_values")]) == 2)
+    assert(cur.tables == set())
+    # recreated partitions hold only observed values: a second run rewrites nothing
+    assert(sorted(cur.partitions) == ["timeseries_values_default", "timeseries_values_p202511", "timeseries_values_p202512", "timeseries_values_p202601"])
+    cur.statements.clear()
+    assert(applyRetention(before) == [])
+    assert(not any(s.startswith(("ALTER TABLE", "INSERT", "DROP")) for s in cur.statements))
+
+def test_apply_retention_detach_only(monkeypatch):
+    before = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    cur = FakeCursor({"timeseries_values_p202512": True})
+    use_cursor(monkeypatch, cur)
+    assert(applyRetention(before, detach_only=True) == ["timeseries_values_p202512"])
+    assert(cur.tables == {"timeseries_values_p202512_detached"})
+    # new forecasts in the kept range, detached again under a free name
+    cur.partitions["timeseries_values_p202512"] = True
+    assert(applyRetention(before, detach_only=True) == ["timeseries_values_p202512"])
+    assert(cur.tables == {"timeseries_values_p202512_detached", "timeseries_values_p202512_detached_2"})
+    # without observed values the partitions are dropped, not recreated
+    assert(applyRetention(before, keep_observed=False) == ["timeseries_values_p202512"])
+    assert(cur.partitions == {})
+    assert(not any("ensure_partitions" in s for s in cur.statements[-4:]))
+
+def test_prune_chunks(monkeypatch):
+    before = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    cur = FakeCursor({}, partitioned=False, packed=True)
+    use_cursor(monkeypatch, cur)
+    assert(applyRetention(before) == [])
+    assert(cur.statements[-1].startswith("DELETE FROM timeseries_packed p WHERE") and "forecast_date <> %s" in cur.statements[-1])
+    cur.statements.clear()
+    pruneChunks(cur, before, keep_observed=False, detach_only=True)
+    assert(cur.statements[0].startswith("CREATE TABLE IF NOT EXISTS timeseries_packed_detached"))
+    assert(cur.statements[1].startswith("WITH moved AS (DELETE FROM timeseries_packed p") and "forecast_date" not in cur.statements[1])
+    # neither partitioned nor packed
+    use_cursor(monkeypatch, FakeCursor({}, partitioned=False))
+    with pytest.raises(ValueError):
+        applyRetention(before)
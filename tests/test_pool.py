@@ -0,0 +1,116 @@
+from app import utils
+from app.utils import getPool, transaction, inTransaction, execStmt, execStmtMany, execStmtFetchAll, connection_stats
+from contextlib import contextmanager
+from types import SimpleNamespace
+import pytest
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rowcount = 0
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        return False
+    def execute(self, stmt, params=()):
+        self.conn.statements.append(stmt.as_string(None))
+    def executemany(self, stmt, rows):
+        self.conn.statements.append(stmt.as_string(None))
+        self.rowcount = len(rows)
+    def fetchone(self):
+        return (1,)
+    def fetchall(self):
+        return [{"id": 1}]
+
+class FakeConnection:
+    def __init__(self, log):
+        self.log = log
+        self.statements = []
+        self.depth = 0
+    def cursor(self, row_factory=None):
+        return FakeCursor(self)
+    @contextmanager
+    def transaction(self):
+        # the outermost block is the transaction, nested ones are savepoints
+        kind = "transaction" if self.depth == 0 else "savepoint"
+        self.depth += 1
+        try:
+            yield
+        except Exception:
+            self.log.append(("rollback", kind))
+            raise
+        else:
+            self.log.append(("commit", kind))
+        finally:
+            self.depth -= 1
+
+class FakePool:
+    created = []
+    def __init__(self, dsn, configure=None, **kwargs):
+        self.dsn = dsn
+        self.configure = configure
+        self.log = []
+        self.connections = []
+        FakePool.created.append(self)
+    @staticmethod
+    def check_connection(conn):
+        pass
+    @contextmanager
+    def connection(self):
+        conn = FakeConnection(self.log)
+        self.configure(conn)
+        self.connections.append(conn)
+        yield conn
+    def close(self):
+        pass
+
+@pytest.fixture
+def pool(monkeypatch):
+    FakePool.created = []
+    monkeypatch.setattr(utils, "psycopg_pool", SimpleNamespace(ConnectionPool=FakePool))
+    monkeypatch.setattr(utils, "_pools", {})
+    monkeypatch.setitem(utils.pool_config, "enabled", True)
+    monkeypatch.setitem(connection_stats, "opened", 0)
+    return FakePool
+
+def test_pool_per_dsn(pool):
+    assert(getPool("dbname=a") is getPool("dbname=a"))
+    assert(getPool("dbname=a") is not getPool("dbname=b"))
+    assert(len(pool.created) == 2)
+    # outside a transaction each statement borrows a connection
+    execStmt("dbname=a", "SELECT 1")
+    execStmt("dbname=a", "SELECT 1")
+    assert(len(pool.created[0].connections) == 2)
+    assert(connection_stats["opened"] == 2)
+
+def test_transaction(pool):
+    assert(not inTransaction("dbname=a"))
+    with transaction("dbname=a") as conn:
+        assert(inTransaction("dbname=a") and not inTransaction("dbname=b"))
+        assert(execStmt("dbname=a", "SELECT 1") == 1)
+        assert(execStmtMany("dbname=a", "INSERT INTO t VALUES (%s)", [(1,), (2,)]) == 2)
+        with transaction("dbname=a") as nested:
+            assert(nested is conn)
+            assert(execStmtFetchAll("dbname=a", "SELECT id FROM t") == [{"id": 1}])
+        # other dsn: connection of its own
+        execStmt("dbname=b", "SELECT 1")
+    assert(not inTransaction("dbname=a"))
+    pool_a = getPool("dbname=a")
+    assert(len(pool_a.connections) == 1)
+    assert(len(conn.statements) == 3)
+    assert(pool_a.log == [("commit", "savepoint"), ("commit", "transaction")])
+    assert(len(getPool("dbname=b").connections) == 1)
+
+def test_transaction_rollback(pool):
+    with pytest.raises(RuntimeError):
+        with transaction("dbname=a"):
+            execStmt("dbname=a", "SELECT 1")
+            with pytest.raises(ValueError):
+                with transaction("dbname=a"):
+                    raise ValueError("savepoint")
+            raise RuntimeError("falla")
+    assert(getPool("dbname=a").log == [("rollback", "savepoint"), ("rollback", "transaction")])
+    # the connection is released: later statements borrow a new one
+    assert(not inTransaction("dbname=a"))
+    execStmt("dbname=a", "SELECT 1")
+    assert(len(getPool("dbname=a").connections) == 2)
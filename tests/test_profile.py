@@ -0,0 +1,38 @@
+from app import utils
+from app.accessor import Timeseries
+from app.utils import enableProfiling, profileReport, profileTable, profileSpan, execStmtMany
+from app.synthetic import synthetic_response
+from contextlib import nullcontext
+
+class FakeCursor:
+    rowcount = 2
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        return False
+    def executemany(self, stmt, rows):
+        pass
+
+class FakeConnection:
+    def cursor(self):
+        return FakeCursor()
+
+def test_profile(monkeypatch):
+    data = synthetic_response(4, 100, seed=1)
+    enableProfiling(False)
+    Timeseries.from_api_response(data)
+    assert(profileSpan("parse") is profileSpan("other"))
+
+    enableProfiling()
+    try:
+        Timeseries.from_api_response(data)
+        monkeypatch.setattr(utils, "getConnection", lambda dsn: nullcontext(FakeConnection()))
+        execStmtMany("dbname=test", "INSERT INTO t VALUES (%s)", [(1,), (2,)])
+        report = profileReport()
+    finally:
+        enableProfiling(False)
+    assert(report["spans"]["parse"]["calls"] == 4)
+    assert(report["spans"]["parse_events"]["calls"] == 4)
+    assert(report["spans"]["sql"]["calls"] == 1)
+    assert(report["counters"] == {"series_parsed": 4, "events_parsed": 400, "sql_statements": 1, "rows_written": 2})
+    assert("parse_events" in profileTable(report))
@@ -0,0 +1,20 @@
+from app import accessor
+from app.accessor import Timeseries, SENTINEL
+from datetime import timedelta
+import pytest
+
+def header(id, location_id, has_location=True):
+    return {"id": id, "location_id": location_id, "parameter_id": "Q.sim", "timestep": timedelta(hours=3), "units": "m3/s", "qualifier_id": "", "forecast_date": SENTINEL, "station_name": location_id if has_location else None, "lon": -58.84 if has_location else None, "lat": -27.47 if has_location else None, "has_location": has_location}
+
+def test_read_db_missing_location(monkeypatch):
+    rows = [header(1, "5862")]
+    statements = []
+    monkeypatch.setattr(accessor, "execStmtFetchAll", lambda dsn, stmt, params=(): statements.append(stmt) or rows)
+    monkeypatch.setitem(accessor.config, "user_dsn", "dbname=test")
+    ts_list = list(Timeseries.read_db(parameterId="Q.sim", metadata_only=True))
+    assert [(ts.id, ts.location.stationName) for ts in ts_list] == [(1, "5862")]
+    assert "LEFT JOIN locations" in statements[0]
+    # a series whose location row is missing is not silently dropped
+    rows.append(header(2, "6315", has_location=False))
+    with pytest.raises(ValueError):
+        list(Timeseries.read_db(parameterId="Q.sim", metadata_only=True))
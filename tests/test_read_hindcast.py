@@ -0,0 +1,27 @@
+from app import accessor
+from app.accessor import Timeseries
+from datetime import datetime, timedelta, timezone
+import numpy as np
+
+def test_read_hindcast():
+    hindcast = Timeseries.read_hindcast(
+        locationId = "5862",
+        obs_locationId = "AR_INA_8_INA_24_Q",
+        forecast_date_end = datetime(2026,2,13,3,0,0,tzinfo=timezone.utc)
+    )
+    assert(hindcast.sim.shape == (len(hindcast.forecast_dates), len(hindcast.lead_times)))
+    assert(hindcast.obs_matrix().shape == hindcast.sim.shape)
+
+def test_read_hindcast_grid(monkeypatch):
+    fd = datetime(2026, 2, 13, 3, tzinfo=timezone.utc)
+    rows = [{"forecast_date": fd, "timestep": None, "time": fd + timedelta(hours=3), "sim": 1.0, "obs": None}]
+    monkeypatch.setattr(accessor, "execStmtFetchAll", lambda dsn, sql, params: rows)
+    monkeypatch.setitem(accessor.config, "user_dsn", "dbname=test")
+    # one value and no timestep: one lead time
+    hindcast = Timeseries.read_hindcast(locationId = "5862")
+    assert(hindcast.sim.shape == (1, 1))
+    assert(list(hindcast.lead_times) == [np.timedelta64(3, "h")])
+    # values off the timestep grid are discarded instead of snapped onto a lead step
+    rows = [{"forecast_date": fd, "timestep": timedelta(hours=3), "time": fd + timedelta(hours=h), "sim": float(h), "obs": None} for h in (0, 3, 4, 6)]
+    hindcast = Timeseries.read_hindcast(locationId = "5862")
+    assert(hindcast.sim.tolist() == [[0.0, 3.0, 6.0]])
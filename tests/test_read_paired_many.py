@@ -0,0 +1,10 @@
+from app.accessor import Timeseries
+from datetime import datetime, timezone
+
+def test_read_paired_many():
+    df = Timeseries.read_paired_many(
+        [("AR_INA_8_INA_24_Q", "5862")],
+        [datetime(2026,2,13,3,0,0,tzinfo=timezone.utc)]
+    )
+    assert(df is not None)
+    assert(list(df.columns) == ["station", "sim_location", "forecast_date", "time", "obs", "sim"])
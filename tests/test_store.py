@@ -0,0 +1,64 @@
+from app import accessor
+from app.accessor import Timeseries, TimeseriesValue
+from app.store import SeriesStore
+from app.synthetic import synthetic_response
+from datetime import datetime, timedelta, timezone
+import numpy as np
+
+forecast_date = datetime(2026, 2, 13, 3, tzinfo=timezone.utc)
+
+def hourly(start, values, flag=0):
+    return [TimeseriesValue(time=start + timedelta(hours=3 * i), value=v, flag=flag) for i, v in enumerate(values)]
+
+def test_store(tmp_path):
+    store = SeriesStore(str(tmp_path))
+    t0 = datetime(2026, 2, 13, 3, tzinfo=timezone.utc)
+    store.write([
+        Timeseries(locationId="AR_INA_8_INA_24_Q", parameterId="Q.obs", timestep=timedelta(hours=3), units="m3/s", values=hourly(t0, [10.0, 11.0, 12.0], flag=1)),
+        Timeseries(locationId="5862", parameterId="Q.sim", timestep=timedelta(hours=3), units="m3/s", forecastDate=forecast_date, values=hourly(t0, [9.0, 10.5, 12.5, 13.0]))
+    ])
+    # upsert: replaces the value at an existing time and appends a new one
+    store.write([Timeseries(locationId="AR_INA_8_INA_24_Q", parameterId="Q.obs", timestep=timedelta(hours=3), units="m3/s", values=[
+        TimeseriesValue(time=t0 + timedelta(hours=6), value=12.2, flag=1, comment="corregido"),
+        TimeseriesValue(time=t0 - timedelta(hours=3), value=9.5, flag=1)
+    ])])
+    assert len(store.catalog()["series"]) == 2
+
+    obs = store.read_one("AR_INA_8_INA_24_Q", "Q.obs")
+    assert [v.value for v in obs.values] == [9.5, 10.0, 11.0, 12.2]
+    assert obs.values[3].comment == "corregido"
+
+    # time range slices are views of the memory-mapped files
+    sliced = store.read_one("AR_INA_8_INA_24_Q", "Q.obs", timestart=t0, timeend=t0 + timedelta(hours=3)).values
+    assert [v.value for v in sliced] == [10.0, 11.0]
+    assert isinstance(sliced.value.base, np.memmap) or isinstance(sliced.value, np.memmap)
+
+    # accessor reads go to the store
+    accessor.use_store(str(tmp_path))
+    try:
+        assert [ts.locationId for ts in Timeseries.read(parameterId="Q.sim")] == ["5862"]
+        df = Timeseries.read_paired(
+            {"locationId": "AR_INA_8_INA_24_Q", "parameterId": "Q.obs"},
+            {"locationId": "5862", "parameterId": "Q.sim", "forecastDate": forecast_date}
+        )
+    finally:
+        accessor.use_store(None)
+    assert df["obs"].tolist()[:3] == [10.0, 11.0, 12.2]
+    assert np.isnan(df["obs"].iloc[3])
+    assert df["sim"].tolist() == [9.0, 10.5, 12.5, 13.0]
+    # observed flag filter with an empty observed series keeps no row
+    store.write([Timeseries(locationId="AR_INA_19_INA_24_Q", parameterId="Q.obs", timestep=timedelta(hours=3), units="m3/s", values=[])])
+    df = store.read_paired({"locationId": "AR_INA_19_INA_24_Q", "parameterId": "Q.obs"}, {"locationId": "5862", "parameterId": "Q.sim", "forecastDate": forecast_date}, obs_flag=1)
+    assert len(df) == 0
+
+def test_store_write_stream(tmp_path):
+    # series parsed one at a time, as get --stream --store does
+    data = synthetic_response(3, 10, seed=1)
+    store = SeriesStore(str(tmp_path))
+    assert store.write(Timeseries.from_api_stream((0.0, d) for d in data["timeSeries"])) == 30
+    assert len(store.catalog()["series"]) == 3
+    # missing values are not counted as written
+    data = synthetic_response(3, 10, 0.3, seed=2)
+    present = sum(1 for d in data["timeSeries"] for e in d["events"] if e["value"] != d["header"]["missVal"])
+    assert present < 30
+    assert store.write(Timeseries.from_api_response(data)) == present
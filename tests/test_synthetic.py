@@ -0,0 +1,16 @@
+from app.accessor import Timeseries
+from app.synthetic import synthetic_response
+import numpy as np
+from datetime import datetime, timezone
+
+def test_synthetic_response():
+    data = synthetic_response(3, 2000, miss_density=0.1, time_zone=-3.0, seed=1)
+    assert(data == synthetic_response(3, 2000, miss_density=0.1, time_zone=-3.0, seed=1))
+    assert(data != synthetic_response(3, 2000, miss_density=0.1, time_zone=-3.0, seed=2))
+    ts_list = Timeseries.from_api_response(data)
+    assert(len(ts_list) == 3)
+    assert([len(ts.values) for ts in ts_list] == [2000, 2000, 2000])
+    missing = np.mean([np.isnan(ts.values.value).mean() for ts in ts_list])
+    assert(0.07 < missing < 0.13)
+    # forecast date 2026-02-13 00:00 at UTC-3
+    assert(ts_list[0].forecastDate == datetime(2026, 2, 13, 3, tzinfo=timezone.utc))
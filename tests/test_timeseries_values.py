@@ -0,0 +1,29 @@
+from app.accessor import Timeseries, TimeseriesValue, TimeseriesValues
+from datetime import datetime, timedelta, timezone
+
+tz = timezone(timedelta(hours=-3))
+
+values = [
+    TimeseriesValue(time=datetime(2026, 2, 13, 0, tzinfo=tz), value=1520.5, flag=0),
+    TimeseriesValue(time=datetime(2026, 2, 13, 3, tzinfo=tz), value=None, flag=None, comment="sin dato"),
+    TimeseriesValue(time=datetime(2026, 2, 13, 6, tzinfo=tz), value=1498.0, flag=2)
+]
+
+def test_timeseries_values():
+    ts = Timeseries(locationId="5862", parameterId="Q.sim", timestep=timedelta(hours=3), units="m3/s", values=values)
+    assert(isinstance(ts.values, TimeseriesValues))
+    assert(list(ts.values) == values)
+    assert(ts.values[1] == values[1])
+    assert([row[1] for row in ts.values.to_rows(1)] == [values[0].time, values[2].time])
+    df = ts.to_df()
+    assert(list(df.columns) == ["time", "value", "flag", "timeseries_id", "comment", "id"])
+    assert(ts.to_dict(True, include_id=False)["values"][2] == {"time": "2026-02-13T06:00:00-03:00", "value": 1498.0, "flag": 2, "comment": None})
+
+def test_timeseries_values_slice():
+    ts = Timeseries(locationId="5862", parameterId="Q.sim", timestep=timedelta(hours=3), units="m3/s", values=values)
+    # slices behave as on the former list of values, comments follow their values
+    assert(isinstance(ts.values[1:], TimeseriesValues))
+    assert(list(ts.values[1:]) == values[1:])
+    assert(list(ts.values[::-1]) == values[::-1])
+    assert(list(ts.values[::2]) == values[::2])
+    assert(list(ts.values[5:]) == [])